@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""A benchmark comparing ``re.match`` on every path with the compiled query plans of ``QueryBuilder``."""
+
+import re
+import sys
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+from re import Pattern
+
+sys.path.append(str(Path(Path(__file__).parent.parent, "src").absolute()))
+
+# pylint: disable-next=C0413
+from mc_resourcepacks_util_shared.library.query_builder import QueryPlan  # noqa: E402
+
+
+def create_paths(path_count: int) -> list[str]:
+    """Creates entry paths shaped like the contents of mods and resourcepacks.
+
+    Args:
+        path_count (int): The amount of paths to create.
+
+    Returns:
+        list[str]: The paths.
+    """
+    namespaces: list[str] = ["minecraft", "create", "botania", "mekanism", "thermal"]
+    folders: list[str] = ["textures/block", "textures/item", "models/block", "blockstates", "lang"]
+    return [
+        f"assets/{namespaces[index % len(namespaces)]}/{folders[index // 7 % len(folders)]}/generated_{index}.png"
+        for index in range(path_count)
+    ]
+
+
+def main() -> None:
+    """Runs the benchmark for every query."""
+    parser: ArgumentParser = ArgumentParser(description="Benchmarks query plans against re.match on many paths.")
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--queries",
+        type=str,
+        nargs="+",
+        default=[
+            re.escape("assets/botania/textures/"),
+            ".*generated_99",
+            "assets/create/.*_1\\d+\\.png$",
+            "(?i)ASSETS/",
+        ],
+    )
+    args = parser.parse_args()
+
+    paths: list[str] = create_paths(args.paths)
+    print(f"{'query':>32} {'plan':>9} {'re.match (ms)':>14} {'plan (ms)':>10} {'speedup':>8}")
+    for query in args.queries:
+        pattern: Pattern[str] = re.compile(query)
+        plan: QueryPlan = QueryPlan(pattern)
+        assert [path for path in paths if re.match(pattern, path)] == [path for path in paths if plan.match(path)]
+        old: float = min(
+            timeit.repeat(lambda: [path for path in paths if re.match(pattern, path)], number=1, repeat=args.repeat)
+        )
+        new: float = min(
+            timeit.repeat(lambda: [path for path in paths if plan.match(path)], number=1, repeat=args.repeat)
+        )
+        print(f"{query:>32} {plan.kind:>9} {old * 1000:>14.2f} {new * 1000:>10.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
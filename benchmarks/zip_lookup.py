@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""A benchmark comparing the ``pack.mcmeta`` lookup through ``zipfile`` with the central directory reader."""
+
+import sys
+import os
+import json
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+
+sys.path.append(str(Path(Path(__file__).parent.parent, "src").absolute()))
+
+# pylint: disable-next=C0413
+from mc_resourcepacks_util_shared.library.extensions.zip_reader import ZipDirectory, ZipEntry  # noqa: E402
+
+
+def create_archive(path: Path, entry_count: int) -> None:
+    """Creates an archive with many small entries and the ``pack.mcmeta`` file stored last.
+
+    Args:
+        path (Path): The path to write the archive to.
+        entry_count (int): The amount of entries to write before the ``pack.mcmeta`` file.
+    """
+    with ZipFile(path, mode="w", compression=ZIP_DEFLATED, allowZip64=True) as zip_file:
+        for index in range(entry_count):
+            zip_file.writestr(f"assets/minecraft/textures/block/generated_{index}.png", b"")
+        zip_file.writestr("pack.mcmeta", json.dumps({"pack": {"pack_format": 15, "description": "Benchmark"}}))
+
+
+def read_with_zipfile(path: Path) -> bytes | None:
+    """Reads the ``pack.mcmeta`` file the way ``zipfile`` based code does, by scanning the name list.
+
+    Args:
+        path (Path): The path to the archive.
+
+    Returns:
+        bytes | None: The data of the ``pack.mcmeta`` file.
+    """
+    with ZipFile(path, mode="r", allowZip64=True) as zip_file:
+        for name in zip_file.namelist():
+            if name == "pack.mcmeta":
+                return zip_file.read(name)
+    return None
+
+
+def read_with_zip_directory(path: Path) -> bytes | None:
+    """Reads the ``pack.mcmeta`` file by searching the central directory.
+
+    Args:
+        path (Path): The path to the archive.
+
+    Returns:
+        bytes | None: The data of the ``pack.mcmeta`` file.
+    """
+    with ZipDirectory.open(path) as zip_directory:
+        entry: ZipEntry | None = zip_directory.find("pack.mcmeta")
+        if entry is None:
+            return None
+        return zip_directory.read(entry)
+
+
+def main() -> None:
+    """Runs the benchmark for every requested archive size."""
+    parser: ArgumentParser = ArgumentParser(
+        description="Benchmarks the pack.mcmeta lookup on archives with many entries."
+    )
+    parser.add_argument("--entries", type=int, nargs="+", default=[1_000, 10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'entries':>10} {'zipfile (ms)':>14} {'zip_reader (ms)':>16} {'speedup':>8}")
+        for entry_count in args.entries:
+            path: Path = Path(temp_dir, f"pack_{entry_count}.zip")
+            create_archive(path, entry_count)
+            assert read_with_zipfile(path) == read_with_zip_directory(path)
+            old: float = min(timeit.repeat(lambda: read_with_zipfile(path), number=1, repeat=args.repeat))
+            new: float = min(timeit.repeat(lambda: read_with_zip_directory(path), number=1, repeat=args.repeat))
+            print(f"{entry_count:>10} {old * 1000:>14.2f} {new * 1000:>16.2f} {old / new:>7.1f}x")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,90 @@
 """_summary_"""
 
 import os
+import sys
 from argparse import ArgumentParser
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal, NoReturn
 
 from mc_resourcepacks_util_shared.library.script_arguments import ScriptArguments
-from mc_resourcepacks_util_shared.library.logger import quit_with_message, pprint
-from mc_resourcepacks_util_shared.library.utils import transform_env_variables
-from mc_resourcepacks_util_shared.library.query import parse_files
-from mc_resourcepacks_util_shared.library.resourcepack import ResourcePack
-from mc_resourcepacks_util_shared.library.config_parser import read_from_options
-from mc_resourcepacks_util_shared.library.query_builder import QueryBuilder
+from mc_resourcepacks_util_shared.library.concurrency import POOL_KINDS, PoolKind, jobs_from_args
+from mc_resourcepacks_util_shared.library.query_output import OUTPUT_FORMATS
+from mc_resourcepacks_util_shared.library.query_daemon import DaemonError, QueryDaemon, request_daemon
+
+
+def _quit(message: str) -> NoReturn:
+    # NOTE: This is imported while not on the top level, so a query answered by the query daemon does not load rich.
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.logger import quit_with_message
+
+    quit_with_message(message)
+
+
+def _transform_env_variables(value: str) -> str:
+    if "$" not in value and "%" not in value:
+        return value
+    # NOTE: This is imported while not on the top level, so a query answered by the query daemon does not load chardet.
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.utils import transform_env_variables
+
+    return transform_env_variables(value)
+
+
+def _query_daemon(args: ScriptArguments, path_one: Path, queries: list[str], limit: int | None) -> bool:
+    """Answers the query with the query daemon of the instance, if one is running.
+
+    Args:
+        args (ScriptArguments): The arguments of the script.
+        path_one (Path): The path to the instance.
+        queries (list[str]): The queries.
+        limit (int | None): Stops after this many matches.
+
+    Returns:
+        bool: Returns ``True`` if the daemon answered, or ``False`` if the query has to run locally.
+    """
+    request: dict[str, Any] = {
+        "queries": queries,
+        "regex": args.is_regex,
+        "resourcepacks": args.query_resourcepacks,
+        "mods": args.query_mods,
+        "only_enabled": args.is_enabled_only,
+        "limit": limit,
+        "format": args.output_format,
+        "quiet": args.is_exists,
+    }
+    lines: list[str] = []
+    # NOTE: Matches are only printed once the whole response has arrived, since a daemon that stops while answering
+    #       makes the query run locally, which would print the same matches again.
+    matches: list[dict[str, Any]] = []
+
+    def on_record(record: dict[str, Any]) -> None:
+        if "line" in record:
+            lines.append(record["line"])
+        else:
+            matches.append(record["match"])
+
+    try:
+        count: int | None = request_daemon(path_one, request, on_record)
+    except DaemonError as error:
+        _quit(str(error))
+    if count is None:
+        return False
+    if len(matches) > 0:
+        # NOTE: This is imported while not on the top level, so only the rich format loads rich.
+        # pylint: disable-next=C0415
+        from mc_resourcepacks_util_shared.library.logger import print_found_query
+
+        for match in matches:
+            print_found_query(match["owner"], match["path"], match["compressed"], False, match.get("queries"))
+    if len(lines) > 0:
+        try:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    if args.is_exists:
+        sys.exit(0 if count > 0 else 1)
+    return True
 
 
 def main() -> None:
@@ -32,7 +105,18 @@ def main() -> None:
         "instance", type=str, help="The first target directory."
     )
     parser.add_argument(
-        "query", type=str, help="The relative, full, or partial path to search"
+        "query",
+        type=str,
+        nargs="*",
+        help="The relative, full, or partial paths to search, every archive is scanned once for all of them.",
+    )
+    parser.add_argument(
+        "--patterns-file",
+        "-f",
+        dest="patterns_file",
+        type=str,
+        help="A file with more paths to search, one per line. Blank lines and lines starting with `#' are skipped.",
+        default=None,
     )
     parser.add_argument(
         "--resourcepacks",
@@ -78,32 +162,211 @@ def main() -> None:
         action="store_true",
         help="Specifies to only query enabled packs.",
     )
+    parser.add_argument(
+        "--content",
+        "-c",
+        dest="content",
+        type=str,
+        help="A regex to search for inside of the files whose path matches the query, printing every matching line.",
+        default=None,
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        dest="jobs",
+        type=int,
+        help="The amount of workers used to scan archives concurrently, 1 scans them one at a time.",
+        default=None,
+    )
+    parser.add_argument(
+        "--pool",
+        dest="pool",
+        type=str,
+        choices=POOL_KINDS,
+        help="The kind of worker pool used to scan archives. Defaults to threads.",
+        default=None,
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        type=str,
+        choices=OUTPUT_FORMATS,
+        help="How matches are printed. jsonl, tsv and plain skip the console styling and are buffered, for piping.",
+        default="rich",
+    )
+    parser.add_argument(
+        "--overrides",
+        dest="is_overrides",
+        action="store_true",
+        help="Shows which enabled resourcepack every matching asset is loaded from, and which packs it overrides.",
+    )
+    parser.add_argument(
+        "--nested-depth",
+        dest="nested_depth",
+        type=int,
+        help="Also scans jars nested inside of archives, such as the libraries in META-INF/jars, "
+        "this many levels deep.",
+        default=0,
+    )
+    parser.add_argument(
+        "--limit",
+        dest="limit",
+        type=int,
+        help="Stops after this many matches, cancelling the archives that are still being scanned.",
+        default=None,
+    )
+    parser.add_argument(
+        "--first",
+        dest="is_first",
+        action="store_true",
+        help="Stops after the first match, the same as --limit 1.",
+    )
+    parser.add_argument(
+        "--exists",
+        dest="is_exists",
+        action="store_true",
+        help="Prints nothing, and exits with 0 if anything matches or 1 if nothing does.",
+    )
+    parser.add_argument(
+        "--no-index",
+        dest="use_index",
+        action="store_false",
+        help="Opens every archive instead of using the asset index.",
+    )
+    parser.add_argument(
+        "--rebuild-index",
+        dest="rebuild_index",
+        action="store_true",
+        help="Discards the asset index and lists every archive again.",
+    )
+    parser.add_argument(
+        "--serve",
+        dest="is_serve",
+        action="store_true",
+        help="Keeps the asset index of the instance in memory, and answers path queries over a local socket until "
+        + "interrupted. Queries of the instance use it automatically while it is running.",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        dest="use_daemon",
+        action="store_false",
+        help="Queries locally, even when a query daemon is running for the instance.",
+    )
 
-    args: ScriptArguments = ScriptArguments(parser.parse_args())
-
-    emissive_check: Literal["emissive"] | None = None
-    enabled_packs: list[str] | None = None
+    # NOTE: The queries are parsed intermixed with the options, so a query can still follow an option such as ``-r``.
+    args: ScriptArguments = ScriptArguments(parser.parse_intermixed_args())
 
     path_one: Path = Path()
 
     if args.instances_dir != cwd:
-        instances_dir: str = transform_env_variables(args.instances_dir)
+        instances_dir: str = _transform_env_variables(args.instances_dir)
         path_one = Path(instances_dir, args.instance)
     else:
         path_one = Path(cwd, args.instance)
 
     if not path_one.exists():
-        quit_with_message("The <dir> parameter must exist on path.")
+        _quit("The <dir> parameter must exist on path.")
     elif not path_one.is_dir():
-        quit_with_message("The <dir> parameter must be a directory.")
+        _quit("The <dir> parameter must be a directory.")
+    elif args.jobs is not None and args.jobs < 1:
+        _quit("--jobs must be at least 1.")
+
+    jobs: int | None
+    pool: PoolKind
+    jobs, pool = jobs_from_args(args)
+
+    if args.is_serve:
+        try:
+            QueryDaemon(args, path_one, jobs).serve()
+        except DaemonError as error:
+            _quit(str(error))
+        return
+
+    queries: list[str] = list(args.query)
+    if args.patterns_file is not None:
+        # NOTE: This is imported while not on the top level, so a query answered by the query daemon does not load it.
+        # pylint: disable-next=C0415
+        from mc_resourcepacks_util_shared.library.query_builder import read_patterns_file
+
+        patterns_file: Path = Path(_transform_env_variables(args.patterns_file))
+        if not patterns_file.is_file():
+            _quit("The --patterns-file parameter must be a file.")
+        queries.extend(read_patterns_file(patterns_file))
+    if len(queries) == 0 and (args.content is not None or args.is_overrides):
+        # NOTE: A content search or override resolution without a path query covers every file.
+        queries.append("")
+    if len(queries) == 0:
+        _quit("At least one <query> or a --patterns-file is required.")
+    elif len(queries) > 1 and args.is_emissive_check:
+        _quit("--emissive_check can only be used with a single <query>.")
+    elif args.content is not None and args.is_emissive_check:
+        _quit("--content cannot be used with --emissive_check.")
+    elif args.limit is not None and args.limit < 1:
+        _quit("--limit must be at least 1.")
+    elif args.nested_depth < 0:
+        _quit("--nested-depth cannot be negative.")
+    elif args.is_overrides and (args.is_emissive_check or args.content is not None or args.nested_depth > 0):
+        _quit("--overrides cannot be used with --emissive_check, --content or --nested-depth.")
+
+    limit: int | None = args.limit
+    if args.is_first or args.is_exists:
+        limit = 1
+
+    if (
+        args.use_daemon
+        and args.use_index
+        and not args.rebuild_index
+        and not args.is_emissive_check
+        and args.content is None
+        and args.nested_depth == 0
+        and not args.is_overrides
+        and _query_daemon(args, path_one, queries, limit)
+    ):
+        return
+
+    _query_locally(args, path_one, queries, limit, jobs, pool)
+
+
+def _query_locally(
+    args: ScriptArguments, path_one: Path, queries: list[str], limit: int | None, jobs: int | None, pool: PoolKind
+) -> None:
+    """Runs the query in this process, from the asset index or by scanning every archive.
+
+    Args:
+        args (ScriptArguments): The arguments of the script.
+        path_one (Path): The path to the instance.
+        queries (list[str]): The queries.
+        limit (int | None): Stops after this many matches.
+        jobs (int | None): The amount of workers used to scan archives.
+        pool (PoolKind): The kind of worker pool used to scan archives.
+    """
+    # NOTE: These are imported while not on the top level, so a query answered by the query daemon does not load them.
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.query import QueryResult, parse_files, query_asset_index
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.asset_index import AssetIndex, AssetOwner
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.resourcepack import ResourcePack
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.config_parser import read_from_options
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.overrides import query_overrides
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.query_builder import QueryBuilder
+    # pylint: disable-next=C0415
+    from mc_resourcepacks_util_shared.library.query_output import QueryWriter
+
+    emissive_check: Literal["emissive"] | None = None
+    enabled_packs: list[str] | None = None
 
     if args.is_emissive_check:
         emissive_check = "emissive"
     if args.is_enabled_only:
         enabled_packs = ResourcePack.to_list_str(read_from_options(args).enabled, True, False)
 
-    query_builder: QueryBuilder = QueryBuilder(query=args.query, regex=args.is_regex,
-                                               parameter=emissive_check, enabled=enabled_packs)
+    query_builder: QueryBuilder = QueryBuilder(query=queries, regex=args.is_regex,
+                                               parameter=emissive_check, enabled=enabled_packs,
+                                               content=args.content, nested_depth=args.nested_depth)
 
     dir_query: list[Path] = []
     ext_query: list[str] = []
@@ -116,4 +379,51 @@ def main() -> None:
         dir_query.append(Path(path_one, "minecraft", "mods"))
         ext_query.append(".jar")
 
-    parse_files(ext_query, dir_query, query_builder)
+    owners: list[AssetOwner]
+
+    with QueryWriter(args.output_format, quiet=args.is_exists) as writer:
+        if args.is_overrides:
+            # NOTE: Overrides are always resolved from the asset index, over the enabled resourcepacks only.
+            with AssetIndex(Path(path_one, ".asset_index.sqlite3"), rebuild=args.rebuild_index) as asset_index:
+                enabled: list[ResourcePack] = read_from_options(args).enabled
+                enabled_names: set[str] = {pack.resourcepack_file.name for pack in enabled}
+                owners = asset_index.refresh(
+                    [Path(path_one, "minecraft", "resourcepacks")],
+                    (".zip",),
+                    True,
+                    jobs,
+                    pool,
+                    lambda name: name in enabled_names,
+                )
+                query_overrides(asset_index, owners, enabled, query_builder, writer, limit)
+            if args.is_exists:
+                sys.exit(0 if writer.count > 0 else 1)
+            return
+
+        if (
+            not args.use_index
+            or query_builder.is_emissive_check
+            or query_builder.content is not None
+            or query_builder.nested_depth > 0
+        ):
+            # NOTE: The emissive check and content search read files, and nested jars are listed, which the asset index
+            #       does not hold.
+            failed: list[QueryResult] = parse_files(ext_query, dir_query, query_builder, jobs, pool, writer, limit)
+            if args.is_exists:
+                sys.exit(0 if writer.count > 0 else 1)
+            if len(failed) > 0:
+                sys.exit(1)
+            return
+
+        with AssetIndex(Path(path_one, ".asset_index.sqlite3"), rebuild=args.rebuild_index) as asset_index:
+            owners = asset_index.refresh(
+                dir_query,
+                tuple(ext for ext in ext_query if ext != "dir"),
+                "dir" in ext_query,
+                jobs,
+                pool,
+                query_builder.is_owner_enabled,
+            )
+            query_asset_index(asset_index, owners, query_builder, writer, limit)
+        if args.is_exists:
+            sys.exit(0 if writer.count > 0 else 1)
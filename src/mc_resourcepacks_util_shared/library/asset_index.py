@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+"""A module containing the persistent on-disk index of every asset path inside resourcepacks and mods.
+
+Archives are listed through their central directory and are only listed again when their size or modification
+time changes. Directory resourcepacks are listed again when any of their directories changes, which happens when
+a file inside of it is added, removed or renamed. Queries are then answered from the index, without opening any
+archive.
+"""
+
+import os
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Generator, Literal
+
+from .dir_file_utils import PackCandidate, scan_packs
+from .extensions.zip_reader import ZipDirectory, ZipDirectoryError
+from .concurrency import PoolKind, ordered_map
+from .logger import pprint
+
+
+_SCHEMA_VERSION: int = 1
+
+_SCHEMA: list[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS owners (
+        path     TEXT    PRIMARY KEY,
+        kind     TEXT    NOT NULL,
+        size     INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        owner  TEXT    NOT NULL,
+        path   TEXT    NOT NULL,
+        size   INTEGER NOT NULL,
+        crc    INTEGER,
+        is_dir INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS entries_by_owner ON entries (owner)",
+    """
+    CREATE TABLE IF NOT EXISTS owner_dirs (
+        owner    TEXT    NOT NULL,
+        path     TEXT    NOT NULL,
+        mtime_ns INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS owner_dirs_by_owner ON owner_dirs (owner)",
+]
+
+OwnerKind = Literal["archive", "directory"]
+
+_EntryRow = tuple[str, int, int | None, bool]
+
+
+class AssetOwner:
+    """A zipped resourcepack, mod or directory resourcepack whose entries are in the asset index."""
+
+    def __init__(self, path: Path, kind: OwnerKind) -> None:
+        self.path: Path = path
+        self.kind: OwnerKind = kind
+
+    def __repr__(self) -> str:
+        return f"{self.kind}: {self.path}"
+
+
+class AssetEntry:
+    """A single file or directory inside of an asset owner.
+
+    The size and CRC of an archive entry are the ones of its central directory record. Files of directory
+    resourcepacks have no CRC, and their size is the one they had when the pack was last listed, since a pack is
+    only listed again when one of its directories changes, not when a file is edited in place.
+    """
+
+    def __init__(self, owner: AssetOwner, path: str, size: int, crc: int | None, is_dir: bool) -> None:
+        self.owner: AssetOwner = owner
+        self.path: str = path
+        self.size: int = size
+        self.crc: int | None = crc
+        self.is_dir: bool = is_dir
+
+    def __repr__(self) -> str:
+        return f"{self.owner.path} -> {self.path}"
+
+
+class _OwnerListing:
+    def __init__(
+        self,
+        owner: AssetOwner,
+        stat_key: tuple[int, int],
+        rows: list[_EntryRow],
+        dirs: list[tuple[str, int]],
+        error: str | None = None,
+    ) -> None:
+        self.owner: AssetOwner = owner
+        self.stat_key: tuple[int, int] = stat_key
+        self.rows: list[_EntryRow] = rows
+        self.dirs: list[tuple[str, int]] = dirs
+        self.error: str | None = error
+
+
+def _list_archive(path: Path) -> list[_EntryRow]:
+    try:
+        with ZipDirectory.open(path) as zip_directory:
+            return [(entry.name, entry.file_size, entry.crc, entry.is_dir) for entry in zip_directory.entries()]
+    except ZipDirectoryError:
+        with zipfile.ZipFile(path, mode="r", allowZip64=True) as zip_file:
+            return [(info.filename, info.file_size, info.CRC, info.is_dir()) for info in zip_file.infolist()]
+
+
+def _list_directory(path: Path) -> tuple[list[_EntryRow], list[tuple[str, int]]]:
+    rows: list[_EntryRow] = []
+    dirs: list[tuple[str, int]] = []
+    pending: list[str] = [""]
+    while len(pending) > 0:
+        relative: str = pending.pop()
+        absolute: str = os.path.join(path, relative)
+        dirs.append((relative, os.stat(absolute).st_mtime_ns))
+        children: list[str] = []
+        sub_dirs: list[_EntryRow] = []
+        with os.scandir(absolute) as entries:
+            for entry in entries:
+                entry_path: str = os.path.join(relative, entry.name)
+                if entry.is_dir():
+                    sub_dirs.append((entry_path, 0, None, True))
+                    if not entry.is_symlink():
+                        children.append(entry_path)
+                else:
+                    rows.append((entry_path, entry.stat().st_size, None, False))
+        # NOTE: Files come before the directories next to them, in the same order as ``os.walk`` reports them.
+        rows.extend(sub_dirs)
+        pending.extend(reversed(children))
+    return (rows, dirs)
+
+
+def _list_owner(task: tuple[AssetOwner, tuple[int, int]]) -> _OwnerListing:
+    owner: AssetOwner
+    stat_key: tuple[int, int]
+    owner, stat_key = task
+    try:
+        if owner.kind == "directory":
+            rows: list[_EntryRow]
+            dirs: list[tuple[str, int]]
+            rows, dirs = _list_directory(owner.path)
+            return _OwnerListing(owner, stat_key, rows, dirs)
+        return _OwnerListing(owner, stat_key, _list_archive(owner.path), [])
+    # pylint: disable-next=W0718
+    except Exception as exception:
+        return _OwnerListing(owner, stat_key, [], [], f"{type(exception).__name__}: {exception}")
+
+
+class AssetIndex:
+    """A persistent SQLite index of the paths of every entry inside resourcepacks and mods."""
+
+    def __init__(self, index_file: Path, rebuild: bool = False) -> None:
+        self.index_file: Path = index_file
+        self.changed: set[str] = set()
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(self.index_file)
+        version: int = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if rebuild or version != _SCHEMA_VERSION:
+            with self._connection:
+                for table in ["owners", "entries", "owner_dirs"]:
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        """Closes the connection to the index file."""
+        self._connection.close()
+
+    def __enter__(self) -> "AssetIndex":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def _is_current(self, owner: AssetOwner, stat_key: tuple[int, int], stored: tuple[str, int, int] | None) -> bool:
+        if stored is None or stored[0] != owner.kind:
+            return False
+        if owner.kind == "archive":
+            return (stored[1], stored[2]) == stat_key
+        for relative, mtime_ns in self._connection.execute(
+            "SELECT path, mtime_ns FROM owner_dirs WHERE owner = ?", (str(owner.path),)
+        ):
+            try:
+                if os.stat(os.path.join(owner.path, relative)).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def refresh(
+        self,
+        folders: list[Path],
+        suffixes: tuple[str, ...],
+        include_directories: bool,
+        jobs: int | None = None,
+        pool: PoolKind = "thread",
+        include: Callable[[str], bool] | None = None,
+    ) -> list[AssetOwner]:
+        """Brings the index up to date with the archives and directory resourcepacks in some folders.
+
+        Only owners that changed since they were last listed are listed again, on a worker pool. Owners that are
+        no longer in the folders are dropped from the index. Owners left out by ``include`` are neither listed nor
+        dropped, so their entries are kept for the next refresh that includes them. The paths of the owners that
+        were listed again or dropped are kept in ``changed`` until the next refresh.
+
+        Args:
+            folders (list[Path]): The folders to scan, such as ``resourcepacks`` and ``mods``.
+            suffixes (tuple[str, ...]): The lower case suffixes of archives to index, such as ``.zip`` and ``.jar``.
+            include_directories (bool): Whether directory resourcepacks are indexed.
+            jobs (int | None, optional): The amount of workers, or ``None`` for the default. Defaults to None.
+            pool (PoolKind, optional): The kind of pool to list owners in. Defaults to "thread".
+            include (Callable[[str], bool] | None, optional): Tests the file or folder name of an owner, such as
+                ``QueryBuilder.is_owner_enabled``. Defaults to None, which includes every owner.
+
+        Returns:
+            list[AssetOwner]: The included owners in the folders, in the order they were found, archives before
+                directories of the same folder.
+        """
+        found: list[tuple[AssetOwner, tuple[int, int]]] = []
+        excluded: set[str] = set()
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            archives: list[tuple[AssetOwner, tuple[int, int]]] = []
+            directories: list[tuple[AssetOwner, tuple[int, int]]] = []
+            candidate: PackCandidate
+            for candidate in scan_packs(folder, suffixes=suffixes):
+                if candidate.kind == "ignored" or candidate.kind == "directory" and not include_directories:
+                    continue
+                if include is not None and not include(candidate.entry.name):
+                    excluded.add(str(candidate.path))
+                    continue
+                stat_key: tuple[int, int] | None = candidate.stat_key()
+                if stat_key is None:
+                    continue
+                if candidate.kind == "zip":
+                    archives.append((AssetOwner(candidate.path, "archive"), stat_key))
+                else:
+                    directories.append((AssetOwner(candidate.path, "directory"), stat_key))
+            found.extend(archives + directories)
+        stored: dict[str, tuple[str, int, int]] = {
+            path: (kind, size, mtime_ns)
+            for path, kind, size, mtime_ns in self._connection.execute("SELECT path, kind, size, mtime_ns FROM owners")
+        }
+        stale: list[tuple[AssetOwner, tuple[int, int]]] = [
+            (owner, stat_key)
+            for owner, stat_key in found
+            if not self._is_current(owner, stat_key, stored.get(str(owner.path)))
+        ]
+        seen: set[str] = {str(owner.path) for owner, _ in found}
+        roots: list[str] = [os.path.join(folder, "") for folder in folders]
+        removed: list[str] = [
+            path for path in stored if path not in seen and path not in excluded and path.startswith(tuple(roots))
+        ]
+        self.changed = set(removed) | {str(owner.path) for owner, _ in stale}
+        with self._connection:
+            for path in removed:
+                self._forget(path)
+            listing: _OwnerListing
+            for listing in ordered_map(_list_owner, stale, jobs, pool):
+                key: str = str(listing.owner.path)
+                self._forget(key)
+                if listing.error is not None:
+                    pprint(f"Unable to index {listing.owner.path}: {listing.error}", level="warn")
+                    continue
+                self._connection.execute(
+                    "INSERT INTO owners VALUES (?, ?, ?, ?)",
+                    (key, listing.owner.kind, listing.stat_key[0], listing.stat_key[1]),
+                )
+                self._connection.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                    [(key, path, size, crc, is_dir) for path, size, crc, is_dir in listing.rows],
+                )
+                self._connection.executemany(
+                    "INSERT INTO owner_dirs VALUES (?, ?, ?)",
+                    [(key, path, mtime_ns) for path, mtime_ns in listing.dirs],
+                )
+        return [owner for owner, _ in found]
+
+    def _forget(self, path: str) -> None:
+        self._connection.execute("DELETE FROM owners WHERE path = ?", (path,))
+        self._connection.execute("DELETE FROM entries WHERE owner = ?", (path,))
+        self._connection.execute("DELETE FROM owner_dirs WHERE owner = ?", (path,))
+
+    def entries(self, owner: AssetOwner) -> Generator[AssetEntry, Any, None]:
+        """Gets the indexed entries of an owner, in the order they were listed.
+
+        Args:
+            owner (AssetOwner): The owner, as returned by ``refresh``.
+
+        Yields:
+            Generator[AssetEntry, Any, None]: Every entry of the owner.
+        """
+        for path, size, crc, is_dir in self._connection.execute(
+            "SELECT path, size, crc, is_dir FROM entries WHERE owner = ? ORDER BY rowid", (str(owner.path),)
+        ):
+            yield AssetEntry(owner, path, size, crc, bool(is_dir))
+
+    def file_paths(self, owner: AssetOwner) -> list[str]:
+        """Gets the paths of the indexed files of an owner, with forward slashes, without its directories.
+
+        Args:
+            owner (AssetOwner): The owner, as returned by ``refresh``.
+
+        Returns:
+            list[str]: The paths of the files, in the order they were listed.
+        """
+        rows: list[tuple[str]] = self._connection.execute(
+            "SELECT path FROM entries WHERE owner = ? AND is_dir = 0 ORDER BY rowid", (str(owner.path),)
+        ).fetchall()
+        if owner.kind == "directory" and os.path.sep != "/":
+            return [row[0].replace(os.path.sep, "/") for row in rows]
+        return [row[0] for row in rows]
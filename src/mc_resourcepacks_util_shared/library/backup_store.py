@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+"""A module containing the content-addressed store that keeps the originals of modified resourcepacks.
+
+Every backup is stored once per distinct content, under its SHA-256 digest, outside of the ``resourcepacks``
+folder. A SQLite manifest records which pack path each backup was taken from and when, so the same pack copied
+across many instances only takes up disk space once. Objects are added with a reflink where the filesystem
+supports it, then with a hardlink, and are copied otherwise.
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .script_arguments import ScriptArguments
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+
+# NOTE: ``_IOW(0x94, 9, int)`` from ``linux/fs.h``, shared by btrfs, XFS and other reflink capable filesystems.
+_FICLONE: int = 0x40049409
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS backups (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    original_path TEXT    NOT NULL,
+    digest        TEXT    NOT NULL,
+    size          INTEGER NOT NULL,
+    created_ns    INTEGER NOT NULL
+)
+"""
+
+_INDEX: str = "CREATE INDEX IF NOT EXISTS backups_by_path ON backups (original_path, created_ns)"
+
+
+def default_backup_dir() -> Path:
+    """Gets the default folder of the backup store, in the home folder of the user.
+
+    Returns:
+        Path: Path to the default backup store folder.
+    """
+    return Path(Path.home(), ".mc_resourcepacks_util", "backups")
+
+
+def file_digest(file: Path) -> str:
+    """Gets the SHA-256 digest of the content of a file.
+
+    Args:
+        file (Path): The path to the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    with open(file, "rb") as stream:
+        return hashlib.file_digest(stream, "sha256").hexdigest()
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as source_stream, open(target, "xb") as target_stream:
+            try:
+                fcntl.ioctl(target_stream.fileno(), _FICLONE, source_stream.fileno())
+            except OSError:
+                target_stream.close()
+                os.remove(target)
+                return False
+    except OSError:
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def _hardlink(source: Path, target: Path) -> bool:
+    try:
+        os.link(source, target)
+    except OSError as error:
+        if error.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP):
+            return False
+        raise
+    return True
+
+
+def _temp_path(target: Path) -> Path:
+    return target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class BackupRecord:
+    """A single backup of a resourcepack, as recorded in the manifest of the backup store."""
+
+    def __init__(self, record_id: int, original_path: Path, digest: str, size: int, created_ns: int) -> None:
+        self.record_id: int = record_id
+        self.original_path: Path = original_path
+        self.digest: str = digest
+        self.size: int = size
+        self.created_ns: int = created_ns
+
+    def __repr__(self) -> str:
+        created: str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created_ns / 1e9))
+        return f"#{self.record_id} {self.original_path} ({self.digest[:12]}, {created})"
+
+
+class BackupStore:
+    """A content-addressed store of the originals of modified resourcepacks."""
+
+    def __init__(self, root: Path) -> None:
+        self.root: Path = root
+        self.objects_dir: Path = Path(root, "objects")
+        self.manifest_file: Path = Path(root, "manifest.sqlite3")
+
+    def _connect(self) -> sqlite3.Connection:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # NOTE: Packs are modified on a process pool, so writers may briefly wait on each other.
+        connection: sqlite3.Connection = sqlite3.connect(self.manifest_file, timeout=30)
+        connection.execute(_SCHEMA)
+        connection.execute(_INDEX)
+        return connection
+
+    def object_path(self, digest: str) -> Path:
+        """Gets the path of the object that holds the content with a digest.
+
+        Args:
+            digest (str): The SHA-256 digest of the content.
+
+        Returns:
+            Path: Path to the object in the store.
+        """
+        return Path(self.objects_dir, digest[:2], f"{digest}.zip")
+
+    def _add_object(self, file: Path, digest: str) -> None:
+        target: Path = self.object_path(digest)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp: Path = _temp_path(target)
+        try:
+            # NOTE: A hardlink is safe since packs are only ever replaced by renaming a new file over them.
+            if not _reflink(file, temp) and not _hardlink(file, temp):
+                shutil.copy2(file, temp)
+            os.replace(temp, target)
+        finally:
+            if temp.exists():
+                os.remove(temp)
+
+    def backup(self, file: Path) -> BackupRecord:
+        """Adds the current content of a resourcepack to the store.
+
+        Args:
+            file (Path): The path to the resourcepack.
+
+        Returns:
+            BackupRecord: The record of the backup.
+        """
+        original_path: Path = Path(os.path.realpath(file))
+        digest: str = file_digest(original_path)
+        self._add_object(original_path, digest)
+        size: int = os.stat(original_path).st_size
+        created_ns: int = time.time_ns()
+        connection: sqlite3.Connection = self._connect()
+        try:
+            with connection:
+                cursor: sqlite3.Cursor = connection.execute(
+                    "INSERT INTO backups (original_path, digest, size, created_ns) VALUES (?, ?, ?, ?)",
+                    (str(original_path), digest, size, created_ns),
+                )
+                record_id: int = cursor.lastrowid or 0
+        finally:
+            connection.close()
+        return BackupRecord(record_id, original_path, digest, size, created_ns)
+
+    def list_backups(self, folder: Path | None = None) -> list[BackupRecord]:
+        """Lists the backups in the store, oldest first.
+
+        Args:
+            folder (Path | None, optional): Only list backups of resourcepacks inside this folder. Defaults to None.
+
+        Returns:
+            list[BackupRecord]: The backups.
+        """
+        if not self.manifest_file.exists():
+            return []
+        connection: sqlite3.Connection = self._connect()
+        try:
+            rows: list[Any] = connection.execute(
+                "SELECT id, original_path, digest, size, created_ns FROM backups ORDER BY created_ns, id"
+            ).fetchall()
+        finally:
+            connection.close()
+        records: list[BackupRecord] = [
+            BackupRecord(record_id, Path(original_path), digest, size, created_ns)
+            for record_id, original_path, digest, size, created_ns in rows
+        ]
+        if folder is None:
+            return records
+        _folder: Path = Path(os.path.realpath(folder))
+        return [record for record in records if record.original_path.is_relative_to(_folder)]
+
+    def latest_backups(self, folder: Path | None = None) -> list[BackupRecord]:
+        """Gets the most recent backup of every resourcepack.
+
+        Args:
+            folder (Path | None, optional): Only include resourcepacks inside this folder. Defaults to None.
+
+        Returns:
+            list[BackupRecord]: The most recent backup of every resourcepack.
+        """
+        latest: dict[Path, BackupRecord] = {}
+        for record in self.list_backups(folder):
+            latest[record.original_path] = record
+        return list(latest.values())
+
+    def restore(self, record: BackupRecord, target: Path | None = None) -> Path:
+        """Restores a backup over its resourcepack, or to another path.
+
+        The restored file is always a reflink or a copy, never a hardlink, so the stored object cannot be changed
+        through it.
+
+        Args:
+            record (BackupRecord): The backup to restore.
+            target (Path | None, optional): Where to restore the backup to. Defaults to the original path.
+
+        Raises:
+            FileNotFoundError: If the object of the backup is missing from the store.
+
+        Returns:
+            Path: The path the backup was restored to.
+        """
+        source: Path = self.object_path(record.digest)
+        if not source.exists():
+            raise FileNotFoundError(f"The backup object {source} is missing from the store.")
+        _target: Path = target if target is not None else record.original_path
+        _target.parent.mkdir(parents=True, exist_ok=True)
+        temp: Path = _temp_path(_target)
+        try:
+            if not _reflink(source, temp):
+                shutil.copy2(source, temp)
+            os.replace(temp, _target)
+        finally:
+            if temp.exists():
+                os.remove(temp)
+        return _target
+
+    def prune(self, keep: int = 1, folder: Path | None = None) -> tuple[int, int]:
+        """Removes all but the most recent backups of every resourcepack, and the objects no longer referenced.
+
+        Args:
+            keep (int, optional): The amount of backups to keep per resourcepack. Defaults to 1.
+            folder (Path | None, optional): Only prune resourcepacks inside this folder. Defaults to None.
+
+        Returns:
+            tuple[int, int]: The amount of backups removed, and the amount of bytes freed.
+        """
+        by_path: dict[Path, list[BackupRecord]] = {}
+        for record in self.list_backups(folder):
+            by_path.setdefault(record.original_path, []).append(record)
+        removed: list[BackupRecord] = []
+        for records in by_path.values():
+            removed.extend(records[:max(0, len(records) - max(0, keep))])
+        if len(removed) == 0:
+            return (0, 0)
+        connection: sqlite3.Connection = self._connect()
+        try:
+            with connection:
+                connection.executemany("DELETE FROM backups WHERE id = ?", [(record.record_id,) for record in removed])
+            referenced: set[str] = {row[0] for row in connection.execute("SELECT DISTINCT digest FROM backups")}
+        finally:
+            connection.close()
+        freed: int = 0
+        for digest in {record.digest for record in removed} - referenced:
+            object_path: Path = self.object_path(digest)
+            try:
+                stat: os.stat_result = os.stat(object_path)
+                os.remove(object_path)
+            except FileNotFoundError:
+                continue
+            # NOTE: A hardlinked object only frees space if the pack it was taken from is gone as well.
+            if stat.st_nlink <= 1:
+                freed += stat.st_size
+        return (len(removed), freed)
+
+
+def backup_dir_from_args(args: ScriptArguments) -> Path:
+    """Gets the folder of the backup store from the arguments from the script CLI.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+
+    Returns:
+        Path: Path to the backup store folder.
+    """
+    if "backup_dir" in args and args.backup_dir is not None:
+        return Path(args.backup_dir)
+    return default_backup_dir()
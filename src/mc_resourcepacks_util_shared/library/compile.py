@@ -4,10 +4,10 @@
 
 import os
 from pathlib import Path
-import tempfile
 from typing import Any
 
 from .utils import list_has
+from .options_file import OptionsFile
 from .script_arguments import ScriptArguments
 from .logger import pprint, quit_with_error
 from .resourcepack import ResourcePack
@@ -38,54 +38,25 @@ def compile_with_save(
 ) -> None:
     """Compiles the resourcepacks selected in ``enabled.txt`` and writes them to ``options.txt``.
 
+    Only the lines of the resourcepack lists are changed, and the file is only written when its content differs.
+
     Args:
         args (ScriptArguments): The arguments from the script CLI.
         enabled (list[ResourcePack]): The current static list of enabled resourcepacks.
         incompatible (list[ResourcePack]): The current static list of enabled incompatible resourcepacks.
     """
     try:
-        temp_json: str = ""
-        # open the source file normally
-        with args.options_file.open(mode="r+", encoding="utf8") as mc_options_source:
-            try:
-                # make a hidden tempfile to stage your changes in
-                with tempfile.NamedTemporaryFile(
-                    mode="w",
-                    suffix=".txt",
-                    prefix=".",
-                    dir=args.minecraft_folder,
-                    encoding="utf8",
-                    delete=False,
-                ) as mc_options_target:
-                    # iterate over lines in the source file (each line ends with \n)
-                    for line in mc_options_source.readlines():
-                        if line.startswith("resourcePacks:"):
-                            # do any edits here, and then call target.write
-                            temp_json = ResourcePack.from_list(enabled)
-                            mc_options_target.write(f"resourcePacks:{temp_json}\n")
-                        elif line.startswith("incompatibleResourcePacks:"):
-                            # do any edits here, and then call target.write
-                            temp_json = ResourcePack.from_list(incompatible)
-                            mc_options_target.write(
-                                f"incompatibleResourcePacks:{temp_json}\n"
-                            )
-                        else:
-                            mc_options_target.write(line)
-                    mc_options_source.close()
-                    mc_options_target.close()
-                    try:
-                        # now swap the edited copy into place
-                        if os.path.exists(args.options_file):
-                            os.replace(mc_options_target.name, args.options_file)
-                        else:
-                            os.rename(mc_options_target.name, args.options_file)
-                    except BaseException as exception:
-                        quit_with_error(exception)
-            # tempfile tries to delete the temporary file, but it's gone now
-            except FileNotFoundError as file_not_found_error:
-                quit_with_error(file_not_found_error)
-    except FileNotFoundError as file_not_found_error:
-        quit_with_error(file_not_found_error)
+        options: OptionsFile = args.options
+        if "resourcePacks" in options:
+            options.set("resourcePacks", ResourcePack.from_list(enabled))
+        if "incompatibleResourcePacks" in options:
+            options.set("incompatibleResourcePacks", ResourcePack.from_list(incompatible))
+        if options.save(fsync=args.fsync):
+            pprint(f"Saved the compiled resourcepacks to {options.path}.", level="info")
+        else:
+            pprint(f"{options.path} is already up to date, it was not written.", level="info")
+    except OSError as os_error:
+        quit_with_error(os_error)
 
 
 def compile_without_save(
@@ -105,27 +76,14 @@ def compile_without_save(
     Returns:
         str: Output of the ``options.txt`` file.
     """
-    new_output: str = ""
-    temp_json: str = ""
-
-    with Path(os.path.realpath(args.dir), "options.txt").open(
-        "r", encoding="utf8"
-    ) as mc_options_source:
-        try:
-            for line in mc_options_source.readlines():
-                if line.startswith("resourcePacks:"):
-                    temp_json = ResourcePack.from_list(enabled, False)
-                    new_output += f"resourcePacks:{temp_json}\n"
-                elif line.startswith("incompatibleResourcePacks:"):
-                    temp_json = ResourcePack.from_list(incompatible, False)
-                    new_output += f"incompatibleResourcePacks:{temp_json}\n"
-                else:
-                    if not minimal:
-                        new_output += f"{line}"
-            mc_options_source.close()
-        except FileNotFoundError as file_not_found_error:
-            quit_with_error(file_not_found_error)
-    return new_output
+    values: dict[str, str] = {
+        "resourcePacks": ResourcePack.from_list(enabled, False),
+        "incompatibleResourcePacks": ResourcePack.from_list(incompatible, False),
+    }
+    try:
+        return args.options.render(values if minimal else None, values)
+    except FileNotFoundError as file_not_found_error:
+        quit_with_error(file_not_found_error)
 
 
 def get_enabled_resourcepacks(args: ScriptArguments) -> list[ResourcePack]:
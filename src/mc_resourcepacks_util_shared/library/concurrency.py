@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""A module containing helpers to run independent per-pack work on a bounded worker pool."""
+
+import os
+from concurrent.futures import Executor
+from typing import Callable, Generator, Iterable, Literal, TypeVar
+
+from .script_arguments import ScriptArguments
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+PoolKind = Literal["thread", "process"]
+
+POOL_KINDS: list[str] = ["thread", "process"]
+
+
+def default_jobs(pool: PoolKind = "thread") -> int:
+    """Gets the default amount of workers for a pool.
+
+    Args:
+        pool (PoolKind, optional): The kind of pool the workers run in. Defaults to "thread".
+
+    Returns:
+        int: The default amount of workers.
+    """
+    cpu_count: int = os.cpu_count() or 1
+    if pool == "process":
+        return cpu_count
+    # NOTE: Threads mostly wait on file I/O and zlib, which both release the GIL.
+    return min(32, cpu_count + 4)
+
+
+def jobs_from_args(args: ScriptArguments, default_pool: PoolKind = "thread") -> tuple[int | None, PoolKind]:
+    """Gets the amount of workers and the kind of pool from the arguments from the script CLI.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+        default_pool (PoolKind, optional): The kind of pool used when none was specified. Defaults to "thread".
+
+    Raises:
+        ValueError: If the amount of workers is below 1.
+
+    Returns:
+        tuple[int | None, PoolKind]: The amount of workers, or ``None`` for the default, and the kind of pool.
+    """
+    jobs: int | None = None
+    pool: PoolKind = default_pool
+    if "jobs" in args and args.jobs is not None:
+        jobs = args.jobs
+        if jobs < 1:
+            raise ValueError(f"The amount of workers must be at least 1, not {jobs}.")
+    if "pool" in args and args.pool in ("thread", "process"):
+        pool = args.pool
+    return (jobs, pool)
+
+
+def create_executor(jobs: int | None = None, pool: PoolKind = "thread") -> Executor:
+    """Creates a bounded worker pool.
+
+    Args:
+        jobs (int | None, optional): The amount of workers, or ``None`` for the default. Defaults to None.
+        pool (PoolKind, optional): The kind of pool to create. Defaults to "thread".
+
+    Returns:
+        Executor: The worker pool.
+    """
+    # NOTE: These are imported while not on the top level, since loading multiprocessing slows down every CLI start.
+    # pylint: disable-next=C0415
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    max_workers: int = jobs if jobs is not None and jobs > 0 else default_jobs(pool)
+    if pool == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def ordered_map(
+    function: Callable[[T], R], items: Iterable[T], jobs: int | None = None, pool: PoolKind = "thread"
+) -> Generator[R, None, None]:
+    """Runs a function over every item on a worker pool, yielding the results in the order of the items.
+
+    Closing the generator before it is exhausted shuts the pool down, cancelling the items that were not started.
+
+    Args:
+        function (Callable[[T], R]): The function to run, which must be a module level function for process pools.
+        items (Iterable[T]): The items to run the function over.
+        jobs (int | None, optional): The amount of workers, or ``None`` for the default. Defaults to None.
+        pool (PoolKind, optional): The kind of pool to run in. Defaults to "thread".
+
+    Yields:
+        Generator[R, None, None]: The result of the function for every item, in the same order as the items.
+    """
+    _items: list[T] = list(items)
+    if jobs == 1 or len(_items) <= 1:
+        yield from map(function, _items)
+        return
+    with create_executor(jobs, pool) as executor:
+        chunksize: int = 1
+        if pool == "process":
+            chunksize = max(1, len(_items) // ((jobs or default_jobs(pool)) * 4))
+        yield from executor.map(function, _items, chunksize=chunksize)
@@ -2,6 +2,12 @@
 
 """Temporary Module Docstring."""
 
+import sys
+
+from rich.markup import escape
+
+from .logger import pprint
+from .options_file import OptionsFile
 from .script_arguments import ScriptArguments
 from .resourcepack import ResourcePack
 
@@ -66,55 +72,54 @@ class ResourcePackTuple:
         self._incompatible = value
 
 
-def read_from_options(args: ScriptArguments) -> ResourcePackTuple:
+def read_from_options(args: ScriptArguments, options: OptionsFile | None = None) -> ResourcePackTuple:
     # TODO: Add description for arguments/raises/returns.
     """Read resourcepacks and incompatible resourcepacks from ``options.txt`` file.
 
     Args:
         args (ScriptArguments): The arguments from the script CLI.
+        options (OptionsFile | None, optional): The parsed options file. Defaults to None, which uses the one of
+            ``args``, so it is only read once per run.
 
     Returns:
         ResourcePackTuple: _description_
     """
-    output: ResourcePackTuple = ResourcePackTuple()
-    with args.options_file.open(encoding="utf8") as mc_options:
-        for line in mc_options.readlines():
-            if line.startswith("resourcePacks:"):
-                output.enabled = ResourcePack.to_list(
-                    line.removeprefix("resourcePacks:").removesuffix("\n"), args=args
-                )
-            if line.startswith("incompatibleResourcePacks:"):
-                output.incompatible = ResourcePack.to_list(
-                    line.removeprefix("incompatibleResourcePacks:").removesuffix("\n"),
-                    args=args,
-                )
-        mc_options.close()
-    return output
+    return _read_packs(args, options, False)
 
 
-def read_builtin_from_options(args: ScriptArguments) -> ResourcePackTuple:
+def read_builtin_from_options(args: ScriptArguments, options: OptionsFile | None = None) -> ResourcePackTuple:
     # TODO: Add method summary.
     # TODO: Add description for arguments/raises/returns.
     """_summary_
 
     Args:
         args (ScriptArguments): _description_
+        options (OptionsFile | None, optional): The parsed options file. Defaults to None, which uses the one of
+            ``args``.
 
     Returns:
         ResourcePackTuple: _description_
     """
+    return _read_packs(args, options, True)
+
+
+def _read_packs(args: ScriptArguments, options: OptionsFile | None, built_in_only: bool) -> ResourcePackTuple:
+    if options is None:
+        options = args.options
     output: ResourcePackTuple = ResourcePackTuple()
-    with args.options_file.open(encoding="utf8") as mc_options:
-        for line in mc_options.readlines():
-            if line.startswith("resourcePacks:"):
-                output.enabled = ResourcePack.to_list(
-                    line.removeprefix("resourcePacks:").removesuffix("\n"), args=args
-                )
-            if line.startswith("incompatibleResourcePacks:"):
-                output.incompatible = ResourcePack.to_list(
-                    line.removeprefix("incompatibleResourcePacks:").removesuffix("\n"),
-                    args=args,
-                    built_in_only=True,
-                )
-        mc_options.close()
+    key: str = "resourcePacks"
+    try:
+        enabled: str | None = options.get(key)
+        if enabled is not None:
+            output.enabled = ResourcePack.to_list(enabled, args=args)
+        key = "incompatibleResourcePacks"
+        incompatible: str | None = options.get(key)
+        if incompatible is not None:
+            output.incompatible = ResourcePack.to_list(incompatible, args=args, built_in_only=built_in_only)
+    except ValueError as value_error:
+        pprint(
+            f"The [yellow]{key}[/yellow] option of {options.path} is not valid: {escape(str(value_error))}",
+            level="error",
+        )
+        sys.exit(1)
     return output
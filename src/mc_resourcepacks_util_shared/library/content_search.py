@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""A module containing the content search of ``mc-resourcepacks-query``, which greps the files inside of packs.
+
+Files are checked for the magic bytes of binary assets before anything else, so textures and sounds are never
+decoded. Zip members are inflated a chunk at a time and abandoned after the first chunk when they are binary, and
+files of directory packs are read through a memory map. When the pattern starts with literal characters, those
+are searched for in the raw bytes first, so most files are rejected without being decoded. Text is decoded as
+UTF-8, and only goes through ``chardet`` when that fails, see ``decode_text``.
+"""
+
+import codecs
+import mmap
+import os
+import zlib
+from pathlib import Path
+from re import Match, Pattern
+from typing import Iterable, Iterator
+
+from .extensions.zip_reader import ZipDirectory, ZipDirectoryError, ZipEntry
+from .query_builder import QueryPlan
+from .utils import decode_text
+
+
+BINARY_MAGIC_BYTES: tuple[bytes, ...] = (
+    b"\x89PNG",
+    b"OggS",
+    b"\xff\xd8\xff",
+    b"GIF8",
+    b"RIFF",
+    b"ID3",
+    b"fLaC",
+    b"PK\x03\x04",
+    b"\xca\xfe\xba\xbe",
+    b"\x1f\x8b",
+    b"\x00\x01\x00\x00",
+    b"OTTO",
+    b"wOFF",
+    b"DDS ",
+)
+
+_WIDE_BYTE_ORDER_MARKS: tuple[bytes, ...] = (
+    codecs.BOM_UTF32_LE,
+    codecs.BOM_UTF32_BE,
+    codecs.BOM_UTF16_LE,
+    codecs.BOM_UTF16_BE,
+)
+
+_SNIFF_SIZE: int = 1024
+
+
+def is_binary(head: bytes | bytearray | memoryview | mmap.mmap) -> bool:
+    """Checks the first bytes of a file for the magic bytes of a binary asset, or for null bytes.
+
+    Args:
+        head (bytes | bytearray | memoryview | mmap.mmap): The first bytes of the file.
+
+    Returns:
+        bool: Returns ``True`` if the file should not be decoded as text.
+    """
+    sample: bytes = bytes(head[:_SNIFF_SIZE])
+    if sample.startswith(_WIDE_BYTE_ORDER_MARKS):
+        return False
+    return sample.startswith(BINARY_MAGIC_BYTES) or b"\x00" in sample
+
+
+class ContentMatch:
+    """A single line of a file that matched the content pattern."""
+
+    def __init__(self, line_number: int, line: str) -> None:
+        self.line_number: int = line_number
+        self.line: str = line
+
+    def __repr__(self) -> str:
+        return f"{self.line_number}: {self.line}"
+
+
+class ContentSearch:
+    """A content pattern, together with the literal bytes every match must contain."""
+
+    def __init__(self, pattern: Pattern[str]) -> None:
+        self.pattern: Pattern[str] = pattern
+        plan: QueryPlan = QueryPlan(pattern)
+        literal: str = plan.prefix or plan.required
+        # NOTE: Only ASCII literals are searched for in the raw bytes, since they are encoded the same way by UTF-8
+        #       and by the single byte encodings ``chardet`` may detect.
+        self.literal: bytes | None = literal.encode("ascii") if literal != "" and literal.isascii() else None
+
+    def _may_match(self, data: bytes | bytearray | mmap.mmap) -> bool:
+        if self.literal is None or bytes(data[:4]).startswith(_WIDE_BYTE_ORDER_MARKS):
+            return True
+        return data.find(self.literal) != -1
+
+    def search_text(self, text: str) -> list[ContentMatch]:
+        """Finds every line of a text that matches the pattern.
+
+        Args:
+            text (str): The decoded text.
+
+        Returns:
+            list[ContentMatch]: The matching lines, once per line, in order.
+        """
+        matches: list[ContentMatch] = []
+        line_number: int = 1
+        position: int = 0
+        last_line_start: int = -1
+        match: Match[str]
+        for match in self.pattern.finditer(text):
+            line_number += text.count("\n", position, match.start())
+            position = match.start()
+            line_start: int = text.rfind("\n", 0, match.start()) + 1
+            if line_start == last_line_start:
+                continue
+            last_line_start = line_start
+            line_end: int = text.find("\n", match.start())
+            if line_end == -1:
+                line_end = len(text)
+            matches.append(ContentMatch(line_number, text[line_start:line_end].rstrip("\r")))
+        return matches
+
+    def search_bytes(self, data: bytes | bytearray | mmap.mmap) -> list[ContentMatch]:
+        """Finds every line of a file that matches the pattern, skipping binary files.
+
+        Args:
+            data (bytes | bytearray | mmap.mmap): The raw bytes of the file.
+
+        Returns:
+            list[ContentMatch]: The matching lines, or an empty list if the file is binary or could not be decoded.
+        """
+        if is_binary(data) or not self._may_match(data):
+            return []
+        text: str
+        try:
+            with memoryview(data) as view:
+                text = decode_text(view)[0]
+        except UnicodeError:
+            return []
+        return self.search_text(text)
+
+    def search_chunks(self, chunks: Iterable[bytes]) -> list[ContentMatch]:
+        """Finds every line of a streamed file that matches the pattern, stopping after the first chunk if it is binary.
+
+        Only the binary check is streamed. A text file is joined into a single buffer before it is decoded and
+        searched, since its encoding may only be detected from the whole of it.
+
+        Args:
+            chunks (Iterable[bytes]): The raw bytes of the file, a chunk at a time.
+
+        Returns:
+            list[ContentMatch]: The matching lines, or an empty list if the file is binary or could not be decoded.
+        """
+        iterator: Iterator[bytes] = iter(chunks)
+        first: bytes = next(iterator, b"")
+        if is_binary(first):
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            return []
+        data: bytearray = bytearray(first)
+        for chunk in iterator:
+            data += chunk
+        return self.search_bytes(data)
+
+    def search_file(self, file: Path | str) -> list[ContentMatch]:
+        """Finds every line of a file on disk that matches the pattern, reading it through a memory map.
+
+        Args:
+            file (Path | str): The path to the file.
+
+        Returns:
+            list[ContentMatch]: The matching lines, or an empty list if the file is empty, binary or not decodable.
+        """
+        with open(file, "rb") as opened_file:
+            if os.fstat(opened_file.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(opened_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self.search_bytes(mapped)
+
+    def search_entry(self, zip_directory: ZipDirectory, entry: ZipEntry) -> list[ContentMatch]:
+        """Finds every line of a zip member that matches the pattern, inflating it a chunk at a time.
+
+        A member that cannot be read, because it is encrypted, uses a compression method other than stored or
+        deflated, or does not match its CRC, is skipped on its own instead of failing the whole archive.
+
+        Args:
+            zip_directory (ZipDirectory): The archive the member is in.
+            entry (ZipEntry): The member.
+
+        Returns:
+            list[ContentMatch]: The matching lines, or an empty list if the member is binary, not decodable, or could
+                not be read.
+        """
+        if entry.is_dir or entry.file_size == 0:
+            return []
+        try:
+            return self.search_chunks(zip_directory.iter_chunks(entry))
+        except (ZipDirectoryError, zlib.error):
+            return []
+
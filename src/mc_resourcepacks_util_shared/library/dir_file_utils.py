@@ -4,64 +4,153 @@
 """_summary_"""
 
 import os
-import re
 from pathlib import Path
-from typing import Any, Generator
+from typing import Any, Generator, Literal
 
-from .logger import quit_with_message, print_found_query
-from .query_builder import QueryBuilder
-
-
-def walk_and_talk(
-    branches: list[str],
-    trunk: Path | str,
-    root: Path | str,
-    query_builder: QueryBuilder,
-    temp: Path | str | None = None,
-) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
-
-    Args:
-        branches (list[str]): _description_
-        trunk (Path | str): _description_
-        root (Path | str): _description_
-        query_builder (QueryBuilder): _description_
-        temp (Path | str | None, optional): _description_. Defaults to None.
-    """
-    trim_trunk: Path | str = trunk
-    if temp is not None:
-        trim_trunk = temp
-    for branch in branches:
-        if re.match(query_builder.query, str(Path(trunk, branch))) is not None:
-            print_found_query(root, str(Path(trim_trunk, branch)), False, False)
+from .logger import quit_with_message
 
 
 def walk_level(
     some_dir: str | Path, level: int = 1
 ) -> Generator[tuple[str, list[str], list[str]], Any, None]:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    """Walks a directory tree top-down like ``os.walk``, without descending deeper than a level.
+
+    Directories past the level are never scanned, and removing names from the yielded directories prunes them
+    the same way it does with ``os.walk``.
 
     Args:
-        some_dir (str): _description_
-        level (int, optional): _description_. Defaults to 1.
+        some_dir (str | Path): The directory to walk.
+        level (int, optional): How many levels below the directory to descend, 0 only lists it. Defaults to 1.
 
     Yields:
-        Generator[tuple[str, list[str], list[str]], Any, None]: _description_
+        Generator[tuple[str, list[str], list[str]], Any, None]: The path, directories and files of every directory.
     """
     if isinstance(some_dir, str):
         some_dir = Path(some_dir)
-    _some_dir: tuple[str, ...] = some_dir.parts
     assert some_dir.is_dir()
-    num_sep: int = len(_some_dir) - 1
-    for root, dirs, files in os.walk(some_dir):
+    pending: list[tuple[str, int]] = [(str(some_dir), 0)]
+    while len(pending) > 0:
+        root: str
+        depth: int
+        root, depth = pending.pop()
+        dirs: list[str] = []
+        files: list[str] = []
+        links: set[str] = set()
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if _is_dir(entry):
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            continue
         yield root, dirs, files
-        num_sep_this: int = len(Path(root).parts) - 1
-        if num_sep + level <= num_sep_this:
-            del dirs[:]
+        if depth < level:
+            pending.extend((os.path.join(root, name), depth + 1) for name in reversed(dirs) if name not in links)
+
+
+PackKind = Literal["zip", "directory", "ignored"]
+
+MAX_PACK_FOLDER_DEPTH: int = 8
+
+
+def _is_dir(entry: os.DirEntry[str]) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def classify_entry(entry: os.DirEntry[str], suffixes: tuple[str, ...] = (".zip",)) -> PackKind:
+    """Classifies an entry of a ``resourcepacks`` folder without reading it.
+
+    Args:
+        entry (os.DirEntry[str]): The entry, from ``os.scandir``.
+        suffixes (tuple[str, ...], optional): The lower case suffixes of archives. Defaults to (".zip",).
+
+    Returns:
+        PackKind: ``zip`` for archives, ``directory`` for directories with a ``pack.mcmeta`` file, and
+            ``ignored`` for anything else.
+    """
+    if _is_dir(entry):
+        if os.path.isfile(os.path.join(entry.path, "pack.mcmeta")):
+            return "directory"
+        return "ignored"
+    if entry.name.lower().endswith(suffixes):
+        try:
+            if entry.is_file():
+                return "zip"
+        except OSError:
+            pass
+    return "ignored"
+
+
+class PackCandidate:
+    """An entry of a ``resourcepacks`` folder that was classified by ``scan_packs``."""
+
+    def __init__(self, entry: os.DirEntry[str], kind: PackKind, depth: int) -> None:
+        self.entry: os.DirEntry[str] = entry
+        self.kind: PackKind = kind
+        self.depth: int = depth
+        self.path: Path = Path(entry.path)
+
+    def stat_key(self) -> tuple[int, int] | None:
+        """Gets the size and modification time used to detect changes to the pack, reusing the cached stat result.
+
+        Returns:
+            tuple[int, int] | None: The size and modification time in nanoseconds, or ``None`` if the pack is gone.
+        """
+        try:
+            stat: os.stat_result
+            if self.kind == "directory":
+                stat = os.stat(os.path.join(self.entry.path, "pack.mcmeta"))
+            else:
+                stat = self.entry.stat()
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}: {self.path}"
+
+
+def scan_packs(
+    folder: str | Path, max_depth: int = 0, suffixes: tuple[str, ...] = (".zip",)
+) -> Generator[PackCandidate, Any, None]:
+    """Scans a ``resourcepacks`` folder with ``os.scandir``, classifying every entry in a single step.
+
+    Directory packs are never descended into. Other directories are descended into, as folders grouping packs,
+    until the depth limit is reached.
+
+    Args:
+        folder (str | Path): The ``resourcepacks`` folder.
+        max_depth (int, optional): How many levels of grouping folders to descend, 0 only scans the folder itself.
+            Defaults to 0.
+        suffixes (tuple[str, ...], optional): The lower case suffixes of archives, such as ``.jar`` for the
+            ``mods`` folder. Defaults to (".zip",).
+
+    Yields:
+        Generator[PackCandidate, Any, None]: Every entry of the folder and the descended folders, in scan order.
+    """
+    pending: list[tuple[str, int]] = [(os.fspath(folder), 0)]
+    while len(pending) > 0:
+        root: str
+        depth: int
+        root, depth = pending.pop()
+        children: list[str] = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    kind: PackKind = classify_entry(entry, suffixes)
+                    if kind == "ignored" and depth < max_depth and _is_dir(entry) and not entry.is_symlink():
+                        children.append(entry.path)
+                    yield PackCandidate(entry, kind, depth)
+        except OSError:
+            continue
+        pending.extend((child, depth + 1) for child in reversed(children))
 
 
 def check_if_dir_exists_create(_dir: str | Path) -> None:
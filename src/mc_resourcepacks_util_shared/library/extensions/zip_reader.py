@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+
+"""A minimal zip reader that works directly on the central directory of an archive.
+
+Unlike ``zipfile.ZipFile`` it does not build a ``ZipInfo`` object for every entry when it is opened, so finding
+and inflating a single member of an archive with tens of thousands of entries only touches the end of central
+directory record, the bytes of the central directory that are searched, and the member itself.
+"""
+
+import mmap
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Iterator
+
+
+_END_OF_CENTRAL_DIR_SIGNATURE: bytes = b"PK\x05\x06"
+_END_OF_CENTRAL_DIR_STRUCT: struct.Struct = struct.Struct("<4s4H2LH")
+_ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE: bytes = b"PK\x06\x07"
+_ZIP64_END_OF_CENTRAL_DIR_LOCATOR_STRUCT: struct.Struct = struct.Struct("<4sLQL")
+_ZIP64_END_OF_CENTRAL_DIR_SIGNATURE: bytes = b"PK\x06\x06"
+_ZIP64_END_OF_CENTRAL_DIR_STRUCT: struct.Struct = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_DIR_SIGNATURE: bytes = b"PK\x01\x02"
+_CENTRAL_DIR_STRUCT: struct.Struct = struct.Struct("<4s4B4HL2L5H2L")
+_LOCAL_HEADER_SIGNATURE: bytes = b"PK\x03\x04"
+_LOCAL_HEADER_STRUCT: struct.Struct = struct.Struct("<4s2B4HL2L2H")
+_ZIP64_EXTRA_ID: int = 0x0001
+_MAX_COMMENT_LENGTH: int = 0xFFFF
+_UTF8_FLAG: int = 0x800
+_ENCRYPTED_FLAG: int = 0x1
+
+ZIP_STORED: int = 0
+ZIP_DEFLATED: int = 8
+
+_Buffer = bytes | bytearray | mmap.mmap
+
+
+class ZipDirectoryError(Exception):
+    """Error when an archive is not a zip file this reader is able to parse."""
+
+
+class ZipEntryUnsupportedError(ZipDirectoryError):
+    """Error when a zip entry uses encryption or a compression method this reader does not support."""
+
+
+class ZipEntry:
+    """A single record of the central directory of a zip file."""
+
+    def __init__(
+        self,
+        name: str,
+        flag_bits: int,
+        compress_type: int,
+        crc: int,
+        compress_size: int,
+        file_size: int,
+        header_offset: int,
+        central_offset: int,
+        central_length: int,
+    ) -> None:
+        self.name: str = name
+        self.flag_bits: int = flag_bits
+        self.compress_type: int = compress_type
+        self.crc: int = crc
+        self.compress_size: int = compress_size
+        self.file_size: int = file_size
+        self.header_offset: int = header_offset
+        self.central_offset: int = central_offset
+        self.central_length: int = central_length
+
+    @property
+    def is_dir(self) -> bool:
+        """Gets if the entry is a directory.
+
+        Returns:
+            bool: Returns ``True`` if the name of the entry ends with a slash.
+        """
+        return self.name.endswith("/")
+
+    @property
+    def is_encrypted(self) -> bool:
+        """Gets if the data of the entry is encrypted.
+
+        Returns:
+            bool: Returns ``True`` if the encryption flag of the entry is set.
+        """
+        return bool(self.flag_bits & _ENCRYPTED_FLAG)
+
+    def __repr__(self) -> str:
+        return f"ZipEntry({self.name!r}, compress_type={self.compress_type}, file_size={self.file_size})"
+
+
+class ZipDirectory:
+    """A read-only view of a zip file through its central directory.
+
+    The archive is either a buffer in memory, or a file which is memory mapped, so only the pages that are
+    actually touched are read from disk. A window of a larger buffer can be used, which allows reading an
+    archive that is stored uncompressed inside of another archive without copying it.
+    """
+
+    def __init__(self, buffer: _Buffer, start: int = 0, end: int | None = None) -> None:
+        self._buffer: _Buffer = buffer
+        self._start: int = start
+        self._end: int = len(buffer) if end is None else end
+        self._mmap: mmap.mmap | None = None
+        self._file: IO[bytes] | None = None
+        self._lookups: int = 0
+        self._offsets: dict[str, int] | None = None
+        self._locate_central_directory()
+
+    @staticmethod
+    def open(file: Path | str) -> "ZipDirectory":
+        """Opens a zip file on disk through a memory map.
+
+        Args:
+            file (Path | str): The path to the zip file.
+
+        Raises:
+            ZipDirectoryError: If the file is empty or is not a zip file.
+
+        Returns:
+            ZipDirectory: The central directory of the zip file, which should be closed after use.
+        """
+        opened_file: IO[bytes] = Path(file).open(mode="rb")
+        try:
+            mapped: mmap.mmap = mmap.mmap(opened_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as value_error:
+            opened_file.close()
+            raise ZipDirectoryError(f"File at {file} is empty.") from value_error
+        except BaseException:
+            opened_file.close()
+            raise
+        try:
+            directory: ZipDirectory = ZipDirectory(mapped)
+        except BaseException:
+            mapped.close()
+            opened_file.close()
+            raise
+        directory._mmap = mapped
+        directory._file = opened_file
+        return directory
+
+    def close(self) -> None:
+        """Closes the memory map and the file of this zip file, if it was opened from disk."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ZipDirectory":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def buffer(self) -> _Buffer:
+        """Gets the buffer holding the archive.
+
+        Returns:
+            _Buffer: The buffer holding the archive, which may be larger than the archive itself.
+        """
+        return self._buffer
+
+    @property
+    def entry_count(self) -> int:
+        """Gets the amount of entries in the central directory.
+
+        Returns:
+            int: The amount of entries.
+        """
+        return self._entry_count
+
+    def _locate_central_directory(self) -> None:
+        size: int = self._end - self._start
+        if size < _END_OF_CENTRAL_DIR_STRUCT.size:
+            raise ZipDirectoryError("File is too small to be a zip file.")
+        search_start: int = max(self._start, self._end - _END_OF_CENTRAL_DIR_STRUCT.size - _MAX_COMMENT_LENGTH)
+        eocd_offset: int = self._buffer.rfind(_END_OF_CENTRAL_DIR_SIGNATURE, search_start, self._end)
+        if eocd_offset < 0:
+            raise ZipDirectoryError("End of central directory record was not found.")
+        (_, _, _, _, entry_count, cd_size, cd_offset, comment_length) = _END_OF_CENTRAL_DIR_STRUCT.unpack_from(
+            self._buffer, eocd_offset
+        )
+        records_end: int = eocd_offset
+        is_zip64: bool = False
+        locator_offset: int = eocd_offset - _ZIP64_END_OF_CENTRAL_DIR_LOCATOR_STRUCT.size
+        if (
+            locator_offset >= self._start
+            and self._buffer[locator_offset:locator_offset + 4] == _ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE
+        ):
+            zip64_offset: int = locator_offset - _ZIP64_END_OF_CENTRAL_DIR_STRUCT.size
+            if (
+                zip64_offset < self._start
+                or self._buffer[zip64_offset:zip64_offset + 4] != _ZIP64_END_OF_CENTRAL_DIR_SIGNATURE
+            ):
+                raise ZipDirectoryError("Zip64 end of central directory record was not found.")
+            (_, _, _, _, _, _, _, entry_count, cd_size, cd_offset) = _ZIP64_END_OF_CENTRAL_DIR_STRUCT.unpack_from(
+                self._buffer, zip64_offset
+            )
+            records_end = zip64_offset
+            is_zip64 = True
+        cd_start: int = records_end - cd_size
+        if cd_start < self._start:
+            raise ZipDirectoryError("Central directory is out of bounds.")
+        # NOTE: Data may be prepended to the archive (e.g. self extracting archives), every offset is relative to it.
+        self._concat: int = cd_start - cd_offset
+        self._cd_start: int = cd_start
+        self._cd_end: int = records_end
+        self._entry_count: int = entry_count
+        self.eocd_offset: int = eocd_offset
+        self.comment_length: int = comment_length
+        self.is_zip64: bool = is_zip64
+
+    def _parse_entry(self, offset: int) -> ZipEntry:
+        if self._buffer[offset:offset + 4] != _CENTRAL_DIR_SIGNATURE:
+            raise ZipDirectoryError(f"Bad central directory record at offset {offset - self._start}.")
+        (_, _, _, _, _, flag_bits, compress_type, _, _, crc, compress_size, file_size, name_length, extra_length,
+         comment_length, _, _, _, header_offset) = _CENTRAL_DIR_STRUCT.unpack_from(self._buffer, offset)
+        name_start: int = offset + _CENTRAL_DIR_STRUCT.size
+        raw_name: bytes = bytes(self._buffer[name_start:name_start + name_length])
+        name: str = raw_name.decode("utf-8" if flag_bits & _UTF8_FLAG else "cp437")
+        if 0xFFFFFFFF in (compress_size, file_size, header_offset):
+            extra_start: int = name_start + name_length
+            file_size, compress_size, header_offset = self._parse_zip64_extra(
+                bytes(self._buffer[extra_start:extra_start + extra_length]), file_size, compress_size, header_offset
+            )
+        return ZipEntry(
+            name,
+            flag_bits,
+            compress_type,
+            crc,
+            compress_size,
+            file_size,
+            header_offset + self._concat,
+            offset,
+            _CENTRAL_DIR_STRUCT.size + name_length + extra_length + comment_length,
+        )
+
+    def _parse_zip64_extra(
+        self, extra: bytes, file_size: int, compress_size: int, header_offset: int
+    ) -> tuple[int, int, int]:
+        position: int = 0
+        while position + 4 <= len(extra):
+            extra_id, extra_size = struct.unpack_from("<2H", extra, position)
+            if extra_id == _ZIP64_EXTRA_ID:
+                values: list[int] = list(struct.unpack_from(f"<{extra_size // 8}Q", extra, position + 4))
+                if file_size == 0xFFFFFFFF:
+                    file_size = values.pop(0)
+                if compress_size == 0xFFFFFFFF:
+                    compress_size = values.pop(0)
+                if header_offset == 0xFFFFFFFF:
+                    header_offset = values.pop(0)
+                break
+            position += 4 + extra_size
+        return (file_size, compress_size, header_offset)
+
+    def entries(self) -> Iterator[ZipEntry]:
+        """Iterates over every record of the central directory in order.
+
+        Yields:
+            Iterator[ZipEntry]: Every entry of the archive.
+        """
+        offset: int = self._cd_start
+        for _ in range(self._entry_count):
+            entry: ZipEntry = self._parse_entry(offset)
+            yield entry
+            offset += entry.central_length
+
+    def find(self, name: str) -> ZipEntry | None:
+        """Finds an entry by its name.
+
+        The first lookup is a linear search of the raw central directory, which avoids parsing every record when a
+        single member is read. Once an archive is looked up a second time, every record is parsed into a map from
+        the names to the offsets of their records, which the following lookups use instead.
+
+        Args:
+            name (str): The full name of the entry inside the archive.
+
+        Returns:
+            ZipEntry | None: The entry, or ``None`` if the archive does not contain it.
+        """
+        if self._offsets is None and self._lookups > 0:
+            # NOTE: The first record of a name wins, the same as the linear search.
+            self._offsets = {}
+            for entry in self.entries():
+                self._offsets.setdefault(entry.name, entry.central_offset)
+        self._lookups += 1
+        if self._offsets is not None:
+            offset: int | None = self._offsets.get(name)
+            return None if offset is None else self._parse_entry(offset)
+        raw_name: bytes = name.encode("utf-8")
+        position: int = self._cd_start
+        while True:
+            position = self._buffer.find(raw_name, position, self._cd_end)
+            if position < 0:
+                return None
+            record: int = position - _CENTRAL_DIR_STRUCT.size
+            if (
+                record >= self._cd_start
+                and self._buffer[record:record + 4] == _CENTRAL_DIR_SIGNATURE
+                and struct.unpack_from("<H", self._buffer, record + 28)[0] == len(raw_name)
+            ):
+                return self._parse_entry(record)
+            position += 1
+
+    def local_extra(self, entry: ZipEntry) -> bytes:
+        """Gets the extra field of the local header of an entry.
+
+        Args:
+            entry (ZipEntry): An entry of this archive.
+
+        Returns:
+            bytes: The raw extra field of the local header.
+        """
+        offset: int = entry.header_offset
+        (_, _, _, _, _, _, _, _, _, _, name_length, extra_length) = _LOCAL_HEADER_STRUCT.unpack_from(
+            self._buffer, offset
+        )
+        extra_start: int = offset + _LOCAL_HEADER_STRUCT.size + name_length
+        return bytes(self._buffer[extra_start:extra_start + extra_length])
+
+    def data_offset(self, entry: ZipEntry) -> int:
+        """Gets the offset of the compressed data of an entry inside the buffer.
+
+        Args:
+            entry (ZipEntry): An entry of this archive.
+
+        Raises:
+            ZipDirectoryError: If the local header of the entry is not valid.
+
+        Returns:
+            int: The offset of the first byte of compressed data.
+        """
+        offset: int = entry.header_offset
+        if self._buffer[offset:offset + 4] != _LOCAL_HEADER_SIGNATURE:
+            raise ZipDirectoryError(f"Bad local file header for {entry.name}.")
+        (_, _, _, _, _, _, _, _, _, _, name_length, extra_length) = _LOCAL_HEADER_STRUCT.unpack_from(
+            self._buffer, offset
+        )
+        return offset + _LOCAL_HEADER_STRUCT.size + name_length + extra_length
+
+    def read_raw(self, entry: ZipEntry) -> memoryview:
+        """Gets the compressed data of an entry without copying it.
+
+        Args:
+            entry (ZipEntry): An entry of this archive.
+
+        Returns:
+            memoryview: A view of the compressed data of the entry.
+        """
+        start: int = self.data_offset(entry)
+        return memoryview(self._buffer)[start:start + entry.compress_size]
+
+    def read(self, entry: ZipEntry) -> bytes:
+        """Reads and inflates the data of a single entry.
+
+        Args:
+            entry (ZipEntry): An entry of this archive.
+
+        Raises:
+            ZipEntryUnsupportedError: If the entry is encrypted or uses an unsupported compression method.
+            ZipDirectoryError: If the data of the entry does not match its CRC.
+
+        Returns:
+            bytes: The uncompressed data of the entry.
+        """
+        if entry.flag_bits & _ENCRYPTED_FLAG:
+            raise ZipEntryUnsupportedError(f"Entry {entry.name} is encrypted.")
+        data: bytes
+        raw: memoryview = self.read_raw(entry)
+        try:
+            if entry.compress_type == ZIP_STORED:
+                data = bytes(raw)
+            elif entry.compress_type == ZIP_DEFLATED:
+                data = zlib.decompress(raw, -zlib.MAX_WBITS, max(entry.file_size, 1))
+            else:
+                raise ZipEntryUnsupportedError(
+                    f"Entry {entry.name} uses unsupported compression method {entry.compress_type}."
+                )
+        finally:
+            raw.release()
+        if zlib.crc32(data) != entry.crc:
+            raise ZipDirectoryError(f"Bad CRC-32 for entry {entry.name}.")
+        return data
+
+    def iter_chunks(self, entry: ZipEntry, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Inflates the data of a single entry a chunk at a time, so a caller can stop without inflating all of it.
+
+        The CRC is only checked once the last chunk has been inflated.
+
+        Args:
+            entry (ZipEntry): An entry of this archive.
+            chunk_size (int, optional): The largest amount of uncompressed bytes per chunk. Defaults to 64 KiB.
+
+        Raises:
+            ZipEntryUnsupportedError: If the entry is encrypted or uses an unsupported compression method.
+            ZipDirectoryError: If the data of the entry does not match its CRC.
+
+        Yields:
+            Iterator[bytes]: The uncompressed data of the entry, in order.
+        """
+        if entry.flag_bits & _ENCRYPTED_FLAG:
+            raise ZipEntryUnsupportedError(f"Entry {entry.name} is encrypted.")
+        if entry.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+            raise ZipEntryUnsupportedError(
+                f"Entry {entry.name} uses unsupported compression method {entry.compress_type}."
+            )
+        crc: int = 0
+        start: int = self.data_offset(entry)
+        end: int = start + entry.compress_size
+        # NOTE: Slices of the buffer are copies, so no view of a memory map is held while the caller has a chunk.
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if entry.compress_type == ZIP_DEFLATED else None
+        chunk: bytes
+        for offset in range(start, end, chunk_size):
+            piece: bytes = bytes(self._buffer[offset:min(offset + chunk_size, end)])
+            if decompressor is None:
+                crc = zlib.crc32(piece, crc)
+                yield piece
+                continue
+            chunk = decompressor.decompress(piece, chunk_size)
+            while True:
+                if chunk != b"":
+                    crc = zlib.crc32(chunk, crc)
+                    yield chunk
+                if decompressor.unconsumed_tail == b"":
+                    break
+                chunk = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+            if decompressor.eof:
+                break
+        if decompressor is not None:
+            chunk = decompressor.flush()
+            if chunk != b"":
+                crc = zlib.crc32(chunk, crc)
+                yield chunk
+        if crc != entry.crc:
+            raise ZipDirectoryError(f"Bad CRC-32 for entry {entry.name}.")
+
+
+def read_zip_member(file: Path | str, name: str) -> bytes | None:
+    """Reads a single member of a zip file on disk, through its central directory when possible.
+
+    Archives this reader cannot handle fall back to ``zipfile``.
+
+    Args:
+        file (Path | str): The path to the zip file.
+        name (str): The full name of the member inside the archive.
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a zip file.
+
+    Returns:
+        bytes | None: The uncompressed data of the member, or ``None`` if the archive does not contain it.
+    """
+    try:
+        with ZipDirectory.open(file) as zip_directory:
+            entry: ZipEntry | None = zip_directory.find(name)
+            if entry is None:
+                return None
+            return zip_directory.read(entry)
+    except ZipDirectoryError:
+        with zipfile.ZipFile(file, mode="r", allowZip64=True) as zip_file:
+            try:
+                zip_info: zipfile.ZipInfo = zip_file.getinfo(name)
+            except KeyError:
+                return None
+            with zip_file.open(zip_info, mode="r", force_zip64=True) as zipped_file_stream:
+                return zipped_file_stream.read()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""A zip writer that copies the compressed bytes of unchanged entries from an existing archive.
+
+Only the entries that are replaced are compressed again; every other entry keeps its local header, compressed
+data, data descriptor and CRC as they are, so rewriting a large archive to change one small file is bounded by
+the speed of copying bytes instead of inflating and deflating every entry.
+"""
+
+import struct
+import time
+import zlib
+from typing import IO
+
+from .zip_reader import (
+    ZIP_DEFLATED,
+    ZIP_STORED,
+    ZipDirectory,
+    ZipEntry,
+    ZipEntryUnsupportedError,
+)
+
+
+_LOCAL_HEADER_STRUCT: struct.Struct = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIR_STRUCT: struct.Struct = struct.Struct("<4s4B4HL2L5H2L")
+_END_OF_CENTRAL_DIR_STRUCT: struct.Struct = struct.Struct("<4s4H2LH")
+_DATA_DESCRIPTOR_SIGNATURE: bytes = b"PK\x07\x08"
+_DATA_DESCRIPTOR_FLAG: int = 0x8
+_UTF8_FLAG: int = 0x800
+_ZIP64_EXTRA_ID: int = 0x0001
+_ZIP32_LIMIT: int = 0xFFFFFFFF
+_ZIP32_COUNT_LIMIT: int = 0xFFFF
+_HEADER_OFFSET_FIELD: int = 42
+_COPY_CHUNK_SIZE: int = 1024 * 1024
+
+
+def _dos_date_time(timestamp: float) -> tuple[int, int]:
+    local: time.struct_time = time.localtime(timestamp)
+    year: int = max(local.tm_year, 1980)
+    dos_date: int = (year - 1980) << 9 | local.tm_mon << 5 | local.tm_mday
+    dos_time: int = local.tm_hour << 11 | local.tm_min << 5 | local.tm_sec // 2
+    return (dos_date, dos_time)
+
+
+def _copy_range(source: ZipDirectory, target: IO[bytes], start: int, end: int) -> None:
+    view: memoryview = memoryview(source.buffer)
+    try:
+        for chunk_start in range(start, end, _COPY_CHUNK_SIZE):
+            target.write(view[chunk_start:min(chunk_start + _COPY_CHUNK_SIZE, end)])
+    finally:
+        view.release()
+
+
+def _local_record_end(source: ZipDirectory, entry: ZipEntry) -> int:
+    data_end: int = source.data_offset(entry) + entry.compress_size
+    if not entry.flag_bits & _DATA_DESCRIPTOR_FLAG:
+        return data_end
+    # NOTE: The sizes in the data descriptor are 8 bytes wide when the local header has a zip64 extra field.
+    size_width: int = 4
+    extra: bytes = source.local_extra(entry)
+    position: int = 0
+    while position + 4 <= len(extra):
+        extra_id, extra_size = struct.unpack_from("<2H", extra, position)
+        if extra_id == _ZIP64_EXTRA_ID:
+            size_width = 8
+            break
+        position += 4 + extra_size
+    descriptor_length: int = 4 + size_width * 2
+    if source.buffer[data_end:data_end + 4] == _DATA_DESCRIPTOR_SIGNATURE:
+        descriptor_length += 4
+    return data_end + descriptor_length
+
+
+class _NewEntry:
+    def __init__(self, name: str, data: bytes, compress_type: int, external_attr: int) -> None:
+        self.raw_name: bytes = name.encode("utf-8")
+        self.flag_bits: int = 0 if name.isascii() else _UTF8_FLAG
+        self.compress_type: int = compress_type
+        self.crc: int = zlib.crc32(data)
+        self.file_size: int = len(data)
+        self.external_attr: int = external_attr
+        self.compressed: bytes = data
+        if compress_type == ZIP_DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+            self.compressed = compressor.compress(data) + compressor.flush()
+        self.dos_date, self.dos_time = _dos_date_time(time.time())
+
+    def local_header(self) -> bytes:
+        """Builds the local file header written right before the compressed data of the entry.
+
+        Returns:
+            bytes: The local file header, followed by the encoded name of the entry.
+        """
+        version: int = 20 if self.compress_type == ZIP_DEFLATED else 10
+        return _LOCAL_HEADER_STRUCT.pack(
+            b"PK\x03\x04", version, 0, self.flag_bits, self.compress_type, self.dos_time, self.dos_date,
+            self.crc, len(self.compressed), self.file_size, len(self.raw_name), 0,
+        ) + self.raw_name
+
+    def central_record(self, header_offset: int) -> bytes:
+        """Builds the record of the entry in the central directory of the archive.
+
+        Args:
+            header_offset (int): The offset of the local file header of the entry, from the start of the archive.
+
+        Returns:
+            bytes: The central directory record, followed by the encoded name of the entry.
+        """
+        version: int = 20 if self.compress_type == ZIP_DEFLATED else 10
+        return _CENTRAL_DIR_STRUCT.pack(
+            b"PK\x01\x02", version, 0, version, 0, self.flag_bits, self.compress_type, self.dos_time, self.dos_date,
+            self.crc, len(self.compressed), self.file_size, len(self.raw_name), 0, 0, 0, 0, self.external_attr,
+            header_offset,
+        ) + self.raw_name
+
+
+def rewrite_zip(
+    source: ZipDirectory, target: IO[bytes], replacements: dict[str, bytes], compress_type: int = ZIP_DEFLATED
+) -> None:
+    """Writes a copy of an archive in a single pass, replacing the data of some of its entries.
+
+    Replaced entries keep their position in the archive; replacements for entries that do not exist yet are added
+    at the end of it.
+
+    Args:
+        source (ZipDirectory): The archive to copy.
+        target (IO[bytes]): The binary stream to write the new archive to.
+        replacements (dict[str, bytes]): The new uncompressed data of entries, by their names.
+        compress_type (int, optional): The compression used for replaced entries. Defaults to ZIP_DEFLATED.
+
+    Raises:
+        ZipEntryUnsupportedError: If the archive needs zip64 records, which are not rewritten by this writer.
+    """
+    if compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+        raise ZipEntryUnsupportedError(f"Compression method {compress_type} is not supported.")
+    if source.is_zip64 or source.entry_count >= _ZIP32_COUNT_LIMIT:
+        raise ZipEntryUnsupportedError("Archives with zip64 records are not supported.")
+    pending: dict[str, bytes] = dict(replacements)
+    central_records: list[bytes] = []
+    offset: int = 0
+    for entry in source.entries():
+        if (
+            _ZIP32_LIMIT in (entry.compress_size, entry.file_size)
+            or entry.header_offset >= _ZIP32_LIMIT
+            or offset >= _ZIP32_LIMIT
+        ):
+            raise ZipEntryUnsupportedError("Archives with zip64 records are not supported.")
+        if entry.name in pending:
+            external_attr: int = struct.unpack_from("<L", source.buffer, entry.central_offset + 38)[0]
+            new_entry: _NewEntry = _NewEntry(entry.name, pending.pop(entry.name), compress_type, external_attr)
+            target.write(new_entry.local_header())
+            target.write(new_entry.compressed)
+            central_records.append(new_entry.central_record(offset))
+            offset += len(new_entry.raw_name) + _LOCAL_HEADER_STRUCT.size + len(new_entry.compressed)
+            continue
+        record_end: int = _local_record_end(source, entry)
+        _copy_range(source, target, entry.header_offset, record_end)
+        central_end: int = entry.central_offset + entry.central_length
+        central_record: bytearray = bytearray(source.buffer[entry.central_offset:central_end])
+        struct.pack_into("<L", central_record, _HEADER_OFFSET_FIELD, offset)
+        central_records.append(bytes(central_record))
+        offset += record_end - entry.header_offset
+    for name, data in pending.items():
+        new_entry = _NewEntry(name, data, compress_type, 0o644 << 16)
+        target.write(new_entry.local_header())
+        target.write(new_entry.compressed)
+        central_records.append(new_entry.central_record(offset))
+        offset += len(new_entry.raw_name) + _LOCAL_HEADER_STRUCT.size + len(new_entry.compressed)
+    central_directory_offset: int = offset
+    central_directory_size: int = 0
+    for central_record_bytes in central_records:
+        target.write(central_record_bytes)
+        central_directory_size += len(central_record_bytes)
+    if len(central_records) >= _ZIP32_COUNT_LIMIT or central_directory_offset + central_directory_size >= _ZIP32_LIMIT:
+        raise ZipEntryUnsupportedError("Archives with zip64 records are not supported.")
+    comment_start: int = source.eocd_offset + _END_OF_CENTRAL_DIR_STRUCT.size
+    comment_end: int = comment_start + source.comment_length
+    comment: bytes = bytes(source.buffer[comment_start:comment_end])
+    target.write(_END_OF_CENTRAL_DIR_STRUCT.pack(
+        b"PK\x05\x06", 0, 0, len(central_records), len(central_records), central_directory_size,
+        central_directory_offset, len(comment),
+    ))
+    target.write(comment)
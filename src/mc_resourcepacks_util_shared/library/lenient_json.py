@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""A module containing a tolerant JSON reader for hand written files, such as ``pack.mcmeta``.
+
+The text is repaired in a single linear pass before it is parsed once by ``json``. The pass removes comments,
+trailing commas and any data after the top level value, escapes raw control characters inside of strings, and
+closes strings, objects and arrays that were left open at the end of the text.
+"""
+
+import json
+import re
+from re import Match, Pattern
+from typing import Any, Generator, Literal
+
+
+JsonRepairKind = Literal[
+    "comment",
+    "control_character",
+    "trailing_comma",
+    "trailing_data",
+    "unterminated_string",
+    "unclosed_container",
+]
+
+_TOKEN_REGEX: Pattern[str] = re.compile(
+    r"""
+    (?P<string>"(?:[^"\\]|\\.)*(?:"|\Z))
+    | (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<open>[{\[])
+    | (?P<close>[}\]])
+    | (?P<comma>,)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_CONTROL_CHARACTER_REGEX: Pattern[str] = re.compile(r"[\x00-\x1f]")
+
+_CONTROL_CHARACTER_ESCAPES: dict[int, str] = {index: f"\\u{index:04x}" for index in range(0x20)} | {
+    ord("\b"): "\\b",
+    ord("\f"): "\\f",
+    ord("\n"): "\\n",
+    ord("\r"): "\\r",
+    ord("\t"): "\\t",
+}
+
+_CLOSING_BRACKETS: dict[str, str] = {"{": "}", "[": "]"}
+
+
+class JsonRepair:
+    """A single repair that was made to a JSON text before it was parsed."""
+
+    def __init__(self, kind: JsonRepairKind, line: int, column: int) -> None:
+        self.kind: JsonRepairKind = kind
+        self.line: int = line
+        self.column: int = column
+
+    @staticmethod
+    def at(kind: JsonRepairKind, text: str, position: int) -> "JsonRepair":
+        """Creates a repair at a position of the original text.
+
+        Args:
+            kind (JsonRepairKind): The kind of repair that was made.
+            text (str): The original text.
+            position (int): The index of the first character that was repaired.
+
+        Returns:
+            JsonRepair: The repair, with a one based line and column.
+        """
+        line: int = text.count("\n", 0, position) + 1
+        column: int = position - (text.rfind("\n", 0, position) + 1) + 1
+        return JsonRepair(kind, line, column)
+
+    def __repr__(self) -> str:
+        return f"{self.kind} at line {self.line} column {self.column}"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, JsonRepair):
+            return False
+        return self.kind == other.kind and self.line == other.line and self.column == other.column
+
+    def __rich_repr__(
+        self,
+    ) -> Generator[tuple[Literal["kind"], JsonRepairKind] | tuple[Literal["line", "column"], int], Any, None]:
+        yield "kind", self.kind
+        yield "line", self.line
+        yield "column", self.column
+
+
+def repair_json(text: str) -> tuple[str, list[JsonRepair]]:
+    """Repairs common mistakes of hand written JSON in a single pass.
+
+    Args:
+        text (str): The JSON text, which may or may not be valid.
+
+    Returns:
+        tuple[str, list[JsonRepair]]: The repaired JSON text, and the repairs that were made.
+    """
+    pieces: list[str] = []
+    repairs: list[JsonRepair] = []
+    containers: list[str] = []
+    pending_comma: int = -1
+    pending_comma_position: int = -1
+    position: int = 0
+    match: Match[str]
+    for match in _TOKEN_REGEX.finditer(text):
+        gap: str = text[position:match.start()]
+        if gap != "":
+            pieces.append(gap)
+            if not gap.isspace():
+                pending_comma = -1
+        position = match.end()
+        kind: str | None = match.lastgroup
+        token: str = match.group()
+        if kind == "string":
+            if (
+                len(token) == 1
+                or not token.endswith('"')
+                or token.endswith('\\"') and _is_escaped(token, len(token) - 1)
+            ):
+                repairs.append(JsonRepair.at("unterminated_string", text, match.start()))
+                token += '"'
+            control_character: Match[str] | None = _CONTROL_CHARACTER_REGEX.search(token)
+            if control_character is not None:
+                repairs.append(JsonRepair.at("control_character", text, match.start() + control_character.start()))
+                token = token.translate(_CONTROL_CHARACTER_ESCAPES)
+            pieces.append(token)
+            pending_comma = -1
+        elif kind in ("line_comment", "block_comment"):
+            repairs.append(JsonRepair.at("comment", text, match.start()))
+            pieces.append(" ")
+        elif kind == "open":
+            containers.append(token)
+            pieces.append(token)
+            pending_comma = -1
+        elif kind == "close":
+            if len(containers) == 0:
+                repairs.append(JsonRepair.at("trailing_data", text, match.start()))
+                position = len(text)
+                break
+            if pending_comma >= 0:
+                repairs.append(JsonRepair.at("trailing_comma", text, pending_comma_position))
+                pieces[pending_comma] = ""
+                pending_comma = -1
+            pieces.append(_CLOSING_BRACKETS[containers.pop()])
+            if len(containers) == 0:
+                rest: str = text[position:]
+                if rest.strip() != "":
+                    repairs.append(JsonRepair.at("trailing_data", text, position + len(rest) - len(rest.lstrip())))
+                position = len(text)
+                break
+        elif kind == "comma":
+            pending_comma = len(pieces)
+            pending_comma_position = match.start()
+            pieces.append(token)
+    pieces.append(text[position:])
+    if len(containers) > 0:
+        repairs.append(JsonRepair.at("unclosed_container", text, len(text)))
+        if pending_comma >= 0:
+            repairs.append(JsonRepair.at("trailing_comma", text, pending_comma_position))
+            pieces[pending_comma] = ""
+        while len(containers) > 0:
+            pieces.append(_CLOSING_BRACKETS[containers.pop()])
+    return ("".join(pieces), repairs)
+
+
+def _is_escaped(token: str, index: int) -> bool:
+    backslashes: int = len(token[:index]) - len(token[:index].rstrip("\\"))
+    return backslashes % 2 == 1
+
+
+def parse_lenient_json(text: str) -> tuple[Any, list[JsonRepair]]:
+    """Parses JSON text that may contain common mistakes, after repairing it in a single pass.
+
+    Args:
+        text (str): The JSON text, which may or may not be valid.
+
+    Raises:
+        JSONDecodeError: If the text could not be parsed even after it was repaired.
+
+    Returns:
+        tuple[Any, list[JsonRepair]]: The parsed JSON value, and the repairs that were made.
+    """
+    repaired: str
+    repairs: list[JsonRepair]
+    repaired, repairs = repair_json(text)
+    return (json.loads(repaired), repairs)
@@ -17,6 +17,7 @@ import json as _json
 from rich import inspect
 from rich.prompt import Prompt as RichPrompt, PromptError
 from rich.console import Console
+from rich.markup import escape
 from rich.theme import Theme
 from rich.text import TextType
 from rich.style import StyleType
@@ -254,12 +255,15 @@ def print_exception(exception: BaseException) -> None:
     pprint(exception, level="exception")
 
 
-def print_found_query(_file: str | Path, _path: str | Path, compressed: bool, short: bool) -> None:
+def print_found_query(
+    _file: str | Path, _path: str | Path, compressed: bool, short: bool, queries: list[str] | None = None
+) -> None:
     """Prints information that the script has found a query.
 
     Args:
         _file (str | Path): The found file in the query.
         _path (str | Path): The path of the file on the query.
+        queries (list[str] | None, optional): The queries the file matched, printed after it. Defaults to None.
     """
     new_path: Path | str
     if isinstance(_path, str) and compressed is False:
@@ -277,7 +281,41 @@ def print_found_query(_file: str | Path, _path: str | Path, compressed: bool, sh
         new_file_path = _file.name
     else:
         new_file_path = str(_file).replace("\\[", r"\\[")
-    pprint(f"[blue]{new_file_path}[/blue] -> [green]{new_path}[/green]", level="info")
+    tags: str = ""
+    if queries is not None and len(queries) > 0:
+        tags = f" [magenta]({escape(', '.join(queries))})[/magenta]"
+    pprint(f"[blue]{new_file_path}[/blue] -> [green]{new_path}[/green]{tags}", level="info")
+
+
+def print_found_content(_file: str | Path, _path: str | Path, line_number: int, line: str) -> None:
+    """Prints a line of a file that matched the content pattern of a query.
+
+    Args:
+        _file (str | Path): The archive or directory resourcepack the file is in.
+        _path (str | Path): The path of the file inside of it.
+        line_number (int): The one based number of the line.
+        line (str): The text of the line.
+    """
+    new_path: str = str(_path).replace(os.path.sep, "/")
+    pprint(
+        f"[blue]{escape(str(_file))}[/blue] -> [green]{escape(new_path)}[/green]:"
+        f"[yellow]{line_number}[/yellow]: {escape(line)}",
+        level="info",
+    )
+
+
+def print_found_override(path: str, winner: str | Path, shadowed: list[Path]) -> None:
+    """Prints the resourcepack an asset is loaded from, and the enabled packs it overrides.
+
+    Args:
+        path (str): The path of the asset.
+        winner (str | Path): The resourcepack the asset is loaded from.
+        shadowed (list[Path]): The other enabled packs that contain the asset, highest priority first.
+    """
+    overrides: str = ""
+    if len(shadowed) > 0:
+        overrides = f" [magenta](overrides {escape(', '.join(pack.name for pack in shadowed))})[/magenta]"
+    pprint(f"[green]{escape(path)}[/green] -> [blue]{escape(Path(winner).name)}[/blue]{overrides}", level="info")
 
 
 def print_found_query_bool(_file: str | Path, _path: str | Path, test: bool, compressed: bool, short: bool) -> None:
@@ -4,136 +4,439 @@
 """_summary_"""
 
 import os
+import sys
 from pathlib import Path
-from typing import Any, Callable
+from typing import IO, Any, Callable, Generator, Literal
 from zipfile import ZipFile, ZIP_DEFLATED
 import json
 from json.decoder import JSONDecodeError
 import tempfile
 
 from .extensions.zip_data import ZipData, ZipDataInvalidError
+from .extensions.zip_reader import ZipDirectory, ZipDirectoryError, ZipEntry, read_zip_member
+from .extensions.zip_rewriter import rewrite_zip
 
 from .errors import FileNotReadError
 
 from .minecraft_version import MinecraftVersion
 
 from .utils import decode_bytes_enc, encode_bytes, try_decode_json_force
+from .lenient_json import JsonRepair
 
-from .logger import quit_with_error, pprint
+from .logger import pprint
+from .dir_file_utils import MAX_PACK_FOLDER_DEPTH, scan_packs
+from .concurrency import PoolKind, jobs_from_args, ordered_map
+from .backup_store import BackupRecord, BackupStore, backup_dir_from_args
 from .script_arguments import ScriptArguments
 
 
-def list_map(_list: list[str], root: str) -> list[Path]:
-    # TODO: Add module docstring
-    """_summary_
+ModifyStatus = Literal["changed", "unchanged", "failed"]
+
+
+def _updated_pack_mcmeta(file_path: Path, raw: bytes, pack_version: int) -> ZipData | None:
+    decoded: tuple[str | None, str | None] = decode_bytes_enc(raw)
+    if decoded[0] is None or decoded[1] is None:
+        raise FileNotReadError(f"File at the path pack.mcmeta in zip file {file_path} has not been read.")
+    data: ZipData = ZipData("pack.mcmeta", decoded[0], decoded[1])
+    try:
+        repairs: list[JsonRepair] = []
+        json_data: dict[str, Any] = try_decode_json_force(data.text, repairs)
+        for repair in repairs:
+            pprint(f"Repaired {repair} of pack.mcmeta in {file_path}", level="warn")
+    except JSONDecodeError:
+        pprint("file_path     = ", file_path)
+        pprint("item.filename = ", data.file)
+        pprint("decoded[0]    = ", decoded[0])
+        raise
+    if json_data["pack"]["pack_format"] == pack_version:
+        return None
+    json_data["pack"]["pack_format"] = pack_version
+    data = ZipData(data.file, json.dumps(json_data, indent=4), decoded[1])
+    if not data.is_valid():
+        raise ZipDataInvalidError(f"Zip data for zip file at {file_path} is invalid.", data)
+    return data
+
+
+def _encode_zip_data(file_path: Path, data: ZipData) -> bytes:
+    encoded: bytes | None = encode_bytes(data.text, data.encoding)
+    if encoded is None:
+        raise ZipDataInvalidError(f"Zip data for zip file at {file_path} could not be encoded.", data)
+    return encoded
+
+
+def _write_temp_archive(file_path: Path, write: Callable[[IO[bytes]], None]) -> Path:
+    handle: int
+    name: str
+    handle, name = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, mode="wb") as target:
+            write(target)
+    except BaseException:
+        os.remove(name)
+        raise
+    return Path(name)
+
+
+def _rewrite_with_zipfile(file_path: Path, target: IO[bytes], replacements: dict[str, bytes]) -> None:
+    with ZipFile(file_path, mode="r", allowZip64=True) as z_in:
+        with ZipFile(target, mode="w", allowZip64=True) as z_out:
+            for item in z_in.infolist():
+                if item.filename in replacements:
+                    z_out.writestr(item, replacements[item.filename], compress_type=ZIP_DEFLATED)
+                else:
+                    z_out.writestr(item, z_in.read(item.filename))
+
+
+def modify_zip_pack(file_path: Path, pack_version: int, backup_store: BackupStore | None = None) -> bool:
+    """Updates the ``pack_format`` of a zipped resourcepack, keeping a backup of the original archive.
+
+    The ``pack.mcmeta`` file is read first, and the archive is only rewritten if its ``pack_format`` differs.
+    Every other entry is copied without being decompressed, see ``rewrite_zip``. Archives that cannot be copied
+    that way fall back to ``zipfile``, which recompresses every entry. The original archive is added to the
+    backup store before it is replaced.
 
     Args:
-        list (_type_): _description_
-        Ttype (_type_): _description_
+        file_path (Path): The path to the zipped resourcepack.
+        pack_version (int): The ``pack_format`` the resourcepack should have.
+        backup_store (BackupStore | None, optional): The store to back the original archive up to. Defaults to None.
 
     Returns:
-        list[T]: _description_
+        bool: Returns ``True`` if the resourcepack was changed.
     """
-    output: list[Path] = []
-    for item in _list:
-        output.append(Path(root, item))
-    return output
+    data: ZipData | None
+    encoded: bytes
+    tmp_file: Path
+    try:
+        with ZipDirectory.open(file_path) as z_in:
+            entry: ZipEntry | None = z_in.find("pack.mcmeta")
+            if entry is None:
+                return False
+            data = _updated_pack_mcmeta(file_path, z_in.read(entry), pack_version)
+            if data is None:
+                return False
+            encoded = _encode_zip_data(file_path, data)
+            tmp_file = _write_temp_archive(
+                file_path, lambda target: rewrite_zip(z_in, target, {"pack.mcmeta": encoded})
+            )
+    except ZipDirectoryError:
+        with ZipFile(file_path, mode="r", allowZip64=True) as z_fallback:
+            if "pack.mcmeta" not in z_fallback.namelist():
+                return False
+            data = _updated_pack_mcmeta(file_path, z_fallback.read("pack.mcmeta"), pack_version)
+        if data is None:
+            return False
+        encoded = _encode_zip_data(file_path, data)
+        tmp_file = _write_temp_archive(
+            file_path, lambda target: _rewrite_with_zipfile(file_path, target, {"pack.mcmeta": encoded})
+        )
+    try:
+        if backup_store is not None:
+            backup_store.backup(file_path)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    # replace with the temp archive
+    os.replace(tmp_file, file_path)
+    return True
+
+
+class ModifyResult:
+    """The result of modifying a single resourcepack."""
+
+    def __init__(self, file_path: Path, status: ModifyStatus, error: str | None = None) -> None:
+        self.file_path: Path = file_path
+        self.status: ModifyStatus = status
+        self.error: str | None = error
 
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"{self.status}: {self.file_path} ({self.error})"
+        return f"{self.status}: {self.file_path}"
 
-def list_contains(_list: list[Path], predicate: Callable[[Path], bool]) -> bool:
-    """_summary_
+    def __rich_repr__(
+        self,
+    ) -> Generator[
+        tuple[Literal["file_path"], Path]
+        | tuple[Literal["status"], ModifyStatus]
+        | tuple[Literal["error"], str | None],
+        Any,
+        None,
+    ]:
+        yield "file_path", self.file_path
+        yield "status", self.status
+        yield "error", self.error
+
+
+def modify_pack_task(task: tuple[Path, int, Path | None]) -> ModifyResult:
+    """Modifies a single zipped resourcepack, catching any error so one bad pack does not abort the others.
+
+    This is a module level function so it can be sent to a process pool.
 
     Args:
-        list (_type_): _description_
-        Callable (_type_): _description_
+        task (tuple[Path, int, Path | None]): The path to the zipped resourcepack, the ``pack_format`` it should
+            have and the folder of the backup store, or ``None`` to not keep a backup.
 
     Returns:
-        bool: _description_
+        ModifyResult: The result of modifying the resourcepack.
     """
-    for item in _list:
-        if predicate(item):
-            return True
-    return False
+    file_path: Path
+    pack_version: int
+    backup_dir: Path | None
+    file_path, pack_version, backup_dir = task
+    try:
+        backup_store: BackupStore | None = BackupStore(backup_dir) if backup_dir is not None else None
+        if modify_zip_pack(file_path, pack_version, backup_store):
+            return ModifyResult(file_path, "changed")
+        return ModifyResult(file_path, "unchanged")
+    # pylint: disable-next=W0718
+    except Exception as exception:
+        return ModifyResult(file_path, "failed", f"{type(exception).__name__}: {exception}")
 
 
-def modify_resourcepacks(args: ScriptArguments, minecraft_version: MinecraftVersion) -> None:
-    # TODO: Add method summary.
-    """_summary_
+def print_modify_summary(results: list[ModifyResult]) -> None:
+    """Prints the failed resourcepacks and a summary of the results of modifying resourcepacks.
 
     Args:
-        args (ScriptArguments): _description_
-        enabled (list[ResourcePack]): _description_
-        incompatible (list[ResourcePack]): _description_
+        results (list[ModifyResult]): The results of modifying every resourcepack.
     """
-    for root, directories, files in os.walk(os.path.realpath(args.resourcepacks_folder)):
-        all_dirs_with_meta_or_zip: list[Path] = []
-        for directory in directories:
-            if Path(root, directory, "pack.mcmeta").exists():
-                all_dirs_with_meta_or_zip.append(Path(root, directory, "pack.mcmeta"))
-            else:
-                dir_items: list[str] = os.listdir(Path(root, directory))
-                dir_paths: list[Path] = list_map(dir_items, root)
-                if list_contains(dir_paths, lambda x: x.is_file() and x.suffix == ".zip"):
-                    all_dirs_with_meta_or_zip.append(Path(root, directory))
-        for file in files:
-            if list_contains(all_dirs_with_meta_or_zip, lambda x: x.is_dir() and root in str(x)):
-                continue
-            file_path: Path = Path(root, file)
-            if file_path.suffix == ".zip":
-                tmp: tuple[int, str] = tempfile.mkstemp(dir=root)
-                os.close(tmp[0])
-                data: ZipData = ZipData("", "", None)
-                tmp_file: Path = Path(root, tmp[1])
-                success: bool = False
-                pack_version = minecraft_version.pack_version()
-                with ZipFile(file_path, mode="r", allowZip64=True) as z_in:
-                    with ZipFile(tmp_file, mode="w", allowZip64=True) as z_out:
-                        for item in z_in.infolist():
-                            if item.filename != "pack.mcmeta":
-                                z_out.writestr(item, z_in.read(item.filename))
-                            else:
-                                decoded: tuple[str | None, str | None] = (None, None)
-                                cfr: bytes = z_in.read(item.filename)
-                                decoded = decode_bytes_enc(cfr)
-                                if decoded[0] is None or decoded[1] is None:
-                                    z_in.close()
-                                    z_out.close()
-                                    raise FileNotReadError(f"File at the path {item.filename} in zip file {file_path} has not been read.")
-                                data = ZipData(item.filename, decoded[0], decoded[1])
-                                try:
-                                    json_data: dict[str, Any] = try_decode_json_force(data.text)
-                                    if json_data["pack"]["pack_format"] != pack_version:
-                                        json_data["pack"]["pack_format"] = pack_version
-                                        json_text: str = json.dumps(json_data, indent=4)
-                                        data = ZipData(item.filename, json_text, decoded[1])
-                                        success = True
-                                except JSONDecodeError:
-                                    pprint("file_path     = ", file_path)
-                                    pprint("item.filename = ", item.filename)
-                                    pprint("decoded[0]    = ", decoded[0])
-                                    raise
-                        z_out.close()
-                    z_in.close()
-                if success:
-                    if not data.is_valid():
-                        raise ZipDataInvalidError(f"Zip data for zip file at {file_path} is invalid.", data)
-                    test: bool = True
-                    # replace with the temp archive
-                    if not test:
-                        os.remove(file_path)
-                    else:
-                        os.rename(file_path, file_path.with_name(f"{file_path.name}.bak"))
-                    os.rename(tmp_file, file_path)
-                    with ZipFile(file_path, mode="a", allowZip64=True, compression=ZIP_DEFLATED) as z_app:
-                        try:
-                            cfw: bytes | None = encode_bytes(data.text, data.encoding)
-                            if cfw is not None:
-                                z_app.writestr("pack.mcmeta", cfw)
-                            else:
-                                raise Exception("a1")
-                        except BaseException as error:
-                            z_app.close()
-                            quit_with_error(error)
-                        z_app.close()
-                else:
-                    os.remove(tmp_file)
+    counts: dict[ModifyStatus, int] = {"changed": 0, "unchanged": 0, "failed": 0}
+    for result in results:
+        counts[result.status] += 1
+        if result.status == "failed":
+            pprint(f"[red]Failed[/red] to modify {result.file_path}: {result.error}", level="error")
+    pprint(
+        f"Modified {len(results)} resourcepacks: [green]{counts['changed']} changed[/green], "
+        f"{counts['unchanged']} unchanged, [red]{counts['failed']} failed[/red]",
+        level="info",
+    )
+
+
+def find_zip_packs(args: ScriptArguments) -> list[Path]:
+    """Finds every zipped resourcepack in the ``resourcepacks`` folder and the folders grouping packs inside it.
+
+    Directory resourcepacks are not descended into, see ``scan_packs``.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+
+    Returns:
+        list[Path]: The paths to every zipped resourcepack.
+    """
+    return [
+        candidate.path
+        for candidate in scan_packs(os.path.realpath(args.resourcepacks_folder), max_depth=MAX_PACK_FOLDER_DEPTH)
+        if candidate.kind == "zip"
+    ]
+
+
+class ModifyPlanEntry:
+    """The planned change of a single resourcepack, found by reading only its ``pack.mcmeta`` file."""
+
+    def __init__(
+        self,
+        file_path: Path,
+        status: ModifyStatus,
+        pack_format: int | None = None,
+        target_format: int | None = None,
+        rewrite_bytes: int = 0,
+        error: str | None = None,
+    ) -> None:
+        self.file_path: Path = file_path
+        self.status: ModifyStatus = status
+        self.pack_format: int | None = pack_format
+        self.target_format: int | None = target_format
+        self.rewrite_bytes: int = rewrite_bytes
+        self.error: str | None = error
+
+    def to_dict(self) -> dict[str, Any]:
+        """Gets the planned change as a JSON serializable dictionary.
+
+        Returns:
+            dict[str, Any]: The planned change.
+        """
+        return {
+            "path": str(self.file_path),
+            "status": self.status,
+            "pack_format": self.pack_format,
+            "target_format": self.target_format,
+            "rewrite_bytes": self.rewrite_bytes,
+            "error": self.error,
+        }
+
+
+def plan_pack_task(task: tuple[Path, int]) -> ModifyPlanEntry:
+    """Plans the change of a single zipped resourcepack, reading only its ``pack.mcmeta`` file.
+
+    This is a module level function so it can be sent to a process pool.
+
+    Args:
+        task (tuple[Path, int]): The path to the zipped resourcepack and the ``pack_format`` it should have.
+
+    Returns:
+        ModifyPlanEntry: The planned change of the resourcepack.
+    """
+    file_path: Path
+    pack_version: int
+    file_path, pack_version = task
+    try:
+        raw: bytes | None = read_zip_member(file_path, "pack.mcmeta")
+        if raw is None:
+            return ModifyPlanEntry(file_path, "unchanged", target_format=pack_version)
+        text: str | None = decode_bytes_enc(raw)[0]
+        if text is None:
+            raise FileNotReadError(f"File at the path pack.mcmeta in zip file {file_path} has not been read.")
+        pack_format: int = try_decode_json_force(text)["pack"]["pack_format"]
+        if pack_format == pack_version:
+            return ModifyPlanEntry(file_path, "unchanged", pack_format, pack_version)
+        return ModifyPlanEntry(file_path, "changed", pack_format, pack_version, os.stat(file_path).st_size)
+    # pylint: disable-next=W0718
+    except Exception as exception:
+        return ModifyPlanEntry(
+            file_path, "failed", target_format=pack_version, error=f"{type(exception).__name__}: {exception}"
+        )
+
+
+def plan_modify(args: ScriptArguments, minecraft_version: MinecraftVersion) -> list[ModifyPlanEntry]:
+    """Plans which zipped resourcepacks need their ``pack_format`` changed, without writing anything.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+        minecraft_version (MinecraftVersion): The minecraft version to update the resourcepacks to.
+
+    Returns:
+        list[ModifyPlanEntry]: The planned change of every resourcepack, in the order they were found.
+    """
+    pack_version: int = minecraft_version.pack_version()
+    jobs: int | None
+    pool: PoolKind
+    jobs, pool = jobs_from_args(args)
+    tasks: list[tuple[Path, int]] = [(zip_pack, pack_version) for zip_pack in find_zip_packs(args)]
+    return list(ordered_map(plan_pack_task, tasks, jobs, pool))
+
+
+def _format_size(size: int) -> str:
+    value: float = size
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{size} B"
+        value /= 1024
+    return f"{size} B"
+
+
+def print_modify_plan(plan: list[ModifyPlanEntry], plan_format: Literal["text", "json"] = "text") -> None:
+    """Prints the planned changes of resourcepacks as a report or as JSON.
+
+    Args:
+        plan (list[ModifyPlanEntry]): The planned change of every resourcepack.
+        plan_format (Literal["text", "json"], optional): The format to print the plan in. Defaults to "text".
+    """
+    changes: list[ModifyPlanEntry] = [entry for entry in plan if entry.status == "changed"]
+    total_bytes: int = sum(entry.rewrite_bytes for entry in changes)
+    if plan_format == "json":
+        # NOTE: Written without rich, so the output can be piped into other tools.
+        sys.stdout.write(json.dumps({
+            "packs": [entry.to_dict() for entry in plan],
+            "changed": len(changes),
+            "unchanged": sum(1 for entry in plan if entry.status == "unchanged"),
+            "failed": sum(1 for entry in plan if entry.status == "failed"),
+            "rewrite_bytes": total_bytes,
+        }, indent=4) + "\n")
+        return
+    for entry in plan:
+        if entry.status == "changed":
+            pprint(
+                f"{entry.file_path}: pack_format [yellow]{entry.pack_format}[/yellow] -> "
+                f"[green]{entry.target_format}[/green] ({_format_size(entry.rewrite_bytes)})",
+                level="info",
+            )
+        elif entry.status == "failed":
+            pprint(f"[red]Failed[/red] to plan {entry.file_path}: {entry.error}", level="error")
+    pprint(
+        f"{len(changes)} of {len(plan)} resourcepacks need changes, {_format_size(total_bytes)} to rewrite.",
+        level="info",
+    )
+
+
+def modify_resourcepacks(
+    args: ScriptArguments, minecraft_version: MinecraftVersion, plan: list[ModifyPlanEntry] | None = None
+) -> list[ModifyResult]:
+    """Updates the ``pack_format`` of every zipped resourcepack in the ``resourcepacks`` folder that needs it.
+
+    A plan is made first, see ``plan_modify``, and only the resourcepacks that need changes are modified. Every
+    resourcepack is modified independently on a worker pool, a process pool unless ``--pool`` says otherwise,
+    and a resourcepack that fails to be modified does not stop the others.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+        minecraft_version (MinecraftVersion): The minecraft version to update the resourcepacks to.
+        plan (list[ModifyPlanEntry] | None, optional): An existing plan to follow. Defaults to None.
+
+    Returns:
+        list[ModifyResult]: The result of every resourcepack, in the order of the plan.
+    """
+    if plan is None:
+        plan = plan_modify(args, minecraft_version)
+    pack_version: int = minecraft_version.pack_version()
+    jobs: int | None
+    pool: PoolKind
+    jobs, pool = jobs_from_args(args, default_pool="process")
+    backup_dir: Path = backup_dir_from_args(args)
+    # NOTE: Every entry gets its slot in plan order, the modified resourcepacks fill theirs as the pool returns them.
+    slots: list[ModifyResult | None] = []
+    change_indexes: list[int] = []
+    changes: list[tuple[Path, int, Path | None]] = []
+    for index, entry in enumerate(plan):
+        if entry.status == "changed":
+            slots.append(None)
+            change_indexes.append(index)
+            changes.append((entry.file_path, pack_version, backup_dir))
+        else:
+            slots.append(ModifyResult(entry.file_path, entry.status, entry.error))
+    for index, result in zip(change_indexes, ordered_map(modify_pack_task, changes, jobs, pool)):
+        if result.status == "changed":
+            pprint(f"[green]Changed[/green] {result.file_path}", level="info")
+        slots[index] = result
+    results: list[ModifyResult] = [result for result in slots if result is not None]
+    print_modify_summary(results)
+    return results
+
+
+def restore_resourcepacks(args: ScriptArguments) -> list[BackupRecord]:
+    """Restores the most recent backup of every resourcepack in the ``resourcepacks`` folder.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+
+    Returns:
+        list[BackupRecord]: The backups that were restored.
+    """
+    backup_store: BackupStore = BackupStore(backup_dir_from_args(args))
+    restored: list[BackupRecord] = []
+    for record in backup_store.latest_backups(args.resourcepacks_folder):
+        try:
+            backup_store.restore(record)
+        except OSError as exception:
+            pprint(f"[red]Failed[/red] to restore {record.original_path}: {exception}", level="error")
+            continue
+        pprint(f"[green]Restored[/green] {record.original_path}", level="info")
+        restored.append(record)
+    pprint(f"Restored {len(restored)} resourcepacks from {backup_store.root}", level="info")
+    return restored
+
+
+def prune_backups(args: ScriptArguments) -> tuple[int, int]:
+    """Removes old backups of the resourcepacks in the ``resourcepacks`` folder from the backup store.
+
+    Args:
+        args (ScriptArguments): The arguments from the script CLI.
+
+    Returns:
+        tuple[int, int]: The amount of backups removed, and the amount of bytes freed.
+    """
+    backup_store: BackupStore = BackupStore(backup_dir_from_args(args))
+    keep: int = args.keep_backups if "keep_backups" in args and args.keep_backups is not None else 1
+    removed: int
+    freed: int
+    removed, freed = backup_store.prune(keep, args.resourcepacks_folder)
+    pprint(f"Pruned {removed} backups from {backup_store.root}, {_format_size(freed)} freed.", level="info")
+    return (removed, freed)
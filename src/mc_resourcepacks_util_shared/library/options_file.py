@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""A module containing the parsed model of the ``options.txt`` file of an instance.
+
+The file is read once into a list of lines, in order, together with a map from every key to the index of its line,
+so looking up or replacing an option never scans the file. Lines that are not changed are written back exactly as
+they were read, and the whole file is written through a single buffered write, and only when its hash differs from
+the one of the file on disk.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+
+def _file_digest(file: Path) -> bytes:
+    with open(file, "rb") as stream:
+        return hashlib.file_digest(stream, "sha256").digest()
+
+
+def _fsync_dir(directory: Path) -> None:
+    # NOTE: Folders cannot be opened on Windows, where the rename is already durable once the file is flushed.
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    file_descriptor: int = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+class OptionsFile:
+    """The lines of an ``options.txt`` file, with the index of the line of every key."""
+
+    def __init__(self, path: Path, lines: list[str]) -> None:
+        self.path: Path = path
+        self.lines: list[str] = lines
+        self.changed: set[int] = set()
+        self._keys: dict[str, int] = {}
+        for index, line in enumerate(lines):
+            # NOTE: Minecraft reads the file from the top, so the last line of a key is the one that is used.
+            if ":" in line:
+                self._keys[line.split(":", 1)[0]] = index
+
+    @classmethod
+    def load(cls, path: Path) -> "OptionsFile":
+        """Reads and parses an ``options.txt`` file.
+
+        Args:
+            path (Path): The path to the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+
+        Returns:
+            OptionsFile: The parsed file.
+        """
+        with path.open(encoding="utf8", newline="") as options_file:
+            return cls(path, options_file.read().splitlines(keepends=True))
+
+    def get(self, key: str) -> str | None:
+        """Gets the value of an option.
+
+        Args:
+            key (str): The key of the option, such as ``resourcePacks``.
+
+        Returns:
+            str | None: The value, without the line break, or ``None`` if the option is not in the file.
+        """
+        index: int | None = self._keys.get(key)
+        if index is None:
+            return None
+        return self.lines[index].split(":", 1)[1].rstrip("\r\n")
+
+    def set(self, key: str, value: str) -> None:
+        """Sets the value of an option, adding it to the end of the file if it is missing.
+
+        Args:
+            key (str): The key of the option.
+            value (str): The new value.
+        """
+        index: int | None = self._keys.get(key)
+        if index is None:
+            if len(self.lines) > 0 and not self.lines[-1].endswith("\n"):
+                self.lines[-1] += "\n"
+            self._keys[key] = len(self.lines)
+            self.changed.add(len(self.lines))
+            self.lines.append(f"{key}:{value}\n")
+            return
+        new_line: str = self._replace_value(index, value)
+        if new_line != self.lines[index]:
+            self.lines[index] = new_line
+            self.changed.add(index)
+
+    def _replace_value(self, index: int, value: str) -> str:
+        line: str = self.lines[index]
+        line_break: str = line[len(line.rstrip("\r\n")):] or "\n"
+        return f"{line.split(':', 1)[0]}:{value}{line_break}"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def render(self, keys: Iterable[str] | None = None, values: dict[str, str] | None = None) -> str:
+        """Renders the file as text.
+
+        Args:
+            keys (Iterable[str] | None, optional): Only renders the lines of these options, in the order of the file.
+                Defaults to None, which renders every line.
+            values (dict[str, str] | None, optional): Values that replace the ones of the file while rendering,
+                without changing the model. Options that are not in the file are left out. Defaults to None.
+
+        Returns:
+            str: The text of the file.
+        """
+        indices: Iterable[int]
+        if keys is None:
+            indices = range(len(self.lines))
+        else:
+            indices = sorted(self._keys[key] for key in keys if key in self._keys)
+        replaced: dict[int, str] = {}
+        if values is not None:
+            replaced = {self._keys[key]: value for key, value in values.items() if key in self._keys}
+        if len(replaced) == 0 and keys is None:
+            return "".join(self.lines)
+        return "".join(
+            self._replace_value(index, replaced[index]) if index in replaced else self.lines[index]
+            for index in indices
+        )
+
+    def save(self, fsync: bool = False) -> bool:
+        """Writes the file back to disk if its content changed, replacing it atomically.
+
+        The new content is rendered in memory and its hash is compared with the one of the file on disk, so setting
+        an option to the value it already has does not rewrite the file or change its modification time.
+
+        Args:
+            fsync (bool, optional): Whether to flush the new file and its folder to disk before returning, so the
+                change survives a power loss. Defaults to False.
+
+        Returns:
+            bool: Returns ``True`` if the file was written, or ``False`` if its content did not change.
+        """
+        if len(self.changed) == 0:
+            return False
+        content: bytes = self.render().encode("utf8")
+        if self.path.exists() and _file_digest(self.path) == hashlib.sha256(content).digest():
+            self.changed.clear()
+            return False
+        with tempfile.NamedTemporaryFile(
+            mode="wb", suffix=".txt", prefix=".", dir=self.path.parent, delete=False
+        ) as options_target:
+            try:
+                options_target.write(content)
+                if fsync:
+                    options_target.flush()
+                    os.fsync(options_target.fileno())
+            except BaseException:
+                options_target.close()
+                os.remove(options_target.name)
+                raise
+        os.replace(options_target.name, self.path)
+        if fsync:
+            _fsync_dir(self.path.parent)
+        self.changed.clear()
+        return True
+
+    def __repr__(self) -> str:
+        return f"{self.path} ({len(self.lines)} lines, {len(self.changed)} changed)"
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+"""A module containing the asset override resolution of the enabled resourcepacks of an instance.
+
+Minecraft loads every asset from the highest priority enabled resourcepack that contains it, which is the last
+one in the ``resourcePacks`` list of ``options.txt``. The asset paths of every enabled pack are read from the asset
+index and sorted once, then merged with a k-way merge, so every path is visited once across all packs and the
+pack that wins it comes first among the packs that contain it.
+"""
+
+import heapq
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Generator, Iterator
+
+from .asset_index import AssetIndex, AssetOwner
+from .logger import pprint
+from .query_builder import QueryBuilder
+from .query_output import QueryWriter
+from .resourcepack import ResourcePack
+
+
+ASSETS_PREFIX: str = "assets/"
+
+
+class AssetOverride:
+    """An asset path, the resourcepack it is loaded from, and the enabled packs it overrides."""
+
+    def __init__(self, path: str, winner: Path, shadowed: list[Path]) -> None:
+        self.path: str = path
+        self.winner: Path = winner
+        self.shadowed: list[Path] = shadowed
+
+    def to_dict(self) -> dict[str, Any]:
+        """Converts the override into a dictionary that can be serialized as JSON.
+
+        Returns:
+            dict[str, Any]: The path, the winning pack and the shadowed packs, as strings.
+        """
+        return {"path": self.path, "winner": str(self.winner), "shadowed": [str(pack) for pack in self.shadowed]}
+
+    def __repr__(self) -> str:
+        return f"{self.path} -> {self.winner.name} ({len(self.shadowed)} shadowed)"
+
+
+class PackLayer:
+    """A single enabled resourcepack in the pack stack, with its sorted asset paths."""
+
+    def __init__(self, pack: Path, priority: int, paths: list[str]) -> None:
+        self.pack: Path = pack
+        self.priority: int = priority
+        self.paths: list[str] = paths
+
+    def __repr__(self) -> str:
+        return f"{self.priority}: {self.pack} ({len(self.paths)} assets)"
+
+
+def pack_stack(enabled: list[ResourcePack], owners: list[AssetOwner]) -> list[tuple[int, AssetOwner]]:
+    """Pairs the enabled resourcepacks with their owners in the asset index, in the order of ``options.txt``.
+
+    Built-in packs, such as ``vanilla``, are not in the index and are left out, as are packs that are missing.
+
+    Args:
+        enabled (list[ResourcePack]): The enabled resourcepacks, as read by ``read_from_options``.
+        owners (list[AssetOwner]): The owners in the ``resourcepacks`` folder, as returned by ``AssetIndex.refresh``.
+
+    Returns:
+        list[tuple[int, AssetOwner]]: The priority and owner of every enabled pack, where a higher priority wins.
+    """
+    by_name: dict[str, AssetOwner] = {owner.path.name: owner for owner in owners}
+    stack: list[tuple[int, AssetOwner]] = []
+    for priority, pack in enumerate(enabled):
+        if not pack.config_string.startswith("file/"):
+            continue
+        owner: AssetOwner | None = by_name.get(pack.resourcepack_file.name)
+        if owner is None:
+            pprint(f"Enabled resourcepack {pack.config_string} was not found.", level="warn")
+            continue
+        stack.append((priority, owner))
+    return stack
+
+
+def load_layers(asset_index: AssetIndex, stack: list[tuple[int, AssetOwner]]) -> list[PackLayer]:
+    """Reads and sorts the asset paths of every pack of the stack from the asset index.
+
+    Args:
+        asset_index (AssetIndex): The refreshed asset index.
+        stack (list[tuple[int, AssetOwner]]): The priority and owner of every enabled pack, from ``pack_stack``.
+
+    Returns:
+        list[PackLayer]: The layers, in the same order as the stack.
+    """
+    layers: list[PackLayer] = []
+    for priority, owner in stack:
+        paths: list[str] = [path for path in asset_index.file_paths(owner) if path.startswith(ASSETS_PREFIX)]
+        paths.sort()
+        layers.append(PackLayer(owner.path, priority, paths))
+    return layers
+
+
+def _layer_keys(layer: PackLayer) -> Iterator[tuple[str, int, Path]]:
+    # NOTE: The priority is negated so the highest priority pack comes first among the packs sharing a path.
+    priority: int = -layer.priority
+    pack: Path = layer.pack
+    return ((path, priority, pack) for path in layer.paths)
+
+
+def resolve_overrides(layers: list[PackLayer]) -> Generator[AssetOverride, Any, None]:
+    """Resolves which pack every asset path is loaded from, with a k-way merge of the sorted paths of every layer.
+
+    Args:
+        layers (list[PackLayer]): The layers of the pack stack.
+
+    Yields:
+        Generator[AssetOverride, Any, None]: The override of every asset path of any enabled pack, sorted by path.
+    """
+    merged: Iterator[tuple[str, int, Path]] = heapq.merge(*(_layer_keys(layer) for layer in layers))
+    for path, group in groupby(merged, key=lambda key: key[0]):
+        packs: list[Path] = []
+        last_priority: int = 1
+        for _, priority, pack in group:
+            # NOTE: An archive may hold the same path twice, which must not shadow itself.
+            if priority != last_priority:
+                packs.append(pack)
+                last_priority = priority
+        yield AssetOverride(path, packs[0], packs[1:])
+
+
+def query_overrides(
+    asset_index: AssetIndex,
+    owners: list[AssetOwner],
+    enabled: list[ResourcePack],
+    query_builder: QueryBuilder,
+    writer: QueryWriter,
+    limit: int | None = None,
+) -> None:
+    """Writes the pack every asset path that matches a query is loaded from, and the packs it overrides.
+
+    Args:
+        asset_index (AssetIndex): The refreshed asset index.
+        owners (list[AssetOwner]): The owners in the ``resourcepacks`` folder, as returned by ``AssetIndex.refresh``.
+        enabled (list[ResourcePack]): The enabled resourcepacks, as read by ``read_from_options``.
+        query_builder (QueryBuilder): The query to match asset paths against.
+        writer (QueryWriter): Writes the overrides.
+        limit (int | None, optional): Stops after this many asset paths. Defaults to None.
+    """
+    layers: list[PackLayer] = load_layers(asset_index, pack_stack(enabled, owners))
+    for override in resolve_overrides(layers):
+        if limit is not None and writer.count >= limit:
+            return
+        if query_builder.matches(override.path):
+            writer.write_override(override)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""A module containing the persistent on-disk index of parsed ``pack.mcmeta`` data."""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from .pack_mcmeta import PackMcMeta
+
+
+_SCHEMA_VERSION: int = 1
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS packs (
+    path        TEXT    PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    has_mcmeta  INTEGER NOT NULL,
+    pack_format INTEGER NOT NULL,
+    description TEXT    NOT NULL,
+    is_valid    INTEGER NOT NULL
+)
+"""
+
+
+class PackIndexEntry:
+    """A single row of the pack index, keyed by the path, size and modification time of a pack."""
+
+    def __init__(self, path: Path, size: int, mtime_ns: int, mcmeta: PackMcMeta | None) -> None:
+        self.path: Path = path
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.mcmeta: PackMcMeta | None = mcmeta
+
+    def is_current(self, size: int, mtime_ns: int) -> bool:
+        """Checks if this entry still describes a pack with the given size and modification time.
+
+        Args:
+            size (int): The current size of the pack on disk.
+            mtime_ns (int): The current modification time of the pack on disk, in nanoseconds.
+
+        Returns:
+            bool: Returns ``True`` if the pack has not changed since it was indexed.
+        """
+        return self.size == size and self.mtime_ns == mtime_ns
+
+
+def pack_stat_key(path: Path) -> tuple[int, int] | None:
+    """Gets the size and modification time used to detect changes to a pack.
+
+    For directory packs the ``pack.mcmeta`` file itself is used, since editing it does not update the
+    modification time of the directory.
+
+    Args:
+        path (Path): The path to a zipped or directory resourcepack.
+
+    Returns:
+        tuple[int, int] | None: The size and modification time in nanoseconds, or ``None`` if the pack is gone.
+    """
+    try:
+        stat: os.stat_result = os.stat(path)
+        if path.is_dir():
+            stat = os.stat(Path(path, "pack.mcmeta"))
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class PackIndex:
+    """A persistent SQLite index of parsed ``pack.mcmeta`` data, so unchanged packs are never re-read."""
+
+    def __init__(self, index_file: Path, rebuild: bool = False) -> None:
+        self.index_file: Path = index_file
+        self._entries: dict[str, PackIndexEntry] = {}
+        self._dirty: dict[str, PackIndexEntry] = {}
+        self._seen: set[str] = set()
+        if not rebuild:
+            self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        connection: sqlite3.Connection = sqlite3.connect(self.index_file)
+        connection.execute(_SCHEMA)
+        return connection
+
+    def _load(self) -> None:
+        if not self.index_file.exists():
+            return
+        try:
+            connection: sqlite3.Connection = self._connect()
+        except sqlite3.Error:
+            return
+        try:
+            version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                return
+            rows: list[Any] = connection.execute(
+                "SELECT path, size, mtime_ns, has_mcmeta, pack_format, description, is_valid FROM packs"
+            ).fetchall()
+        except sqlite3.Error:
+            return
+        finally:
+            connection.close()
+        for path, size, mtime_ns, has_mcmeta, pack_format, description, is_valid in rows:
+            mcmeta: PackMcMeta | None = None
+            if has_mcmeta:
+                mcmeta = PackMcMeta.from_fields(pack_format, description, bool(is_valid))
+            self._entries[path] = PackIndexEntry(Path(path), size, mtime_ns, mcmeta)
+
+    def lookup(self, path: Path, stat_key: tuple[int, int] | None = None) -> tuple[bool, PackMcMeta | None]:
+        """Looks up the cached ``pack.mcmeta`` data of a pack, if the pack has not changed on disk.
+
+        Args:
+            path (Path): The path to a zipped or directory resourcepack.
+            stat_key (tuple[int, int] | None, optional): The size and modification time of the pack, if already
+                known. Defaults to None.
+
+        Returns:
+            tuple[bool, PackMcMeta | None]: Whether the entry was current, and the cached data if it was.
+        """
+        key: str = str(path)
+        self._seen.add(key)
+        entry: PackIndexEntry | None = self._entries.get(key)
+        if entry is None:
+            return (False, None)
+        if stat_key is None:
+            stat_key = pack_stat_key(path)
+        if stat_key is None or not entry.is_current(*stat_key):
+            return (False, None)
+        return (True, entry.mcmeta)
+
+    def update(self, path: Path, mcmeta: PackMcMeta | None) -> None:
+        """Records freshly read ``pack.mcmeta`` data of a pack.
+
+        Args:
+            path (Path): The path to a zipped or directory resourcepack.
+            mcmeta (PackMcMeta | None): The parsed data, or ``None`` if the path is not a resourcepack.
+        """
+        key: str = str(path)
+        self._seen.add(key)
+        stat_key: tuple[int, int] | None = pack_stat_key(path)
+        if stat_key is None:
+            return
+        entry: PackIndexEntry = PackIndexEntry(path, stat_key[0], stat_key[1], mcmeta)
+        self._entries[key] = entry
+        self._dirty[key] = entry
+
+    def save(self, folder: Path | None = None) -> None:
+        """Writes changed entries to disk and drops entries for packs that were not seen during this run.
+
+        The index file may be shared by the resourcepacks folders of several instances, so only the entries of the
+        folder that was scanned are dropped.
+
+        Args:
+            folder (Path | None, optional): The resourcepacks folder that was scanned during this run. Defaults to
+                None, which drops every entry that was not seen.
+        """
+        root: str = os.path.join(folder, "") if folder is not None else ""
+        stale: list[str] = [key for key in self._entries if key not in self._seen and key.startswith(root)]
+        if len(self._dirty) == 0 and len(stale) == 0 and self.index_file.exists():
+            return
+        connection: sqlite3.Connection = self._connect()
+        try:
+            with connection:
+                version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != _SCHEMA_VERSION:
+                    connection.execute("DELETE FROM packs")
+                    connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                connection.executemany("DELETE FROM packs WHERE path = ?", [(key,) for key in stale])
+                connection.executemany(
+                    "INSERT OR REPLACE INTO packs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            key,
+                            entry.size,
+                            entry.mtime_ns,
+                            entry.mcmeta is not None,
+                            entry.mcmeta.pack_format if entry.mcmeta is not None else -1,
+                            entry.mcmeta.description if entry.mcmeta is not None else "",
+                            entry.mcmeta.is_valid if entry.mcmeta is not None else False,
+                        )
+                        for key, entry in self._dirty.items()
+                    ],
+                )
+        finally:
+            connection.close()
+        for key in stale:
+            del self._entries[key]
+        self._dirty.clear()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""A module containing the reader and writer of the resourcepack lists of ``options.txt``.
+
+Minecraft writes ``resourcePacks`` and ``incompatibleResourcePacks`` with Gson, as a JSON list of strings where
+some characters of the pack names are written as ``\\uXXXX`` escapes. The list is read with a single pass over the
+value, and the escapes of a string are only decoded when it has any. Strings are escaped with a single
+``str.translate`` over a translation table, instead of a chain of replaces.
+"""
+
+import re
+from re import Match, Pattern
+from typing import Iterable
+
+
+CONFIG_ESCAPES: dict[int, str] = {
+    ord(character): f"\\u{ord(character):04x}" for character in "!\"#$%&'()§"
+}
+"""The characters of pack names that are escaped in the ``raw_config_string`` of a resourcepack."""
+
+_CONFIG_UNESCAPES: dict[str, str] = {escape: chr(character) for character, escape in CONFIG_ESCAPES.items()}
+
+_CONFIG_UNESCAPE_REGEX: Pattern[str] = re.compile("|".join(re.escape(escape) for escape in _CONFIG_UNESCAPES))
+
+_JSON_ESCAPES: dict[int, str] = {index: f"\\u{index:04x}" for index in range(0x20)} | {
+    ord("\b"): "\\b",
+    ord("\f"): "\\f",
+    ord("\n"): "\\n",
+    ord("\r"): "\\r",
+    ord("\t"): "\\t",
+    ord('"'): '\\"',
+    ord("\\"): "\\\\",
+}
+
+_GSON_ESCAPES: dict[int, str] = _JSON_ESCAPES | CONFIG_ESCAPES
+
+_JSON_UNESCAPES: dict[str, str] = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+_STRING_ESCAPE_REGEX: Pattern[str] = re.compile(r"\\(?:u([0-9a-fA-F]{4})|(.))", re.DOTALL)
+
+_SURROGATE_REGEX: Pattern[str] = re.compile("[\ud800-\udfff]")
+
+_ITEM_REGEX: Pattern[str] = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*(,|$)', re.DOTALL)
+
+
+def escape_config(value: str) -> str:
+    """Escapes the characters of a pack name that are written as ``\\uXXXX`` in its ``raw_config_string``.
+
+    Args:
+        value (str): The pack name or config string.
+
+    Returns:
+        str: The escaped string.
+    """
+    return value.translate(CONFIG_ESCAPES)
+
+
+def unescape_config(value: str) -> str:
+    """Un-escapes the ``\\uXXXX`` escapes written by ``escape_config``, and no others.
+
+    Args:
+        value (str): The escaped pack name or config string.
+
+    Returns:
+        str: The un-escaped string.
+    """
+    if "\\" not in value:
+        return value
+    return _CONFIG_UNESCAPE_REGEX.sub(lambda match: _CONFIG_UNESCAPES[match.group(0)], value)
+
+
+def _unescape_match(match: Match[str]) -> str:
+    if match.group(1) is not None:
+        return chr(int(match.group(1), 16))
+    return _JSON_UNESCAPES.get(match.group(2), match.group(2))
+
+
+def _decode_string(value: str) -> str:
+    if "\\" not in value:
+        return value
+    decoded: str = _STRING_ESCAPE_REGEX.sub(_unescape_match, value)
+    if _SURROGATE_REGEX.search(decoded) is not None:
+        # NOTE: Characters outside of the basic plane are written as a pair of ``\uXXXX`` surrogates.
+        decoded = decoded.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+    return decoded
+
+
+def parse_pack_list(value: str) -> list[str]:
+    """Reads a resourcepack list written by Gson, such as the value of ``resourcePacks``.
+
+    Args:
+        value (str): The JSON list of strings.
+
+    Raises:
+        ValueError: If the value is not a JSON list of strings.
+
+    Returns:
+        list[str]: The entries of the list, with every escape decoded.
+    """
+    text: str = value.strip()
+    if len(text) < 2 or text[0] != "[" or text[-1] != "]":
+        raise ValueError(f"The resourcepack list {value} is not a JSON list.")
+    end: int = len(text) - 1
+    packs: list[str] = []
+    position: int = 1
+    while True:
+        match: Match[str] | None = _ITEM_REGEX.match(text, position, end)
+        if match is None:
+            # NOTE: Gson reads lists leniently, so an empty list and a trailing comma are both accepted.
+            if text[position:end].strip() == "":
+                return packs
+            raise ValueError(f"The resourcepack list {value} is not a JSON list of strings.")
+        packs.append(_decode_string(match.group(1)))
+        if match.group(2) == "":
+            return packs
+        position = match.end()
+
+
+def format_pack_list(packs: Iterable[str], raw: bool = True) -> str:
+    """Writes a resourcepack list the same way Gson does.
+
+    Args:
+        packs (Iterable[str]): The un-escaped entries of the list, such as the ``config_string`` of resourcepacks.
+        raw (bool, optional): Whether to escape the characters ``escape_config`` does, as Minecraft writes them, or
+            only what JSON requires. Defaults to True.
+
+    Returns:
+        str: The JSON list of strings.
+    """
+    table: dict[int, str] = _GSON_ESCAPES if raw else _JSON_ESCAPES
+    return "[" + ",".join(f'"{pack.translate(table)}"' for pack in packs) + "]"
@@ -50,6 +50,24 @@ class PackMcMeta:
                 self.description = pack["description"]
                 self.is_valid |= True
 
+    @staticmethod
+    def from_fields(pack_format: int, description: str, is_valid: bool) -> "PackMcMeta":
+        """Creates the data of a ``pack.mcmeta`` file from already parsed fields.
+
+        Args:
+            pack_format (int): The format number of the pack, or ``-1`` if it was not valid.
+            description (str): The description of the pack.
+            is_valid (bool): Whether the ``pack.mcmeta`` file had any valid fields.
+
+        Returns:
+            PackMcMeta: The data of the ``pack.mcmeta`` file.
+        """
+        output: PackMcMeta = PackMcMeta({})
+        output.pack_format = pack_format
+        output.description = description
+        output.is_valid = is_valid
+        return output
+
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, PackMcMeta):
             return False
@@ -1,77 +1,194 @@
 #!/usr/bin/env python3
 # coding=utf8
 
-# TODO: Add module summary.
-"""_summary_"""
+"""A module containing the query engine of ``mc-resourcepacks-query``.
+
+Archives and directory resourcepacks are scanned concurrently on a worker pool. The matches of every owner are
+collected by its worker and printed by the caller in the order the owners were found, so the output is the same
+whichever worker finishes first. An owner that cannot be scanned is reported at the end instead of stopping the run.
+
+With a limit, every owner stops scanning once it has found that many matches, since no owner can contribute more
+than the limit to the output. As soon as the limit is reached overall, the owners that were not started yet are
+cancelled, and the owners being scanned on a thread pool stop at their next entry.
+"""
 
 import os
 import re
+import threading
+import zlib
+from functools import partial
 from re import Match
-from zipfile import ZipFile
+from zipfile import BadZipFile, ZipFile
 from pathlib import Path
+from typing import Any, Callable, Generator, Iterable, Literal
 
-from .logger import print_found_query_bool, print_found_query, quit_with_error
+from .logger import pprint, print_found_content, print_found_query_bool, print_found_query
 from .query_builder import QueryBuilder
 from .utils import decode_bytes
-from .dir_file_utils import walk_and_talk, walk_level
+from .dir_file_utils import walk_level
+from .asset_index import AssetEntry, AssetIndex, AssetOwner
+from .extensions.zip_reader import ZIP_STORED, ZipDirectory, ZipDirectoryError, ZipEntry
+from .concurrency import PoolKind, ordered_map
+from .content_search import ContentMatch, ContentSearch
+from .query_output import QueryWriter
 from .constants import command_regex
 
 
-def query_when_or_not_regex(
+class QueryMatch:
+    """A single path found by a query, or a single emissive suffix that was tested by it."""
+
+    def __init__(
+        self,
+        owner: Path | str,
+        path: Path | str,
+        compressed: bool,
+        test: bool | None = None,
+        queries: list[str] | None = None,
+        content: ContentMatch | None = None,
+    ) -> None:
+        self.owner: Path | str = owner
+        self.path: Path | str = path
+        self.compressed: bool = compressed
+        self.test: bool | None = test
+        self.queries: list[str] | None = queries
+        self.content: ContentMatch | None = content
+
+    def print(self) -> None:
+        """Prints the match to the console, tagged with the queries it matched when more than one was given."""
+        if self.content is not None:
+            print_found_content(self.owner, self.path, self.content.line_number, self.content.line)
+        elif self.test is None:
+            print_found_query(self.owner, self.path, self.compressed, False, self.queries)
+        else:
+            print_found_query_bool(self.owner, self.path, self.test, self.compressed, False)
+
+    def __repr__(self) -> str:
+        if self.content is not None:
+            return f"{self.owner} -> {self.path}:{self.content.line_number}: {self.content.line}"
+        return f"{self.owner} -> {self.path}"
+
+
+class QueryResult:
+    """The matches found inside of a single archive or directory resourcepack, or the error that stopped it."""
+
+    def __init__(self, owner: Path, matches: list[QueryMatch], error: str | None = None) -> None:
+        self.owner: Path = owner
+        self.matches: list[QueryMatch] = matches
+        self.error: str | None = error
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"{self.owner}: {self.error}"
+        return f"{self.owner}: {len(self.matches)} matches"
+
+
+QueryTaskKind = Literal["archive", "directory"]
+
+NESTED_ARCHIVE_SUFFIXES: tuple[str, ...] = (".jar",)
+
+NESTED_SEPARATOR: str = "!/"
+
+# NOTE: ``zipfile`` raises ``RuntimeError`` for encrypted members, and ``NotImplementedError`` for compression methods
+#       it does not support.
+_ZIPFILE_MEMBER_ERRORS: tuple[type[Exception], ...] = (zlib.error, BadZipFile, NotImplementedError, RuntimeError)
+
+_ARCHIVE_MEMBER_ERRORS: tuple[type[Exception], ...] = (ZipDirectoryError, *_ZIPFILE_MEMBER_ERRORS)
+
+QueryTask = tuple[QueryTaskKind, Path, QueryBuilder, int | None, threading.Event | None]
+
+
+def _is_done(matches: list[QueryMatch], limit: int | None, cancel: threading.Event | None) -> bool:
+    return limit is not None and len(matches) >= limit or cancel is not None and cancel.is_set()
+
+
+def match_path(
     leaf: Path | str,
     branch: Path | str,
     trunk: Path | str,
     query_builder: QueryBuilder,
     compressed: bool = False,
-) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+) -> QueryMatch | None:
+    """Matches the path of a single file against the queries.
 
     Args:
-        leaf (Path | str): _description_
-        branch (Path | str): _description_
-        trunk (Path | str): _description_
-        query_builder (QueryBuilder): _description_
-        compressed (bool, optional): _description_. Defaults to False.
+        leaf (Path | str): The archive or directory resourcepack the file is in.
+        branch (Path | str): The full path of a file of a directory, or the name of an entry of an archive.
+        trunk (Path | str): The path printed for the file when it is inside of an archive.
+        query_builder (QueryBuilder): The query to match the path against.
+        compressed (bool, optional): Whether the file is inside of an archive. Defaults to False.
+
+    Returns:
+        QueryMatch | None: The match, tagged with the queries it matched when more than one was given, or ``None``
+            if the path does not match.
     """
+    resource_pack_item: str | None = Path(leaf).parts[-1] if query_builder.enabled else None
+    queries: list[str] | None = None
     if compressed is False and isinstance(branch, Path):
-        if query_builder.test(
-            branch.as_posix(), resource_pack_item=Path(leaf).parts[-1]
-        ):
-            trunk = (
-                str(branch).replace(str(leaf), "").removeprefix("/").removeprefix("\\")
-            )
-            print_found_query(leaf, trunk, compressed, False)
-    else:
-        if query_builder.test(str(branch), resource_pack_item=Path(leaf).parts[-1]):
-            if compressed is False:
-                trunk = (
-                    str(branch)
-                    .replace(str(leaf), "")
-                    .removeprefix("/")
-                    .removeprefix("\\")
-                )
-            print_found_query(leaf, trunk, compressed, False)
-
-
-def test_match_of_opened_file(
+        if query_builder.is_multi:
+            queries = query_builder.test_queries(branch.as_posix(), resource_pack_item)
+            if len(queries) == 0:
+                return None
+        elif not query_builder.test(branch.as_posix(), resource_pack_item):
+            return None
+        trunk = (
+            str(branch).replace(str(leaf), "").removeprefix("/").removeprefix("\\")
+        )
+        return QueryMatch(leaf, trunk, compressed, queries=queries)
+    if query_builder.is_multi:
+        queries = query_builder.test_queries(str(branch), resource_pack_item)
+        if len(queries) == 0:
+            return None
+    elif not query_builder.test(str(branch), resource_pack_item):
+        return None
+    if compressed is False:
+        trunk = (
+            str(branch)
+            .replace(str(leaf), "")
+            .removeprefix("/")
+            .removeprefix("\\")
+        )
+    return QueryMatch(leaf, trunk, compressed, queries=queries)
+
+
+def match_directory(leaf: Path | str, directory: Path, query_builder: QueryBuilder) -> QueryMatch | None:
+    """Matches the full path of a folder inside of a directory resourcepack against the queries.
+
+    Args:
+        leaf (Path | str): The directory resourcepack the folder is in.
+        directory (Path): The full path of the folder.
+        query_builder (QueryBuilder): The queries to match the path against.
+
+    Returns:
+        QueryMatch | None: The match, or ``None`` if the path does not match.
+    """
+    if query_builder.is_multi:
+        queries: list[str] = query_builder.matched_queries(str(directory))
+        if len(queries) == 0:
+            return None
+        return QueryMatch(leaf, str(directory), False, queries=queries)
+    if not query_builder.matches(str(directory)):
+        return None
+    return QueryMatch(leaf, str(directory), False)
+
+
+def match_opened_file_line(
     directory: Path | str,
     file: Path | str,
     line: str,
     query_builder: QueryBuilder,
     compressed: bool = False,
-) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+) -> QueryMatch | None:
+    """Tests a single line of a file for an emissive suffix, and whether it is the queried suffix.
 
     Args:
-        directory (Path | str): _description_
-        file (Path | str): _description_
-        line (str): _description_
-        query_builder (QueryBuilder): _description_
-        compressed (bool, optional): _description_. Defaults to False.
+        directory (Path | str): The archive or directory resourcepack the file is in.
+        file (Path | str): The file the line was read from.
+        line (str): The line of the file.
+        query_builder (QueryBuilder): The query holding the emissive suffix.
+        compressed (bool, optional): Whether the file is inside of an archive. Defaults to False.
+
+    Returns:
+        QueryMatch | None: The tested suffix, or ``None`` if the line does not set an emissive suffix.
     """
     matches: Match[str] | None = re.search(command_regex, line)
     if matches is not None:
@@ -83,138 +200,455 @@ def test_match_of_opened_file(
                 .removeprefix("\\")
             )
         test: bool = matches.groups()[0] == query_builder.query
-        print_found_query_bool(directory, file, test, compressed, False)
+        return QueryMatch(directory, file, compressed, test)
+    return None
+
+
+def _match_file_content(
+    directory: Path | str,
+    file: Path | str,
+    data: bytes,
+    query_builder: QueryBuilder,
+    matches: list[QueryMatch],
+    compressed: bool = False,
+) -> None:
+    decoded: str | None = decode_bytes(data)
+    if decoded is None:
+        return
+    for line in decoded.splitlines(False):
+        match: QueryMatch | None = match_opened_file_line(directory, file, line, query_builder, compressed)
+        if match is not None:
+            matches.append(match)
 
 
-def iterate_dir_ext(
-    path: Path, directories: list[str], query_builder: QueryBuilder
+def _match_archive_member(
+    file: Path,
+    name: str,
+    read: Callable[[], bytes],
+    search: Callable[[ContentSearch], list[ContentMatch]],
+    query_builder: QueryBuilder,
+    matches: list[QueryMatch],
+    display: str | None = None,
 ) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    _display: str = display if display is not None else name
+    if query_builder.content is not None:
+        if not name.endswith("/") and match_path(file, name, _display, query_builder, compressed=True) is not None:
+            for content_match in search(query_builder.content):
+                matches.append(QueryMatch(file, _display, True, content=content_match))
+        return
+    if query_builder.is_emissive_check:
+        if query_builder.patch in name and not name.endswith("/"):
+            data: bytes
+            try:
+                data = read()
+            except _ARCHIVE_MEMBER_ERRORS:
+                # NOTE: A member that cannot be read, such as an encrypted one, is skipped instead of the archive.
+                return
+            _match_file_content(file, _display, data, query_builder, matches, compressed=True)
+        return
+    match: QueryMatch | None = match_path(file, name, _display, query_builder, compressed=True)
+    if match is not None:
+        matches.append(match)
+
+
+def _is_nested_archive(name: str) -> bool:
+    return name.lower().endswith(NESTED_ARCHIVE_SUFFIXES)
+
+
+def _open_nested(zip_directory: ZipDirectory, entry: ZipEntry) -> ZipDirectory:
+    if entry.compress_type == ZIP_STORED and not entry.is_encrypted:
+        # NOTE: A stored jar is a window of the outer archive, so it is read in place without a copy.
+        start: int = zip_directory.data_offset(entry)
+        return ZipDirectory(zip_directory.buffer, start, start + entry.compress_size)
+    return ZipDirectory(zip_directory.read(entry))
+
+
+def _scan_zip_directory(
+    file: Path,
+    zip_directory: ZipDirectory,
+    query_builder: QueryBuilder,
+    matches: list[QueryMatch],
+    limit: int | None,
+    cancel: threading.Event | None,
+    prefix: str = "",
+    depth: int = 0,
+) -> None:
+    for entry in zip_directory.entries():
+        _match_archive_member(
+            file,
+            entry.name,
+            partial(zip_directory.read, entry),
+            partial(ContentSearch.search_entry, zip_directory=zip_directory, entry=entry),
+            query_builder,
+            matches,
+            prefix + entry.name,
+        )
+        if _is_done(matches, limit, cancel):
+            return
+        if depth < query_builder.nested_depth and not entry.is_dir and _is_nested_archive(entry.name):
+            _scan_nested(file, zip_directory, entry, query_builder, matches, limit, cancel, prefix, depth)
+            if _is_done(matches, limit, cancel):
+                return
+
+
+def _scan_nested(
+    file: Path,
+    zip_directory: ZipDirectory,
+    entry: ZipEntry,
+    query_builder: QueryBuilder,
+    matches: list[QueryMatch],
+    limit: int | None,
+    cancel: threading.Event | None,
+    prefix: str,
+    depth: int,
+) -> None:
+    found: int = len(matches)
+    try:
+        nested: ZipDirectory = _open_nested(zip_directory, entry)
+        nested_prefix: str = f"{prefix}{entry.name}{NESTED_SEPARATOR}"
+        _scan_zip_directory(file, nested, query_builder, matches, limit, cancel, nested_prefix, depth + 1)
+    except (ZipDirectoryError, zlib.error):
+        # NOTE: A nested jar that cannot be read, or that holds a member that cannot be read, is left out as a whole,
+        #       so it never discards the matches of the archive it is in. A member named like a jar that is not one
+        #       is still matched as a file, it just has no entries.
+        del matches[found:]
+
+
+def scan_archive(
+    file: Path, query_builder: QueryBuilder, limit: int | None = None, cancel: threading.Event | None = None
+) -> list[QueryMatch]:
+    """Matches every entry of a zipped resourcepack or mod against a query.
+
+    The archive is read through its central directory, and falls back to ``zipfile`` when it cannot be. When
+    searching contents, the members whose path matches are inflated a chunk at a time.
+
+    Jars nested inside of the archive, such as the libraries in ``META-INF/jars``, are scanned as well up to the
+    nested depth of the query, without extracting them to disk. A stored jar is read in place, and a compressed one
+    is inflated into memory. The entries of a nested jar are matched by their path inside of it, and are printed
+    with the full nested path, such as ``META-INF/jars/library.jar!/assets/library/icon.png``.
+
+    Args:
+        file (Path): The path to the archive.
+        query_builder (QueryBuilder): The query to match the entries against.
+        limit (int | None, optional): Stops after this many matches. Defaults to None.
+        cancel (threading.Event | None, optional): Stops at the next entry once it is set. Defaults to None.
+
+    Returns:
+        list[QueryMatch]: The matches, in the order of the entries of the archive, each nested jar right after it.
+    """
+    matches: list[QueryMatch] = []
+    try:
+        with ZipDirectory.open(file) as zip_directory:
+            _scan_zip_directory(file, zip_directory, query_builder, matches, limit, cancel)
+        return matches
+    except ZipDirectoryError:
+        matches.clear()
+    with ZipFile(file, mode="r", allowZip64=True) as zipped_file:
+        for compressed_file in zipped_file.namelist():
+            _match_archive_member(
+                file,
+                compressed_file,
+                partial(zipped_file.read, compressed_file),
+                partial(_search_zipfile_member, zipped_file, compressed_file),
+                query_builder,
+                matches,
+            )
+            if _is_done(matches, limit, cancel):
+                break
+            if (
+                query_builder.nested_depth > 0
+                and not compressed_file.endswith("/")
+                and _is_nested_archive(compressed_file)
+            ):
+                _scan_zipfile_nested(file, zipped_file, compressed_file, query_builder, matches, limit, cancel)
+                if _is_done(matches, limit, cancel):
+                    break
+    return matches
+
+
+def _scan_zipfile_nested(
+    file: Path,
+    zipped_file: ZipFile,
+    name: str,
+    query_builder: QueryBuilder,
+    matches: list[QueryMatch],
+    limit: int | None,
+    cancel: threading.Event | None,
+) -> None:
+    found: int = len(matches)
+    try:
+        nested: ZipDirectory = ZipDirectory(zipped_file.read(name))
+        _scan_zip_directory(file, nested, query_builder, matches, limit, cancel, f"{name}{NESTED_SEPARATOR}", 1)
+    except _ARCHIVE_MEMBER_ERRORS:
+        # NOTE: The same as ``_scan_nested``, an unreadable nested jar is left out instead of failing the archive.
+        del matches[found:]
+
+
+def _search_zipfile_member(zipped_file: ZipFile, name: str, content: ContentSearch) -> list[ContentMatch]:
+    try:
+        with zipped_file.open(name, mode="r", force_zip64=True) as opened_file:
+            return content.search_chunks(iter(lambda: opened_file.read(64 * 1024), b""))
+    except _ZIPFILE_MEMBER_ERRORS:
+        # NOTE: The same as ``ContentSearch.search_entry``, a member that cannot be read is skipped on its own.
+        return []
+
+
+def scan_directory(
+    directory: Path, query_builder: QueryBuilder, limit: int | None = None, cancel: threading.Event | None = None
+) -> list[QueryMatch]:
+    """Matches every file and folder of a directory resourcepack against a query.
+
+    Args:
+        directory (Path): The path to the directory resourcepack.
+        query_builder (QueryBuilder): The query to match the files and folders against.
+        limit (int | None, optional): Stops after this many matches. Defaults to None.
+        cancel (threading.Event | None, optional): Stops at the next file once it is set. Defaults to None.
+
+    Returns:
+        list[QueryMatch]: The matches, in the order ``os.walk`` reports the files and folders.
+    """
+    matches: list[QueryMatch] = []
+    match: QueryMatch | None
+    for _sub_path, sub_directories, sub_files in os.walk(directory):
+        sub_path: Path = Path(_sub_path)
+        for _sub_file in sub_files:
+            if _is_done(matches, limit, cancel):
+                return matches
+            sub_file: Path = Path(_sub_file)
+            if query_builder.content is not None:
+                match = match_path(directory, Path(sub_path, sub_file), sub_file, query_builder)
+                if match is not None:
+                    for content_match in query_builder.content.search_file(Path(sub_path, sub_file)):
+                        matches.append(QueryMatch(directory, match.path, False, content=content_match))
+            elif query_builder.is_emissive_check:
+                if query_builder.patch in _sub_file:
+                    with Path(sub_path, sub_file).open(mode="rb") as opened_file:
+                        _match_file_content(directory, sub_file, opened_file.read(), query_builder, matches)
+            else:
+                match = match_path(directory, Path(sub_path, sub_file), sub_file, query_builder)
+                if match is not None:
+                    matches.append(match)
+        if query_builder.content is not None:
+            continue
+        for sub_directory in sub_directories:
+            if _is_done(matches, limit, cancel):
+                return matches
+            match = match_directory(directory, Path(sub_path, sub_directory), query_builder)
+            if match is not None:
+                matches.append(match)
+    return matches
+
+
+def query_task(task: QueryTask) -> QueryResult:
+    """Scans a single archive or directory resourcepack, catching any error so it does not stop the other scans.
+
+    This is a module level function so it can be sent to a process pool.
+
+    Args:
+        task (QueryTask): The kind of owner, its path, the query, the limit of matches and the cancel event, which
+            is ``None`` on process pools.
+
+    Returns:
+        QueryResult: The matches inside of the owner, or the error that stopped the scan.
+    """
+    kind: QueryTaskKind
+    owner: Path
+    query_builder: QueryBuilder
+    limit: int | None
+    cancel: threading.Event | None
+    kind, owner, query_builder, limit, cancel = task
+    if cancel is not None and cancel.is_set():
+        return QueryResult(owner, [])
+    try:
+        if kind == "directory":
+            return QueryResult(owner, scan_directory(owner, query_builder, limit, cancel))
+        return QueryResult(owner, scan_archive(owner, query_builder, limit, cancel))
+    # pylint: disable-next=W0718
+    except Exception as exception:
+        return QueryResult(owner, [], f"{type(exception).__name__}: {exception}")
+
+
+def find_query_owners(
+    file_exts: list[str], directories: list[Path], query_builder: QueryBuilder | None = None
+) -> list[tuple[QueryTaskKind, Path]]:
+    """Finds the archives and directory resourcepacks to query, in the order their matches are printed.
+
+    When only enabled packs are queried, every other owner is left out here, so it is never opened.
 
     Args:
-        path (str): _description_
-        directories (list[str]): _description_
-        query_builder (QueryBuilder): _description_
+        file_exts (list[str]): The suffixes of the archives to query, and ``dir`` to query directories.
+        directories (list[Path]): The folders to look in, such as ``resourcepacks`` and ``mods``.
+        query_builder (QueryBuilder | None, optional): The query holding the enabled packs. Defaults to None.
+
+    Returns:
+        list[tuple[QueryTaskKind, Path]]: The kind and path of every owner.
     """
-    for _directory in directories:
-        directory: Path = Path(path, _directory)
-        for _sub_path, sub_directories, sub_files in os.walk(directory):
-            sub_path: Path = Path(_sub_path)
-            for _sub_file in sub_files:
-                sub_file: Path = Path(_sub_file)
-                if query_builder.is_emissive_check:
-                    if query_builder.patch in _sub_file:
-                        with Path(sub_path, sub_file).open(mode="rb") as opened_file:
-                            decoded: str | None = decode_bytes(opened_file.read())
-                            if decoded is not None:
-                                for line in decoded.splitlines(False):
-                                    test_match_of_opened_file(
-                                        directory, sub_file, line, query_builder
-                                    )
+    owners: list[tuple[QueryTaskKind, Path]] = []
+    is_enabled: Callable[[str], bool] = query_builder.is_owner_enabled if query_builder is not None else lambda _: True
+    for _dir in directories:
+        for _path, sub_directories, files in walk_level(_dir, 0):
+            path: Path = Path(_path)
+            for file_ext in file_exts:
+                if file_ext == "dir":
+                    owners.extend(
+                        ("directory", Path(path, sub_directory))
+                        for sub_directory in sub_directories
+                        if is_enabled(sub_directory)
+                    )
                 else:
-                    query_when_or_not_regex(
-                        directory, Path(sub_path, sub_file), sub_file, query_builder
+                    owners.extend(
+                        ("archive", Path(path, file))
+                        for file in files
+                        if Path(file).suffix == file_ext and is_enabled(file)
                     )
-            walk_and_talk(sub_directories, sub_path, directory, query_builder)
+    return owners
 
 
-def iterate_file_ext(
-    file_ext: str,
-    path: Path,
-    files: list[str],
-    base_directory: Path,
+def run_query(
+    file_exts: list[str],
+    directories: list[Path],
     query_builder: QueryBuilder,
-) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    jobs: int | None = None,
+    pool: PoolKind = "thread",
+    limit: int | None = None,
+) -> Generator[QueryResult, Any, None]:
+    """Scans every archive and directory resourcepack concurrently, streaming the results in a stable order.
+
+    Closing the generator early cancels the scans that were not started, and stops the ones running on threads.
 
     Args:
-        file_ext (str): _description_
-        path (str): _description_
-        files (list[str]): _description_
-        base_directory (Path): _description_
-        query_builder (QueryBuilder): _description_
+        file_exts (list[str]): The suffixes of the archives to query, and ``dir`` to query directories.
+        directories (list[Path]): The folders to look in, such as ``resourcepacks`` and ``mods``.
+        query_builder (QueryBuilder): The query to match against.
+        jobs (int | None, optional): The amount of workers, or ``None`` for the default. Defaults to None.
+        pool (PoolKind, optional): The kind of pool to scan in. Defaults to "thread".
+        limit (int | None, optional): The most matches any owner is scanned for. Defaults to None.
+
+    Yields:
+        Generator[QueryResult, Any, None]: The result of every owner, in the order the owners were found.
     """
-    for _file in files:
-        file: Path = Path(path, _file)
-        try:
-            if file.suffix == file_ext and path == base_directory:
-                with ZipFile(Path(path, file), mode="r", allowZip64=True) as zipped_file:
-                    for compressed_file in zipped_file.namelist():
-                        if not os.path.isdir(compressed_file):
-                            if query_builder.is_emissive_check:
-                                if query_builder.patch in compressed_file:
-                                    with zipped_file.open(
-                                        compressed_file, mode="r", force_zip64=True
-                                    ) as opened_compressed_file:
-                                        decoded: str | None = decode_bytes(
-                                            opened_compressed_file.read()
-                                        )
-                                        if decoded is not None:
-                                            for line in decoded.splitlines(False):
-                                                test_match_of_opened_file(
-                                                    file,
-                                                    compressed_file,
-                                                    line,
-                                                    query_builder,
-                                                    compressed=True,
-                                                )
-                            else:
-                                query_when_or_not_regex(
-                                    file,
-                                    compressed_file,
-                                    compressed_file,
-                                    query_builder,
-                                    compressed=True,
-                                )
-                        else:
-                            query_when_or_not_regex(
-                                file,
-                                compressed_file,
-                                compressed_file,
-                                query_builder,
-                                compressed=True,
-                            )
-        # pylint: disable-next=W0718
-        except BaseException as base_exception:
-            quit_with_error(base_exception)
-
-
-def iterate_dir_arg(
-    file_exts: list[str], _dir: Path, query_builder: QueryBuilder
-) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    # NOTE: Events cannot be sent to a process pool, where a running scan is only bounded by the limit.
+    cancel: threading.Event | None = threading.Event() if pool == "thread" else None
+    tasks: list[QueryTask] = [
+        (kind, owner, query_builder, limit, cancel)
+        for kind, owner in find_query_owners(file_exts, directories, query_builder)
+    ]
+    results: Generator[QueryResult, None, None] = ordered_map(query_task, tasks, jobs, pool)
+    try:
+        # NOTE: Not ``yield from``, which would close the pool and wait on running scans before they are cancelled.
+        for result in results:
+            yield result
+    finally:
+        if cancel is not None:
+            cancel.set()
+        results.close()
+
+
+def print_query_errors(failed: list[QueryResult]) -> None:
+    """Prints the owners that could not be scanned.
 
     Args:
-        file_exts (list[str]): _description_
-        _dir (Path): _description_
-        query_builder (QueryBuilder): _description_
+        failed (list[QueryResult]): The results that have an error.
     """
-    for _path, directories, files in walk_level(_dir, 0):
-        path: Path = Path(_path)
-        for file_ext in file_exts:
-            if file_ext == "dir":
-                iterate_dir_ext(path, directories, query_builder)
-            else:
-                iterate_file_ext(file_ext, path, files, _dir, query_builder)
+    for result in failed:
+        pprint(f"[red]Failed[/red] to query {result.owner}: {result.error}", level="error")
+    if len(failed) > 0:
+        pprint(f"{len(failed)} archives or directories could not be queried.", level="error")
 
 
 def parse_files(
-    file_exts: list[str], directories: list[Path], query_builder: QueryBuilder
+    file_exts: list[str],
+    directories: list[Path],
+    query_builder: QueryBuilder,
+    jobs: int | None = None,
+    pool: PoolKind = "thread",
+    writer: QueryWriter | None = None,
+    limit: int | None = None,
+) -> list[QueryResult]:
+    """Queries every archive and directory resourcepack, printing the matches as the results stream in.
+
+    Args:
+        file_exts (list[str]): The suffixes of the archives to query, and ``dir`` to query directories.
+        directories (list[Path]): The folders to look in, such as ``resourcepacks`` and ``mods``.
+        query_builder (QueryBuilder): The query to match against.
+        jobs (int | None, optional): The amount of workers, or ``None`` for the default. Defaults to None.
+        pool (PoolKind, optional): The kind of pool to scan in. Defaults to "thread".
+        writer (QueryWriter | None, optional): Writes the matches. Defaults to None, which prints them with rich.
+        limit (int | None, optional): Stops and cancels the remaining scans after this many matches. Defaults to None.
+
+    Returns:
+        list[QueryResult]: The results of the owners that could not be scanned.
+    """
+    _writer: QueryWriter = writer if writer is not None else QueryWriter()
+    failed: list[QueryResult] = []
+    results: Generator[QueryResult, Any, None] = run_query(file_exts, directories, query_builder, jobs, pool, limit)
+    try:
+        for result in results:
+            if result.error is not None:
+                failed.append(result)
+            for match in result.matches:
+                if limit is not None and _writer.count >= limit:
+                    break
+                _writer.write(match)
+            if limit is not None and _writer.count >= limit:
+                break
+    finally:
+        results.close()
+    print_query_errors(failed)
+    return failed
+
+
+def iter_indexed_matches(
+    entries: Callable[[AssetOwner], Iterable[AssetEntry]], owners: list[AssetOwner], query_builder: QueryBuilder
+) -> Generator[QueryMatch, Any, None]:
+    """Matches the indexed entries of some owners against a query, the same way the owners would be scanned.
+
+    Args:
+        entries (Callable[[AssetOwner], Iterable[AssetEntry]]): Gets the entries of an owner, such as
+            ``AssetIndex.entries``, in the order they were listed.
+        owners (list[AssetOwner]): The owners to query.
+        query_builder (QueryBuilder): The query to match the paths of entries against.
+
+    Yields:
+        Generator[QueryMatch, Any, None]: The matches, in the order of the owners and of their entries.
+    """
+    entry: AssetEntry
+    match: QueryMatch | None
+    for owner in owners:
+        if owner.kind == "archive":
+            for entry in entries(owner):
+                match = match_path(owner.path, entry.path, entry.path, query_builder, compressed=True)
+                if match is not None:
+                    yield match
+            continue
+        for entry in entries(owner):
+            full_path: Path = Path(owner.path, entry.path)
+            if entry.is_dir:
+                match = match_directory(owner.path, full_path, query_builder)
+            else:
+                match = match_path(owner.path, full_path, entry.path, query_builder)
+            if match is not None:
+                yield match
+
+
+def query_asset_index(
+    asset_index: AssetIndex,
+    owners: list[AssetOwner],
+    query_builder: QueryBuilder,
+    writer: QueryWriter | None = None,
+    limit: int | None = None,
 ) -> None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    """Prints every indexed entry that matches a query, the same way ``parse_files`` does, without opening any archive.
 
     Args:
-        file_exts (list[str]): _description_
-        _dir (list[Path]): _description_
-        query_builder (QueryBuilder): _description_
+        asset_index (AssetIndex): The refreshed asset index.
+        owners (list[AssetOwner]): The owners to query, as returned by ``AssetIndex.refresh``.
+        query_builder (QueryBuilder): The query to match the paths of entries against.
+        writer (QueryWriter | None, optional): Writes the matches. Defaults to None, which prints them with rich.
+        limit (int | None, optional): Stops after this many matches. Defaults to None.
     """
-    for directory in directories:
-        iterate_dir_arg(file_exts, directory, query_builder)
+    _writer: QueryWriter = writer if writer is not None else QueryWriter()
+    for match in iter_indexed_matches(asset_index.entries, owners, query_builder):
+        if limit is not None and _writer.count >= limit:
+            return
+        _writer.write(match)
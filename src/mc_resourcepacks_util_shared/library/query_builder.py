@@ -4,62 +4,302 @@
 # TODO: Add module summary.
 """_summary_"""
 
+import importlib
 import re
+from pathlib import Path
 from re import Pattern
-from typing import Literal
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Literal
 
 from .logger import quit_with_error
 from .errors import NotValidRegexError
 
+if TYPE_CHECKING:
+    from .content_search import ContentSearch
+
+
+QueryPlanKind = Literal["prefix", "contains", "regex"]
+
+_SRE_PARSER: ModuleType | None
+_SRE_CONSTANTS: ModuleType | None
+try:
+    # NOTE: The parser of ``re`` is private, so without it every query plan falls back to the regex engine.
+    _SRE_PARSER = importlib.import_module("re._parser")
+    _SRE_CONSTANTS = importlib.import_module("re._constants")
+except ImportError:
+    _SRE_PARSER = None
+    _SRE_CONSTANTS = None
+
+
+class QueryPlan:
+    """A compiled query, which avoids the regex engine where a plain string test gives the same answer.
+
+    Queries are matched from the start of a path, like ``re.match``. A query made only of literal characters is
+    tested with ``str.startswith``, and a query made of ``.*`` followed by literal characters is tested with ``in``.
+    Any other regex keeps its literal prefix, or the literal characters after a leading ``.*``, to reject most paths
+    before the regex engine runs. When the private parser of ``re`` is missing or fails on a pattern, the query is
+    only tested with the regex engine.
+    """
+
+    def __init__(self, pattern: Pattern[str]) -> None:
+        self.pattern: Pattern[str] = pattern
+        self.kind: QueryPlanKind = "regex"
+        self.prefix: str = ""
+        self.required: str = ""
+        if pattern.flags & re.IGNORECASE or _SRE_PARSER is None or _SRE_CONSTANTS is None:
+            return
+        try:
+            self._plan(_SRE_PARSER, _SRE_CONSTANTS)
+        # pylint: disable-next=W0718
+        except Exception:
+            # NOTE: The parse tree is not a public API, so any surprise in it leaves the query to the regex engine.
+            self.kind = "regex"
+            self.prefix = ""
+            self.required = ""
+
+    def _plan(self, sre_parser: ModuleType, sre_constants: ModuleType) -> None:
+        items: list[tuple[Any, Any]] = list(sre_parser.parse(self.pattern.pattern, self.pattern.flags))
+        index: int = 0
+        if len(items) > 0 and items[0] == (sre_constants.AT, sre_constants.AT_BEGINNING):
+            index += 1
+        leading_any: bool = False
+        if index < len(items) and QueryPlan._is_any_repeat(items[index], sre_constants):
+            leading_any = True
+            index += 1
+        literal: list[str] = []
+        while index < len(items) and items[index][0] == sre_constants.LITERAL:
+            literal.append(chr(items[index][1]))
+            index += 1
+        if len(literal) == 0:
+            return
+        is_literal: bool = index == len(items)
+        if leading_any:
+            self.required = "".join(literal)
+            if is_literal:
+                self.kind = "contains"
+        else:
+            self.prefix = "".join(literal)
+            if is_literal:
+                self.kind = "prefix"
+
+    @staticmethod
+    def _is_any_repeat(item: tuple[Any, Any], sre_constants: ModuleType) -> bool:
+        operation: Any
+        value: Any
+        operation, value = item
+        if operation not in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            return False
+        minimum: int
+        maximum: int
+        minimum, maximum, sub_pattern = value
+        return (
+            minimum == 0
+            and maximum == sre_constants.MAXREPEAT
+            and list(sub_pattern) == [(sre_constants.ANY, None)]
+        )
+
+    def match(self, value: str) -> bool:
+        """Tests a path against the query, from the start of the path.
+
+        Args:
+            value (str): The path to test.
+
+        Returns:
+            bool: Returns ``True`` if the query matches, the same as ``re.match`` would.
+        """
+        if self.kind == "prefix":
+            return value.startswith(self.prefix)
+        if self.kind == "contains":
+            if self.required not in value:
+                return False
+            # NOTE: ``.`` does not match a new line, so only then is the regex engine needed.
+            return "\n" not in value or self.pattern.match(value) is not None
+        if self.prefix != "" and not value.startswith(self.prefix):
+            return False
+        if self.required != "" and self.required not in value:
+            return False
+        return self.pattern.match(value) is not None
+
+    def __repr__(self) -> str:
+        if self.kind == "regex":
+            return f"regex {self.pattern.pattern!r} (prefix {self.prefix!r}, required {self.required!r})"
+        return f"{self.kind} {(self.prefix or self.required)!r}"
+
+
+class QuerySet:
+    """Many compiled queries combined into a single matcher, so every path is tested in one pass.
+
+    Literal prefix queries are looked up in a dictionary per prefix length, literal substring queries are tested
+    with ``in``, and the remaining regexes are first tested together as a single alternation, so the regex engine
+    runs once per path unless one of them matches.
+    """
+
+    def __init__(self, plans: list[QueryPlan]) -> None:
+        self.plans: list[QueryPlan] = plans
+        prefixes: dict[int, dict[str, list[int]]] = {}
+        self._contains: list[int] = []
+        self._regexes: list[int] = []
+        self._separate: list[int] = []
+        default_flags: int = re.compile("").flags
+        for index, plan in enumerate(plans):
+            if plan.kind == "prefix":
+                prefixes.setdefault(len(plan.prefix), {}).setdefault(plan.prefix, []).append(index)
+            elif plan.kind == "contains":
+                self._contains.append(index)
+            elif plan.pattern.flags == default_flags and not _has_group_reference(plan.pattern.pattern):
+                self._regexes.append(index)
+            else:
+                self._separate.append(index)
+        self._prefixes: list[tuple[int, dict[str, list[int]]]] = sorted(prefixes.items())
+        self._combined: Pattern[str] | None = None
+        if len(self._regexes) > 1:
+            try:
+                self._combined = re.compile("|".join(f"(?:{plans[index].pattern.pattern})" for index in self._regexes))
+            except re.error:
+                self._separate.extend(self._regexes)
+                self._regexes = []
+
+    def match(self, value: str) -> list[int]:
+        """Tests a path against every query, from the start of the path.
+
+        Args:
+            value (str): The path to test.
+
+        Returns:
+            list[int]: The indices of the queries that match, in ascending order.
+        """
+        found: list[int] = []
+        for length, literals in self._prefixes:
+            indices: list[int] | None = literals.get(value[:length])
+            if indices is not None:
+                found.extend(indices)
+        for index in self._contains:
+            if self.plans[index].match(value):
+                found.append(index)
+        if len(self._regexes) > 0 and (self._combined is None or self._combined.match(value) is not None):
+            for index in self._regexes:
+                if self.plans[index].match(value):
+                    found.append(index)
+        for index in self._separate:
+            if self.plans[index].match(value):
+                found.append(index)
+        if len(found) > 1:
+            found.sort()
+        return found
+
+
+def read_patterns_file(file: Path) -> list[str]:
+    """Reads queries from a file, one per line, skipping blank lines and lines starting with ``#``.
+
+    Args:
+        file (Path): The path to the patterns file.
+
+    Returns:
+        list[str]: The queries, in the order of the file.
+    """
+    # NOTE: These are imported while not on the top level, because of import recursion.
+    # pylint: disable-next=C0415
+    from .utils import read_file_text
+
+    patterns: list[str] = []
+    for line in read_file_text(file).splitlines():
+        pattern: str = line.strip()
+        if pattern != "" and not pattern.startswith("#"):
+            patterns.append(pattern)
+    return patterns
+
+
+def _has_group_reference(pattern: str) -> bool:
+    # NOTE: Numbered and named back references would point at the wrong group inside of a combined alternation.
+    return re.search(r"\\[1-9]|\(\?P=|\(\?\(", pattern) is not None
+
 
 class QueryBuilder:
     # TODO: Add class summary.
     """_summary_"""
     query: Pattern[str]
+    plan: QueryPlan
+    queries: list[str]
+    query_set: QuerySet
+    content: "ContentSearch | None" = None
     patch: str = ""
     is_emissive_check: bool = False
-    enabled: list[str] = []
+    nested_depth: int = 0
+    enabled: frozenset[str] = frozenset()
 
     def __init__(
         self,
-        query: str,
+        query: str | list[str],
         regex: bool = False,
         parameter: Literal["emissive"] | None = None,
         enabled: list[str] | None = None,
+        content: str | None = None,
+        nested_depth: int = 0,
     ) -> None:
         # NOTE: These are imported while not on the top level, because of import recursion.
         # pylint: disable-next=C0415
         from .utils import check_if_regex_string
+        # pylint: disable-next=C0415
+        from .content_search import ContentSearch
 
+        if content is not None:
+            content_pattern: Pattern[str] | None = check_if_regex_string(content)
+            if content_pattern is None:
+                quit_with_error(NotValidRegexError(f"The regex pattern, {content} is not a valid regex."))
+            self.content = ContentSearch(content_pattern)
         if enabled is not None:
-            self.enabled = enabled
+            self.enabled = frozenset(enabled)
+        self.nested_depth = max(0, nested_depth)
+        self.queries = [query] if isinstance(query, str) else list(query)
+        if len(self.queries) == 0:
+            quit_with_error(NotValidRegexError("At least one query is required."))
+        if parameter is not None:
+            self.patch = "emissive"
+        patterns: list[Pattern[str]] = [self.__compile_query__(_query, regex, parameter) for _query in self.queries]
+        self.query = patterns[0]
+        self.plan = QueryPlan(self.query)
+        self.query_set = QuerySet([self.plan] + [QueryPlan(pattern) for pattern in patterns[1:]])
+
+    def __compile_query__(self, query: str, regex: bool, parameter: Literal["emissive"] | None) -> Pattern[str]:
+        # NOTE: These are imported while not on the top level, because of import recursion.
+        # pylint: disable-next=C0415
+        from .utils import check_if_regex_string
 
+        output: Pattern[str]
         test: Pattern[str] | None = None
         if regex:
             test = check_if_regex_string(query)
             if test is not None:
-                self.query = test
+                output = test
             else:
                 quit_with_error(
                     NotValidRegexError(f"The regex pattern, {query} is not a valid regex."))
         else:
             test = check_if_regex_string(re.escape(query))
             if test is not None:
-                self.query = test
+                output = test
             else:
                 quit_with_error(
                     NotValidRegexError(
                         f"The regex pattern, {query} is not a valid regex."
                     )
                 )
-        if parameter is not None:
-            self.patch = "emissive"
         if parameter is not None and regex is False:
             if not query.startswith("_"):
-                self.query = re.compile(f"_{re.escape(query)}")
+                output = re.compile(f"_{re.escape(query)}")
             else:
-                self.query = re.compile(re.escape(query))
+                output = re.compile(re.escape(query))
             self.is_emissive_check = True
+        return output
+
+    @property
+    def is_multi(self) -> bool:
+        """Gets if more than one query is being matched.
+
+        Returns:
+            bool: Returns ``True`` if there is more than one query.
+        """
+        return len(self.queries) > 1
 
     def to_list(self) -> list[str]:
         # TODO: Add method summary.
@@ -72,24 +312,73 @@ class QueryBuilder:
         return [str(self.patch or ""), str(self.query)]
 
     def test(self, str_to_test: str, resource_pack_item: str | None = None) -> bool:
-        # TODO: Add method summary.
-        # TODO: Add description for arguments/raises/returns.
-        """_summary_
+        """Tests a path against the queries, and whether its resourcepack is enabled if only enabled packs are queried.
 
         Args:
-            str_to_test (str): _description_
-            resource_pack_item (str | None): _description_
+            str_to_test (str): The path to test.
+            resource_pack_item (str | None): The name of the resourcepack the path is in.
 
         Returns:
-            bool: _description_
+            bool: Returns ``True`` if any query matches from the start of the path.
         """
-        if re.match(self.query, str_to_test):
-            if len(self.enabled) > 0:
-                if (resource_pack_item is not None and resource_pack_item in self.enabled):
-                    return True
-                return False
+        if self.plan.match(str_to_test) if not self.is_multi else len(self.query_set.match(str_to_test)) > 0:
+            if self.enabled:
+                return resource_pack_item is not None and resource_pack_item in self.enabled
             return True
         return False
 
+    def test_queries(self, str_to_test: str, resource_pack_item: str | None = None) -> list[str]:
+        """Gets the queries a path matches, if its resourcepack is enabled when only enabled packs are queried.
+
+        Args:
+            str_to_test (str): The path to test.
+            resource_pack_item (str | None): The name of the resourcepack the path is in.
+
+        Returns:
+            list[str]: The queries that match, in the order they were given, or an empty list.
+        """
+        if self.enabled and (resource_pack_item is None or resource_pack_item not in self.enabled):
+            return []
+        return self.matched_queries(str_to_test)
+
+    def is_owner_enabled(self, owner_name: str) -> bool:
+        """Tests whether a resourcepack is queried at all, before any of its paths are.
+
+        Args:
+            owner_name (str): The file or folder name of the resourcepack, or of the mod.
+
+        Returns:
+            bool: Returns ``True`` if all packs are queried, or if the resourcepack is enabled.
+        """
+        return not self.enabled or owner_name in self.enabled
+
+    def matches(self, str_to_test: str) -> bool:
+        """Tests a path against the queries alone, without the enabled resourcepacks filter.
+
+        Args:
+            str_to_test (str): The path to test.
+
+        Returns:
+            bool: Returns ``True`` if any query matches from the start of the path.
+        """
+        if not self.is_multi:
+            return self.plan.match(str_to_test)
+        return len(self.query_set.match(str_to_test)) > 0
+
+    def matched_queries(self, str_to_test: str) -> list[str]:
+        """Gets the queries a path matches, without the enabled resourcepacks filter.
+
+        Args:
+            str_to_test (str): The path to test.
+
+        Returns:
+            list[str]: The queries that match, in the order they were given, or an empty list.
+        """
+        if not self.is_multi:
+            return [self.queries[0]] if self.plan.match(str_to_test) else []
+        return [self.queries[index] for index in self.query_set.match(str_to_test)]
+
     def __repr__(self) -> str:
+        if self.is_multi:
+            return " | ".join(self.queries)
         return f"{str(self.patch or '')}{str(self.query)}"
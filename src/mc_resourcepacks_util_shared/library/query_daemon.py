@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+"""A module containing the query daemon of ``mc-resourcepacks-query``, and the client that talks to it.
+
+The daemon keeps the entries of the asset index and the enabled resourcepacks of an instance in memory, and polls
+the ``resourcepacks`` and ``mods`` folders and ``options.txt`` for changes, relisting only the packs that changed.
+It answers path queries over a Unix domain socket with a protocol of one JSON object per line: the client sends a
+single request, and the daemon answers with a line per match, followed by a line that ends the response.
+
+The client only uses the standard library, so a query answered by the daemon does not import rich, chardet or
+any of the scanning modules. Platforms without Unix domain sockets always query locally.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from .query_output import OutputFormat, format_match, match_to_dict
+
+if TYPE_CHECKING:
+    from .asset_index import AssetEntry, AssetIndex, AssetOwner
+    from .query import QueryMatch
+    from .query_builder import QueryBuilder
+    from .script_arguments import ScriptArguments
+
+
+PROTOCOL_VERSION: int = 1
+
+DEFAULT_POLL_INTERVAL: float = 1.0
+
+_CONNECT_TIMEOUT: float = 0.5
+
+
+def is_supported() -> bool:
+    """Gets if the query daemon can run on this platform.
+
+    Returns:
+        bool: Returns ``True`` if Unix domain sockets are available.
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path(instance_dir: Path) -> Path:
+    """Gets the path of the socket of the query daemon of an instance.
+
+    The socket is kept in the temporary folder, since the path of a Unix domain socket is limited to about a
+    hundred characters, and is named after the user and the real path of the instance.
+
+    Args:
+        instance_dir (Path): The path to the instance.
+
+    Returns:
+        Path: Path to the socket.
+    """
+    digest: str = hashlib.sha256(os.path.realpath(instance_dir).encode("utf8")).hexdigest()[:16]
+    user: str = str(os.getuid()) if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir(), f"mc-resourcepacks-query-{user}-{digest}.sock")
+
+
+class DaemonError(Exception):
+    """Error when the query daemon rejected a request."""
+
+
+def request_daemon(
+    instance_dir: Path, request: dict[str, Any], on_record: Callable[[dict[str, Any]], None]
+) -> int | None:
+    """Sends a query to the daemon of an instance, if one is running.
+
+    Args:
+        instance_dir (Path): The path to the instance.
+        request (dict[str, Any]): The query, see ``QueryDaemon.answer``.
+        on_record (Callable[[dict[str, Any]], None]): Called with every match the daemon answers with.
+
+    Raises:
+        DaemonError: If the daemon rejected the request, such as for an invalid regex.
+
+    Returns:
+        int | None: The amount of matches, or ``None`` if no daemon is running or it stopped while answering.
+    """
+    if not is_supported():
+        return None
+    path: Path = socket_path(instance_dir)
+    if not path.exists():
+        return None
+    client: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(_CONNECT_TIMEOUT)
+        try:
+            client.connect(str(path))
+        except OSError:
+            return None
+        client.settimeout(None)
+        client.sendall(json.dumps({"version": PROTOCOL_VERSION, **request}).encode("utf8") + b"\n")
+        with client.makefile("r", encoding="utf8") as stream:
+            for line in stream:
+                record: dict[str, Any] = json.loads(line)
+                if "error" in record:
+                    raise DaemonError(record["error"])
+                if record.get("done", False):
+                    return int(record["count"])
+                on_record(record)
+    except (OSError, ValueError):
+        return None
+    finally:
+        client.close()
+    return None
+
+
+class _Snapshot:
+    def __init__(
+        self, owners: list["AssetOwner"], entries: dict[str, list["AssetEntry"]], enabled: list[str]
+    ) -> None:
+        self.owners: list["AssetOwner"] = owners
+        self.entries: dict[str, list["AssetEntry"]] = entries
+        self.enabled: list[str] = enabled
+
+
+class QueryDaemon:
+    """Answers path queries of an instance from memory, over a Unix domain socket."""
+
+    def __init__(
+        self,
+        args: "ScriptArguments",
+        instance_dir: Path,
+        jobs: int | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        self.args: "ScriptArguments" = args
+        self.instance_dir: Path = instance_dir
+        self.jobs: int | None = jobs
+        self.poll_interval: float = poll_interval
+        self.socket_path: Path = socket_path(instance_dir)
+        self.resourcepacks_dir: Path = Path(instance_dir, "minecraft", "resourcepacks")
+        self.mods_dir: Path = Path(instance_dir, "minecraft", "mods")
+        self._snapshot: _Snapshot | None = None
+        self._ready: threading.Event = threading.Event()
+        self._stopped: threading.Event = threading.Event()
+        self._options_mtime_ns: int | None = None
+
+    def _read_enabled(self) -> list[str]:
+        # NOTE: These are imported while not on the top level, so the client does not load them.
+        # pylint: disable-next=C0415
+        from .options_file import OptionsFile
+        # pylint: disable-next=C0415
+        from .resourcepack import ResourcePack
+
+        if not self.args.options_file.exists():
+            return []
+        # NOTE: The options file is read again instead of using the one of the arguments, which is only read once.
+        options: OptionsFile = OptionsFile.load(self.args.options_file)
+        enabled: str | None = options.get("resourcePacks")
+        if enabled is None:
+            return []
+        # NOTE: The list is parsed here instead of through ``read_from_options``, which quits on a malformed list, so
+        #       the ``ValueError`` is reported as a failed refresh and the daemon keeps running.
+        return ResourcePack.to_list_str(ResourcePack.to_list(enabled, args=self.args), True, False)
+
+    def _refresh(self, asset_index: "AssetIndex") -> None:
+        owners: list["AssetOwner"] = asset_index.refresh([self.resourcepacks_dir], (".zip",), True, self.jobs)
+        changed: set[str] = set(asset_index.changed)
+        owners += asset_index.refresh([self.mods_dir], (".jar",), False, self.jobs)
+        changed |= asset_index.changed
+        enabled: list[str]
+        try:
+            options_mtime_ns: int | None = os.stat(self.args.options_file).st_mtime_ns
+        except OSError:
+            options_mtime_ns = None
+        previous: _Snapshot | None = self._snapshot
+        if previous is not None and len(changed) == 0 and options_mtime_ns == self._options_mtime_ns:
+            return
+        if previous is None or options_mtime_ns != self._options_mtime_ns:
+            enabled = self._read_enabled()
+        else:
+            enabled = previous.enabled
+        entries: dict[str, list["AssetEntry"]] = {}
+        for owner in owners:
+            key: str = str(owner.path)
+            if previous is not None and key not in changed and key in previous.entries:
+                entries[key] = previous.entries[key]
+            else:
+                entries[key] = list(asset_index.entries(owner))
+        self._options_mtime_ns = options_mtime_ns
+        # NOTE: The snapshot is replaced as a whole, so a query that is being answered keeps a consistent view.
+        self._snapshot = _Snapshot(owners, entries, enabled)
+
+    def _watch(self) -> None:
+        # NOTE: These are imported while not on the top level, so the client does not load them.
+        # pylint: disable-next=C0415
+        from .asset_index import AssetIndex
+        # pylint: disable-next=C0415
+        from .logger import pprint
+
+        # NOTE: The index is opened on this thread, since a SQLite connection cannot be shared between threads.
+        with AssetIndex(Path(self.instance_dir, ".asset_index.sqlite3")) as asset_index:
+            while not self._stopped.is_set():
+                try:
+                    self._refresh(asset_index)
+                # pylint: disable-next=W0718
+                except Exception as exception:
+                    pprint(f"Unable to refresh the asset index: {type(exception).__name__}: {exception}", level="warn")
+                self._ready.set()
+                self._stopped.wait(self.poll_interval)
+
+    def answer(self, request: dict[str, Any], send: Callable[[dict[str, Any]], None]) -> None:
+        """Answers a single query from the snapshot in memory.
+
+        The request has the ``queries`` to match, and whether they are a ``regex``, which of the ``resourcepacks``
+        and ``mods`` folders to query, whether to query ``only_enabled`` packs, an optional ``limit``, the output
+        ``format``, and whether the client is ``quiet`` and only needs the amount of matches.
+
+        Args:
+            request (dict[str, Any]): The request.
+            send (Callable[[dict[str, Any]], None]): Sends a single line of the response.
+        """
+        # NOTE: These are imported while not on the top level, so the client does not load them.
+        # pylint: disable-next=C0415
+        from .query import iter_indexed_matches
+        # pylint: disable-next=C0415
+        from .query_builder import QueryBuilder
+        # pylint: disable-next=C0415
+        from .utils import check_if_regex_string
+
+        if request.get("version") != PROTOCOL_VERSION:
+            send({"error": f"Unsupported protocol version {request.get('version')}."})
+            return
+        queries: list[str] = [str(query) for query in request.get("queries", [])]
+        regex: bool = bool(request.get("regex", False))
+        if len(queries) == 0:
+            send({"error": "At least one query is required."})
+            return
+        for query in queries:
+            if regex and check_if_regex_string(query) is None:
+                send({"error": f"The regex pattern, {query} is not a valid regex."})
+                return
+        self._ready.wait()
+        snapshot: _Snapshot | None = self._snapshot
+        if snapshot is None:
+            send({"error": "The asset index is not loaded."})
+            return
+        query_builder: QueryBuilder = QueryBuilder(
+            query=queries, regex=regex, enabled=snapshot.enabled if request.get("only_enabled", False) else None
+        )
+        owners: list["AssetOwner"] = [
+            owner for owner in snapshot.owners if self._is_requested(owner, request, query_builder)
+        ]
+        limit: int | None = request.get("limit")
+        output_format: OutputFormat = request.get("format", "rich")
+        quiet: bool = bool(request.get("quiet", False))
+        count: int = 0
+        match: "QueryMatch"
+        for match in iter_indexed_matches(
+            lambda owner: snapshot.entries.get(str(owner.path), []), owners, query_builder
+        ):
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            if quiet:
+                continue
+            if output_format == "rich":
+                send({"match": match_to_dict(match)})
+            else:
+                send({"line": format_match(match, output_format)})
+        send({"done": True, "count": count})
+
+    def _is_requested(self, owner: "AssetOwner", request: dict[str, Any], query_builder: "QueryBuilder") -> bool:
+        if not query_builder.is_owner_enabled(owner.path.name):
+            return False
+        if owner.path.parent == self.resourcepacks_dir:
+            return bool(request.get("resourcepacks", False))
+        if owner.path.parent == self.mods_dir:
+            return bool(request.get("mods", False))
+        return False
+
+    def _handle(self, connection: socket.socket) -> None:
+        try:
+            with connection, connection.makefile("rwb") as stream:
+
+                def send(record: dict[str, Any]) -> None:
+                    stream.write(json.dumps(record, ensure_ascii=False).encode("utf8") + b"\n")
+
+                line: bytes = stream.readline()
+                try:
+                    request: dict[str, Any] = json.loads(line)
+                except ValueError:
+                    send({"error": "The request is not valid JSON."})
+                    return
+                self.answer(request, send)
+        except OSError:
+            # NOTE: The client went away, such as an editor that sent a newer query.
+            return
+
+    def _is_running(self) -> bool:
+        probe: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.settimeout(_CONNECT_TIMEOUT)
+            probe.connect(str(self.socket_path))
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def serve(self) -> None:
+        """Loads the asset index and answers queries until interrupted.
+
+        Raises:
+            DaemonError: If Unix domain sockets are not supported, or a daemon is already running for the instance.
+        """
+        # NOTE: These are imported while not on the top level, so the client does not load them.
+        # pylint: disable-next=C0415
+        from .logger import pprint
+
+        if not is_supported():
+            raise DaemonError("The query daemon needs Unix domain sockets, which this platform does not support.")
+        if self.socket_path.exists():
+            if self._is_running():
+                raise DaemonError(f"A query daemon is already running on {self.socket_path}.")
+            self.socket_path.unlink()
+        started: float = time.perf_counter()
+        watcher: threading.Thread = threading.Thread(target=self._watch, name="asset-index-watcher", daemon=True)
+        watcher.start()
+        server: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask: int = os.umask(0o077)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(previous_umask)
+        server.listen()
+        self._ready.wait()
+        pprint(
+            f"Serving queries of {self.instance_dir} on {self.socket_path}, loaded in "
+            f"{time.perf_counter() - started:.2f}s.",
+            level="info",
+        )
+        try:
+            while True:
+                connection: socket.socket = server.accept()[0]
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+        except KeyboardInterrupt:
+            pprint("Stopping the query daemon.", level="info")
+        finally:
+            self._stopped.set()
+            server.close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+"""A module containing the output formats of ``mc-resourcepacks-query``.
+
+The default ``rich`` format prints every match as a styled line, for interactive use. The ``jsonl``, ``tsv`` and
+``plain`` formats skip rich entirely and write through a single large buffer, so broad queries with many matches
+are not slowed down by the console, and their output can be piped into other tools. While one of them is used,
+log messages and errors are moved to ``stderr`` so they never end up in the results.
+
+Rich is only imported once a writer is created, so the query daemon client can use the formats without loading it.
+"""
+
+import io
+import json
+import os
+import sys
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Literal, TextIO
+
+if TYPE_CHECKING:
+    from .overrides import AssetOverride
+    from .query import QueryMatch
+
+
+OutputFormat = Literal["rich", "jsonl", "tsv", "plain"]
+
+OUTPUT_FORMATS: list[str] = ["rich", "jsonl", "tsv", "plain"]
+
+DEFAULT_BUFFER_SIZE: int = 1024 * 1024
+
+_TSV_ESCAPES: dict[int, str] = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _to_posix(path: Any) -> str:
+    return str(path).replace(os.path.sep, "/")
+
+
+def match_to_dict(match: "QueryMatch") -> dict[str, Any]:
+    """Converts a match into the record written by the ``jsonl`` format.
+
+    Args:
+        match (QueryMatch): The match.
+
+    Returns:
+        dict[str, Any]: The owner and path of the match, and whichever of the queries, emissive test and matching
+            line it has.
+    """
+    record: dict[str, Any] = {
+        "owner": _to_posix(match.owner),
+        "path": _to_posix(match.path),
+        "compressed": match.compressed,
+    }
+    if match.queries is not None:
+        record["queries"] = match.queries
+    if match.test is not None:
+        record["test"] = match.test
+    if match.content is not None:
+        record["line_number"] = match.content.line_number
+        record["line"] = match.content.line
+    return record
+
+
+def format_match(match: "QueryMatch", output_format: OutputFormat) -> str:
+    """Formats a match as a single line of one of the machine readable formats.
+
+    Args:
+        match (QueryMatch): The match.
+        output_format (OutputFormat): The format, any but ``rich``.
+
+    Returns:
+        str: The line, without the line break.
+    """
+    if output_format == "jsonl":
+        return json.dumps(match_to_dict(match), ensure_ascii=False)
+    fields: list[str] = [_to_posix(match.owner), _to_posix(match.path)]
+    if match.test is not None:
+        fields.append(str(match.test))
+    if match.content is not None:
+        fields.extend([str(match.content.line_number), match.content.line])
+    if match.queries is not None:
+        fields.append(", ".join(match.queries))
+    if output_format == "tsv":
+        return "\t".join(field.translate(_TSV_ESCAPES) for field in fields)
+    line: str = f"{fields[0]} -> {fields[1]}"
+    if match.test is not None:
+        line += f" ({match.test})"
+    if match.content is not None:
+        line += f":{match.content.line_number}: {match.content.line}"
+    if match.queries is not None:
+        line += f" ({', '.join(match.queries)})"
+    return line
+
+
+def format_override(override: "AssetOverride", output_format: OutputFormat) -> str:
+    """Formats an asset override as a single line of one of the machine readable formats.
+
+    Args:
+        override (AssetOverride): The override.
+        output_format (OutputFormat): The format, any but ``rich``.
+
+    Returns:
+        str: The line, without the line break.
+    """
+    if output_format == "jsonl":
+        return json.dumps(override.to_dict(), ensure_ascii=False)
+    shadowed: str = ", ".join(_to_posix(pack) for pack in override.shadowed)
+    if output_format == "tsv":
+        fields: list[str] = [override.path, _to_posix(override.winner), shadowed]
+        return "\t".join(field.translate(_TSV_ESCAPES) for field in fields)
+    if shadowed == "":
+        return f"{override.path} -> {_to_posix(override.winner)}"
+    return f"{override.path} -> {_to_posix(override.winner)} (overrides {shadowed})"
+
+
+def _open_stdout(buffer_size: int) -> TextIO:
+    sys.stdout.flush()
+    try:
+        return open(
+            sys.stdout.fileno(), mode="w", buffering=buffer_size, encoding="utf8", newline="\n", closefd=False
+        )
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return sys.stdout
+
+
+class QueryWriter:
+    """Writes the matches of a query in one of the output formats, until it is closed.
+
+    A quiet writer only counts the matches, for when the exit code is the only answer.
+    """
+
+    def __init__(
+        self,
+        output_format: OutputFormat = "rich",
+        stream: TextIO | None = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        quiet: bool = False,
+    ) -> None:
+        # NOTE: This is imported while not on the top level, so rich is only loaded when results are written.
+        # pylint: disable-next=C0415
+        from .logger import CONSOLE
+
+        self._console: Any = CONSOLE
+        self.output_format: OutputFormat = output_format
+        self.quiet: bool = quiet
+        self.count: int = 0
+        self._stream: TextIO | None = None
+        self._owns_stream: bool = False
+        self._console_stderr: bool = self._console.stderr
+        self._broken: bool = False
+        if quiet:
+            self._console.stderr = True
+            return
+        if output_format == "rich":
+            return
+        if stream is not None:
+            self._stream = stream
+        else:
+            self._stream = _open_stdout(buffer_size)
+            self._owns_stream = self._stream is not sys.stdout
+        # NOTE: Log messages would otherwise be mixed into the results.
+        self._console.stderr = True
+
+    def write(self, match: "QueryMatch") -> None:
+        """Writes a single match.
+
+        Args:
+            match (QueryMatch): The match.
+        """
+        self.count += 1
+        if self.quiet:
+            return
+        if self._stream is None:
+            match.print()
+            return
+        self._write_line(format_match(match, self.output_format))
+
+    def write_override(self, override: "AssetOverride") -> None:
+        """Writes the resolution of a single asset path.
+
+        Args:
+            override (AssetOverride): The override.
+        """
+        self.count += 1
+        if self.quiet:
+            return
+        if self._stream is None:
+            # NOTE: This is imported while not on the top level, so rich is only loaded when results are written.
+            # pylint: disable-next=C0415
+            from .logger import print_found_override
+
+            print_found_override(override.path, override.winner, override.shadowed)
+            return
+        self._write_line(format_override(override, self.output_format))
+
+    def _write_line(self, line: str) -> None:
+        if self._stream is None or self._broken:
+            return
+        try:
+            self._stream.write(line + "\n")
+        except BrokenPipeError:
+            # NOTE: The reading end, such as ``head``, stopped reading, so the rest of the results are dropped.
+            self._broken = True
+
+    def close(self) -> None:
+        """Flushes the buffered matches, and moves log messages back to ``stdout``."""
+        self._console.stderr = self._console_stderr
+        if self._stream is None:
+            return
+        try:
+            if not self._broken:
+                self._stream.flush()
+        except BrokenPipeError:
+            self._broken = True
+        if self._owns_stream:
+            try:
+                self._stream.close()
+            except BrokenPipeError:
+                pass
+        if self._broken:
+            # NOTE: Keeps the interpreter from failing again when it flushes ``stdout`` at exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        self._stream = None
+
+    def __enter__(self) -> "QueryWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
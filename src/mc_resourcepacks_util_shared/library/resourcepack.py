@@ -2,46 +2,169 @@
 
 """A module for resourcepack information"""
 
+import sqlite3
+import threading
 import zipfile
-from zipfile import ZipFile
 from pathlib import Path
 from typing import Any, Generator, Literal
 
 from .script_arguments import ScriptArguments
-from .errors import ArgumentMissingError
+from .errors import ArgumentMissingError, FileNotReadError
+from .extensions.zip_reader import read_zip_member
+from .logger import pprint
 from .pack_mcmeta import PackMcMeta
-from .utils import escape_config_chars, open_file, try_decode_json_force, unescape_config_chars
+from .pack_index import PackIndex, pack_stat_key
+from .concurrency import PoolKind, jobs_from_args, ordered_map
+from .pack_list import format_pack_list, parse_pack_list
+from .utils import decode_bytes, escape_config_chars, read_file_text, try_decode_json_force, unescape_config_chars
 
 
 enabled: list["ResourcePack"] = []
 
+_StatKey = tuple[int, int]
+
+_MCMETA_CACHE: dict[Path, tuple[_StatKey, PackMcMeta | None]] = {}
+
+_MCMETA_CACHE_LOCK: threading.Lock = threading.Lock()
+
+
+def read_pack_mcmeta(file: Path) -> PackMcMeta | None:
+    """Reads the ``pack.mcmeta`` data of a zipped or directory resourcepack.
+
+    Zipped resourcepacks are read through their central directory, so only the ``pack.mcmeta`` entry is found and
+    inflated. Archives the central directory reader cannot handle fall back to ``zipfile``.
+
+    Args:
+        file (Path): The path to a zipped or directory resourcepack.
+
+    Raises:
+        FileNotReadError: If the ``pack.mcmeta`` file could not be decoded.
+
+    Returns:
+        PackMcMeta | None: The data of the ``pack.mcmeta`` file, or ``None`` if the path is not a resourcepack.
+    """
+    if file.is_dir():
+        mcmeta_file: Path = Path(file, "pack.mcmeta")
+        if mcmeta_file.exists():
+            return PackMcMeta(try_decode_json_force(read_file_text(mcmeta_file)))
+        return None
+    if not file.is_file():
+        return None
+    data: bytes | None
+    try:
+        data = read_zip_member(file, "pack.mcmeta")
+    except (OSError, zipfile.BadZipFile):
+        return None
+    if data is None:
+        return None
+    text: str | None = decode_bytes(data)
+    if text is None:
+        raise FileNotReadError(f"File at the path pack.mcmeta in zip file {file} has not been read.")
+    return PackMcMeta(try_decode_json_force(text))
+
+
+def _lookup_cached_mcmeta(file: Path, stat_key: _StatKey | None) -> tuple[bool, PackMcMeta | None]:
+    if stat_key is None:
+        return (False, None)
+    with _MCMETA_CACHE_LOCK:
+        cached: tuple[_StatKey, PackMcMeta | None] | None = _MCMETA_CACHE.get(file)
+    if cached is None or cached[0] != stat_key:
+        return (False, None)
+    return (True, cached[1])
+
+
+def _cache_mcmeta(file: Path, stat_key: _StatKey | None, mcmeta: PackMcMeta | None) -> None:
+    if stat_key is None:
+        return
+    with _MCMETA_CACHE_LOCK:
+        _MCMETA_CACHE[file] = (stat_key, mcmeta)
+
+
+def cached_pack_mcmeta(file: Path) -> PackMcMeta | None:
+    """Reads the ``pack.mcmeta`` data of a resourcepack through a cache shared by every resourcepack of the process.
+
+    The cache is keyed by the path of the resourcepack, and an entry is read again once the size or modification
+    time of the pack changed, so records of the same pack in different lists share a single ``PackMcMeta``.
+
+    Args:
+        file (Path): The path to a zipped or directory resourcepack.
+
+    Raises:
+        FileNotReadError: If the ``pack.mcmeta`` file could not be decoded.
+
+    Returns:
+        PackMcMeta | None: The data of the ``pack.mcmeta`` file, or ``None`` if the path is not a resourcepack.
+    """
+    stat_key: _StatKey | None = pack_stat_key(file)
+    is_cached: bool
+    mcmeta: PackMcMeta | None
+    is_cached, mcmeta = _lookup_cached_mcmeta(file, stat_key)
+    if is_cached:
+        return mcmeta
+    mcmeta = read_pack_mcmeta(file)
+    _cache_mcmeta(file, stat_key, mcmeta)
+    return mcmeta
+
 
 class ResourcePack():
-    """A resourcepack data class."""
-    config_string: str = ""
-    raw_config_string: str = ""
-    resourcepack_file: Path
-    mcmeta_file: PackMcMeta | None = None
+    """A resourcepack data class.
+
+    The ``pack.mcmeta`` of the resourcepack is only read the first time ``mcmeta_file`` is used, unless it is given,
+    so creating a resourcepack from its entry in ``options.txt`` does not touch the disk. It is read through
+    ``cached_pack_mcmeta``.
+    """
+    __slots__ = (
+        "config_string",
+        "raw_config_string",
+        "resourcepack_file",
+        "_mcmeta_file",
+        "_is_mcmeta_loaded",
+        "_encoding",
+    )
 
     def __init__(self, file: str | Path, mcmeta: PackMcMeta | None = None, args: ScriptArguments | None = None) -> None:
+        self.config_string: str
+        self.raw_config_string: str
+        self.resourcepack_file: Path
+        self._mcmeta_file: PackMcMeta | None = None
+        self._is_mcmeta_loaded: bool = False
+        if mcmeta is not None:
+            self.mcmeta_file = mcmeta
         if isinstance(file, Path):
-            if mcmeta is None:
-                self.mcmeta_file = self.__mcmeta_from_unsafe_path__(file)
-            else:
-                self.mcmeta_file = mcmeta
             self.resourcepack_file = file
             self.raw_config_string = f"file/{escape_config_chars(file.name)}"
             self.config_string = f"file/{unescape_config_chars(file.name)}"
         else:
             if args is None:
                 raise ArgumentMissingError("Must supply argument ``args`` if argument ``file`` is typeof string.")
-            self.resourcepack_file = Path(args.resourcepacks_folder, unescape_config_chars(file.removeprefix("file/")))
+            self.resourcepack_file = ResourcePack.path_from_config_string(file, args)
             self.raw_config_string = escape_config_chars(file)
             self.config_string = unescape_config_chars(file)
-            if mcmeta is None:
-                self.mcmeta_file = self.__mcmeta_from_unsafe_path__(self.resourcepack_file)
-            else:
-                self.mcmeta_file = mcmeta
+
+    @property
+    def mcmeta_file(self) -> PackMcMeta | None:
+        """Gets the data of the ``pack.mcmeta`` file of the resourcepack, reading it the first time it is used.
+
+        Returns:
+            PackMcMeta | None: The data of the ``pack.mcmeta`` file, or ``None`` if the path is not a resourcepack.
+        """
+        if not self._is_mcmeta_loaded:
+            self.mcmeta_file = self.__mcmeta_from_unsafe_path__(self.resourcepack_file)
+        return self._mcmeta_file
+
+    @mcmeta_file.setter
+    def mcmeta_file(self, value: PackMcMeta | None) -> None:
+        self._mcmeta_file = value
+        self._is_mcmeta_loaded = True
+
+    @property
+    def is_mcmeta_loaded(self) -> bool:
+        """Gets if the ``pack.mcmeta`` file of the resourcepack was read or given.
+
+        Returns:
+            bool: Returns ``True`` if ``mcmeta_file`` can be used without reading the disk.
+        """
+        return self._is_mcmeta_loaded
 
     @property
     def __encoding__(self) -> str:
@@ -55,32 +178,25 @@ class ResourcePack():
         self.__encoding__ = value
 
     def __mcmeta_from_unsafe_path__(self, file: Path) -> PackMcMeta | None:
-        if zipfile.is_zipfile(file):
-            with ZipFile(file=file, mode="r", allowZip64=True) as zip_file:
-                for zipped_file in zip_file.namelist():
-                    if zipped_file != "pack.mcmeta":
-                        continue
-                    with open_file(zipped_file, mode="r", zip_file=zip_file, force_zip64=True) as zipped_file_stream:
-                        return PackMcMeta(try_decode_json_force(zipped_file_stream.read()))
-        elif file.is_dir():
-            mcmeta_file: Path = Path(file, "pack.mcmeta")
-            if mcmeta_file.exists():
-                with open_file(file=mcmeta_file, mode="r") as mcmeta_dir_file:
-                    return PackMcMeta(try_decode_json_force(mcmeta_dir_file.read()))
-        return None
+        return cached_pack_mcmeta(file)
 
     def __has_attr__(self, key: str) -> bool:
-        return key in self.__dict__
+        return hasattr(self, key)
 
     def __get_attr__(self, key: str) -> Any:
-        return self.__dict__[key]
+        return getattr(self, key)
 
     def __repr__(self) -> str:
         return self.raw_config_string
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, ResourcePack):
-            return self.config_string == other.config_string and self.resourcepack_file == other.resourcepack_file and self.mcmeta_file == other.mcmeta_file
+            if self.config_string != other.config_string or self.resourcepack_file != other.resourcepack_file:
+                return False
+            # NOTE: The same path is read through the shared cache, so the data is only compared once both are loaded.
+            if self._is_mcmeta_loaded and other.is_mcmeta_loaded:
+                return self._mcmeta_file == other.mcmeta_file
+            return True
         if isinstance(other, str):
             return self.config_string == other.removesuffix("\n")
         if isinstance(other, Path):
@@ -95,26 +211,72 @@ class ResourcePack():
         yield "resourcepack_file", self.resourcepack_file
         yield "mcmeta_file", self.mcmeta_file
 
+    @staticmethod
+    def path_from_config_string(config_string: str, args: ScriptArguments) -> Path:
+        """Gets the path to a resourcepack from its entry in the ``options.txt`` file.
+
+        Args:
+            config_string (str): The entry of the resourcepack, e.g. ``file/<name>``.
+            args (ScriptArguments): The arguments from the script CLI.
+
+        Returns:
+            Path: The path to the resourcepack inside the ``resourcepacks`` folder.
+        """
+        return Path(args.resourcepacks_folder, unescape_config_chars(config_string.removeprefix("file/")))
+
     @staticmethod
     def to_list(config_list: str, args: ScriptArguments, built_in_only: bool = False) -> list["ResourcePack"]:
         """Creates a list of resourcepack data from a json list.
 
         Args:
-            json_object (Any): A json list.
+            config_list (str): The JSON list of strings, such as the value of ``resourcePacks``.
             args (ScriptArguments): The arguments from the script CLI.
+            built_in_only (bool, optional): Whether to only keep the built-in resourcepacks. Defaults to False.
+
+        Raises:
+            ValueError: If the value is not a JSON list of strings.
 
         Returns:
             list[ResourcePack]: A list of resourcepack data
         """
-        resourcepacks: list[ResourcePack] = []
+        list_config_list: list[str] = parse_pack_list(config_list)
+        if built_in_only:
+            list_config_list = [pack for pack in list_config_list if not pack.startswith("file")]
+        # NOTE: The ``pack.mcmeta`` files are not read here, see ``resolve_mcmeta``.
+        return [ResourcePack(pack, args=args) for pack in list_config_list]
 
-        list_config_list: list[str] = config_list.removeprefix("[\"").removesuffix("\"]").split("\",\"")
-        for _, pack in enumerate(list_config_list):
-            if built_in_only and not pack.startswith("file"):
-                resourcepacks.append(ResourcePack(pack, args=args))
-            elif not built_in_only:
-                resourcepacks.append(ResourcePack(pack, args=args))
-        return resourcepacks
+    @staticmethod
+    def resolve_mcmeta(packs: list["ResourcePack"], args: ScriptArguments) -> None:
+        """Reads the ``pack.mcmeta`` files of the resourcepacks that were not read yet, concurrently.
+
+        Args:
+            packs (list[ResourcePack]): The resourcepacks.
+            args (ScriptArguments): The arguments from the script CLI, for the amount of workers.
+        """
+        unloaded: list[ResourcePack] = []
+        stat_keys: list[_StatKey | None] = []
+        for pack in packs:
+            if pack.is_mcmeta_loaded:
+                continue
+            stat_key: _StatKey | None = pack_stat_key(pack.resourcepack_file)
+            is_cached: bool
+            mcmeta: PackMcMeta | None
+            is_cached, mcmeta = _lookup_cached_mcmeta(pack.resourcepack_file, stat_key)
+            if is_cached:
+                pack.mcmeta_file = mcmeta
+            else:
+                unloaded.append(pack)
+                stat_keys.append(stat_key)
+        if len(unloaded) == 0:
+            return
+        jobs: int | None
+        pool: PoolKind
+        jobs, pool = jobs_from_args(args)
+        paths: list[Path] = [pack.resourcepack_file for pack in unloaded]
+        # NOTE: The cache is filled here instead of in the workers, which may be other processes.
+        for pack, stat_key, mcmeta in zip(unloaded, stat_keys, ordered_map(read_pack_mcmeta, paths, jobs, pool)):
+            _cache_mcmeta(pack.resourcepack_file, stat_key, mcmeta)
+            pack.mcmeta_file = mcmeta
 
     @staticmethod
     def from_list(config_list: list["ResourcePack"], raw: bool = True) -> str:
@@ -129,18 +291,7 @@ class ResourcePack():
         Returns:
             str: _description_
         """
-        def add_surrounding_quotes(arg: ResourcePack) -> str:
-            output: str = "\""
-            if raw:
-                output += arg.raw_config_string.replace(r"\\", "\\")
-            else:
-                output += arg.config_string.replace(r"\\", "\\")
-            output += "\""
-            return output
-
-        simple_list: list[str] = list(map(add_surrounding_quotes, config_list))
-        str_config_list: str = f"[{','.join(simple_list)}]"
-        return str_config_list
+        return format_pack_list((pack.config_string for pack in config_list), raw)
 
     @staticmethod
     def to_list_str(_list: list["ResourcePack"], short: bool = False, raw: bool = True) -> list[str]:
@@ -178,23 +329,45 @@ class ResourcePack():
         """
         # NOTE: These are imported while not on the top level, because of import recursion.
         # pylint: disable-next=C0415
-        from .dir_file_utils import walk_level
+        from .dir_file_utils import PackCandidate, scan_packs
+
+        rebuild: bool = "rebuild_index" in args and args.rebuild_index is True
+        pack_index: PackIndex = PackIndex(args.pack_index_file, rebuild=rebuild)
+        candidates: list[Path] = []
+        stat_keys: list[_StatKey | None] = []
+        mcmetas: list[PackMcMeta | None] = []
+        stale: list[int] = []
+        scanned: PackCandidate
+        for scanned in scan_packs(args.resourcepacks_folder):
+            if scanned.kind == "ignored":
+                continue
+            index: int = len(candidates)
+            candidates.append(scanned.path)
+            stat_key: _StatKey | None = scanned.stat_key()
+            stat_keys.append(stat_key)
+            is_current: bool
+            mcmeta: PackMcMeta | None
+            is_current, mcmeta = pack_index.lookup(scanned.path, stat_key)
+            mcmetas.append(mcmeta)
+            if not is_current:
+                stale.append(index)
+
+        jobs: int | None
+        pool: PoolKind
+        jobs, pool = jobs_from_args(args)
+        stale_paths: list[Path] = [candidates[index] for index in stale]
+        for index, mcmeta in zip(stale, ordered_map(read_pack_mcmeta, stale_paths, jobs, pool)):
+            mcmetas[index] = mcmeta
+            pack_index.update(candidates[index], mcmeta)
+
         resourcepacks: list[ResourcePack] = []
-        for root, directories, files in walk_level(args.resourcepacks_folder, level=0):
-            for directory in directories:
-                mcmeta_file: Path = Path(root, directory, "pack.mcmeta")
-                if mcmeta_file.exists():
-                    with open_file(mcmeta_file, mode="r") as mcmeta_dir_file:
-                        resourcepack_data = ResourcePack(file=Path(root, directory), mcmeta=PackMcMeta(try_decode_json_force(mcmeta_dir_file.read())))
-                        resourcepacks.append(resourcepack_data)
-            for file in files:
-                file_path: Path = Path(root, file)
-                if zipfile.is_zipfile(file_path):
-                    with ZipFile(file=file_path, mode="r", allowZip64=True) as zip_file:
-                        for zipped_file in zip_file.namelist():
-                            if zipped_file != "pack.mcmeta":
-                                continue
-                            with open_file(zipped_file, zip_file=zip_file, mode="r", force_zip64=True) as zipped_file_stream:
-                                resourcepack_data = ResourcePack(file=file_path, mcmeta=PackMcMeta(try_decode_json_force(zipped_file_stream.read())))
-                                resourcepacks.append(resourcepack_data)
+        for candidate, stat_key, mcmeta in zip(candidates, stat_keys, mcmetas):
+            # NOTE: The packs listed in ``options.txt`` of the same folder reuse these instead of reading them again.
+            _cache_mcmeta(candidate, stat_key, mcmeta)
+            if mcmeta is not None:
+                resourcepacks.append(ResourcePack(file=candidate, mcmeta=mcmeta))
+        try:
+            pack_index.save(args.resourcepacks_folder)
+        except (OSError, sqlite3.Error) as error:
+            pprint(f"Unable to save the pack index at {args.pack_index_file}: {error}", level="warn")
         return resourcepacks
@@ -8,10 +8,14 @@ from pathlib import Path
 from types import NotImplementedType
 from typing import Any
 
+from .options_file import OptionsFile
+
 
 class ScriptArguments:
     """A custom extensions of the ``argparse`` ``Namespace`` class."""
 
+    _options: OptionsFile | None
+
     @property
     def minecraft_folder(self) -> Path:
         """Gets the path to the minecraft folder.
@@ -30,6 +34,20 @@ class ScriptArguments:
         """
         return self._options_file
 
+    @property
+    def options(self) -> OptionsFile:
+        """Gets the parsed options file, which is only read the first time it is used.
+
+        Raises:
+            FileNotFoundError: If the options file does not exist.
+
+        Returns:
+            OptionsFile: The parsed options file.
+        """
+        if self._options is None:
+            self._options = OptionsFile.load(self.options_file)
+        return self._options
+
     @property
     def resourcepacks_folder(self) -> Path:
         """Gets the path to the resourcepacks folder.
@@ -48,7 +66,17 @@ class ScriptArguments:
         """
         return self._config_folder
 
+    @property
+    def pack_index_file(self) -> Path:
+        """Gets the path to the persistent ``pack.mcmeta`` index, which sits next to the config folder.
+
+        Returns:
+            Path: Path to the pack index file.
+        """
+        return Path(self.config_folder.parent, ".pack_index.sqlite3")
+
     def __init__(self, namespace: Namespace) -> None:
+        self._options = None
         for key, value in namespace.__dict__.items():
             if key == "instances_dir":
                 self.__setattr__("dir", value)
@@ -5,18 +5,17 @@
 import os
 import re
 from re import Pattern, Match
-import json
-from json.decoder import JSONDecodeError
 import io
 from pathlib import Path
-from typing import IO, Iterator, Literal, Type, TypeVar, Generic, Any, get_origin
+from typing import IO, Literal, Type, TypeVar, Generic, Any, get_origin
 from zipfile import ZipFile
 import codecs
-import chardet
 from chardet import detect
 
 from .logger import pprint
 from .errors import EnvironmentVariableNotFoundError
+from .lenient_json import JsonRepair, parse_lenient_json
+from .pack_list import escape_config, unescape_config
 
 
 T = TypeVar("T")
@@ -117,18 +116,7 @@ def escape_config_chars(_json: str) -> str:
     Returns:
         str: The json string with its invalid characters escaped.
     """
-    output: str = _json
-    output = output.replace("!", r"\u0021")
-    output = output.replace('"', r"\u0022")
-    output = output.replace("#", r"\u0023")
-    output = output.replace("$", r"\u0024")
-    output = output.replace("%", r"\u0025")
-    output = output.replace("&", r"\u0026")
-    output = output.replace("'", r"\u0027")
-    output = output.replace("(", r"\u0028")
-    output = output.replace(")", r"\u0029")
-    output = output.replace("\u00a7", r"\u00a7")
-    return output
+    return escape_config(_json)
 
 
 def unescape_config_chars(_json: str) -> str:
@@ -140,18 +128,7 @@ def unescape_config_chars(_json: str) -> str:
     Returns:
         str: The json string with its invalid characters un-escaped.
     """
-    output: str = _json
-    output = output.replace(r"\u0021", "!")
-    output = output.replace(r"\u0022", '"')
-    output = output.replace(r"\u0023", "#")
-    output = output.replace(r"\u0024", "$")
-    output = output.replace(r"\u0025", "%")
-    output = output.replace(r"\u0026", "&")
-    output = output.replace(r"\u0027", "'")
-    output = output.replace(r"\u0028", "(")
-    output = output.replace(r"\u0029", ")")
-    output = output.replace(r"\u00a7", "\u00a7")
-    return output
+    return unescape_config(_json)
 
 
 _ReadWriteMode = Literal[
@@ -160,174 +137,154 @@ _ReadWriteMode = Literal[
 _ReadWriteModeBasic = Literal["w", "r"]
 
 
+_BYTE_ORDER_MARKS: list[tuple[bytes, str]] = [
+    # NOTE: The UTF-32 marks must be checked first, since the little endian one starts with the UTF-16 one.
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+_DETECT_SAMPLE_SIZE: int = 64 * 1024
+
+
+def decode_text(value: bytes | bytearray | memoryview) -> tuple[str, str]:
+    """Decodes text of an unknown encoding in a single pass over its bytes.
+
+    A byte order mark is checked first, then the text is decoded as strict UTF-8, and only if both fail is
+    ``chardet`` run, over a bounded sample of the bytes instead of the whole buffer. The bytes are decoded through a
+    view, so a memory mapped file is only copied when ``chardet`` is needed.
+
+    Args:
+        value (bytes | bytearray | memoryview): The raw bytes of the text.
+
+    Raises:
+        UnicodeError: If the encoding could not be determined or the text could not be decoded with it.
+
+    Returns:
+        tuple[str, str]: The decoded text and the name of its encoding.
+    """
+    raw: bytes
+    with memoryview(value) as view:
+        head: bytes = bytes(view[:4])
+        for byte_order_mark, bom_encoding in _BYTE_ORDER_MARKS:
+            if head.startswith(byte_order_mark):
+                return (codecs.decode(view, bom_encoding, "strict"), bom_encoding)
+        try:
+            return (str(view, "utf-8", "strict"), "utf-8")
+        except UnicodeDecodeError:
+            pass
+        raw = bytes(view)
+    encoding: str | None = detect(raw[:_DETECT_SAMPLE_SIZE])["encoding"]
+    if encoding is not None:
+        try:
+            return (codecs.decode(raw, encoding, "strict"), encoding)
+        except (UnicodeDecodeError, LookupError) as decode_error:
+            if len(raw) <= _DETECT_SAMPLE_SIZE:
+                raise UnicodeError(f"Text could not be decoded as {encoding}.") from decode_error
+    # NOTE: The sample was not representative of the whole text, so fall back to detecting over all of it.
+    encoding = detect(raw)["encoding"]
+    if encoding is None:
+        raise UnicodeError("Encoding type was not found.")
+    return (codecs.decode(raw, encoding, "strict"), encoding)
+
+
+def read_file_text(
+    file: Path | str,
+    zip_file: ZipFile | None = None,
+    force_zip64: bool = False,
+) -> str:
+    """Reads a file on disk or inside of a zip file once, and decodes its text.
+
+    Args:
+        file (Path | str): The path to the file, or the name of the file inside of ``zip_file``.
+        zip_file (ZipFile | None, optional): The zip file to read the file from. Defaults to None.
+        force_zip64 (bool, optional): Forces reading the file inside of ``zip_file`` as zip64. Defaults to False.
+
+    Raises:
+        TypeError: If the encoding of the file was not found.
+
+    Returns:
+        str: The decoded text of the file.
+    """
+    raw_data: bytes
+    if zip_file is None:
+        raw_data = Path(file).read_bytes()
+    else:
+        if not isinstance(file, str):
+            file = file.name
+        with zip_file.open(name=file, mode="r", force_zip64=force_zip64) as zipped_file_stream:
+            raw_data = zipped_file_stream.read()
+    try:
+        return decode_text(raw_data)[0]
+    except (UnicodeError, LookupError) as unicode_error:
+        raise TypeError(f'Encoding type was not found for the file "{file}".') from unicode_error
+
+
 def open_file(
     file: Path | str,
     mode: _ReadWriteMode | _ReadWriteModeBasic = "r",
     zip_file: ZipFile | None = None,
     force_zip64: bool = False,
 ) -> IO[Any]:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    """Opens a text file of an unknown encoding, on disk or inside of a zip file.
+
+    Files opened for reading are read and decoded once, see ``read_file_text``. Files on disk opened for writing
+    keep the encoding of their existing content, which is detected from a bounded sample.
 
     Args:
-        file (Path | str): _description_
-        mode (_ReadWriteMode | _ReadWriteModeBasic, optional): _description_. Defaults to "r".
-        zip_file (ZipFile | None, optional): _description_. Defaults to None.
-        force_zip64 (bool, optional): _description_. Defaults to False.
+        file (Path | str): The path to the file, or the name of the file inside of ``zip_file``.
+        mode (_ReadWriteMode | _ReadWriteModeBasic, optional): The mode to open the file in. Defaults to "r".
+        zip_file (ZipFile | None, optional): The zip file to read the file from. Defaults to None.
+        force_zip64 (bool, optional): Forces reading the file inside of ``zip_file`` as zip64. Defaults to False.
 
     Raises:
-        TypeError: _description_
-        TypeError: _description_
+        TypeError: If the encoding of the file was not found, or a file inside of a zip file is opened for writing.
 
     Returns:
-        IO[Any]: _description_
+        IO[Any]: A text stream of the file.
     """
+    if mode.startswith("r") and "+" not in mode:
+        return io.StringIO(read_file_text(file, zip_file=zip_file, force_zip64=force_zip64))
+    if zip_file is not None:
+        raise TypeError(f'The file "{file}" inside of a zip file cannot be opened for writing.')
+    if not isinstance(file, Path):
+        file = Path(file)
+    encoding: str = "utf-8"
+    if file.exists():
+        with file.open(mode="rb") as sample_stream:
+            try:
+                encoding = decode_text(sample_stream.read(_DETECT_SAMPLE_SIZE))[1]
+            except (UnicodeError, LookupError):
+                pass
+    return file.open(mode=mode, encoding=encoding)
 
-    def simplify_mode(
-        mode: _ReadWriteMode | _ReadWriteModeBasic,
-    ) -> _ReadWriteModeBasic:
-        """Simplifies the mode parameter to be basic for zip file reading/writing.
 
-        Args:
-            mode (_ReadWriteMode | _ReadWriteModeBasic): The passed parameter mode.
-
-        Returns:
-            _ReadWriteModeBasic: The simplified mode parameter.
-        """
-        if mode.startswith("r"):
-            return "r"
-        return "w"
-
-    raw_data: bytes
-    encoding: str | None
-    if zip_file is None:
-        if not isinstance(file, Path):
-            file = Path(file)
-        with file.open(mode="rb") as tmp_read:
-            raw_data = tmp_read.read()
-            tmp_read.close()
-        encoding = chardet.detect(raw_data)["encoding"]
-        return file.open(mode=mode, encoding=encoding)
-    if not isinstance(file, str):
-        file = file.name
-    with zip_file.open(name=file, mode="r", force_zip64=force_zip64) as tmp_read_zip:
-        raw_data = tmp_read_zip.read()
-        tmp_read_zip.close()
-    encoding = chardet.detect(raw_data)["encoding"]
-    zip_file_stream: IO[bytes] = zip_file.open(
-        name=file, mode=simplify_mode(mode), force_zip64=force_zip64
-    )
-    if encoding is None:
-        raise TypeError(f'Encoding type was not found for the file "{file}".')
-    decoded_file_stream: IO[Any] = io.StringIO(
-        zip_file_stream.read().decode(encoding=encoding)
-    )
-    return decoded_file_stream
-
-
-_EXTRA_DATA_LINE_COLUMN_CHAR_REGEX: Pattern[str] = re.compile(
-    r"Extra data: line (\d+) column (\d+) \(char (\d+)\)$", re.MULTILINE
-)
-_EXPECTING_VALUE_LINE_COLUMN_CHAR_REGEX: Pattern[str] = re.compile(
-    r"Expecting value: line (\d+) column (\d+) \(char (\d+)\)$", re.MULTILINE
-)
-_MULTI_LINE_ENSURE_REGEX: Pattern[str] = re.compile(
-    r"^(?: |\t)*\"[^\r\n]+\": \"((?:[^\b\"]|\\.\r?\n)*)\",?$", re.MULTILINE
-)
-
-
-def try_decode_json_force(data: str) -> dict[str, Any]:
-    """Tries to decode a JSON file, if a specific error is returned it will parse it anyways,
+def try_decode_json_force(data: str, repairs: list[JsonRepair] | None = None) -> dict[str, Any]:
+    """Tries to decode a JSON file, if the file has common mistakes it will parse it anyways,
     because I said so.
 
     Since some people cannot look up or don't know how to look up valid JSON comments, I personally
     had reached an issue where the JSON file had extra data at the end of the file that isn't
-    machine readable.
+    machine readable. Comments, trailing commas, trailing data and raw new lines or tabs inside of
+    strings are repaired in a single pass, see ``parse_lenient_json``.
 
     Args:
         data (str): The string containing a valid or not JSON object or array.
+        repairs (list[JsonRepair] | None, optional): A list to add the repairs that were made to. Defaults to None.
+
+    Raises:
+        JSONDecodeError: If the data could not be parsed even after it was repaired.
 
     Returns:
         dict[str, Any]: Outputs a JSON object or JSON list, based on the input.
     """
-    output: dict[str, Any] = {}
-
-    def ensure_single_line_json_string(data: str) -> str:
-        data = re.sub(r"\r?\n", r"\n", data, flags=0)
-        cloned_data: str = data
-        matches: Iterator[Match[str]] = _MULTI_LINE_ENSURE_REGEX.finditer(data)
-        for _, match in enumerate(matches):
-            for _, group in enumerate(match.groups()):
-                new_string: str = re.sub(r"\r?\n", r"\\n", group, flags=0)
-                new_string = re.sub(r"\t", r"\\t", new_string, flags=0)
-                cloned_data = cloned_data.replace(group, new_string)
-        return cloned_data
-
-    def remove_extra_data(data: str, extra_data_position: int) -> str:
-        cloned_data: str = ""
-        for index, line in enumerate(data.splitlines(True)):
-            if index >= extra_data_position - 1:
-                break
-            cloned_data += line
-        return cloned_data
-
-    def remove_extra_value(data: str, extra_data_position: int) -> str:
-        return data
-
-    def remove_ex_value(data: str, error_msg: str) -> str:
-        output: str = ""
-        ex_value_exception_msg: Match[str] | None = _EXPECTING_VALUE_LINE_COLUMN_CHAR_REGEX.search(error_msg)
-        if ex_value_exception_msg is not None:
-            output = remove_extra_value(data, int(ex_value_exception_msg.groups()[0]))
-            try:
-                output = json.loads(data)
-            except JSONDecodeError as json_decoder_error:
-                _error_msg: str = str(json_decoder_error)
-                if "Extra data: " not in _error_msg:
-                    output = remove_ex_data(data, _error_msg)
-                elif "Expecting value: " not in _error_msg:
-                    output = remove_ex_value(data, _error_msg)
-                else:
-                    pprint(data)
-                    raise json_decoder_error
-        return output
-
-    def remove_ex_data(data: str, error_msg: str) -> str:
-        output: str = ""
-        ex_data_exception_msg: Match[str] | None = _EXTRA_DATA_LINE_COLUMN_CHAR_REGEX.search(error_msg)
-        if ex_data_exception_msg is not None:
-            output = remove_extra_data(data, int(ex_data_exception_msg.groups()[0]))
-            try:
-                output = json.loads(tmp_ensured)
-            except JSONDecodeError as json_decoder_error:
-                _error_msg: str = str(json_decoder_error)
-                if "Extra data: " not in _error_msg:
-                    output = remove_ex_data(data, _error_msg)
-                elif "Expecting value: " not in _error_msg:
-                    output = remove_ex_value(data, _error_msg)
-                else:
-                    pprint(data)
-                    raise json_decoder_error
-        return output
-
-    tmp_ensured: str = ""
-    try:
-        tmp_ensured = ensure_single_line_json_string(data)
-        output = json.loads(tmp_ensured)
-    except JSONDecodeError as json_decoder_error:
-        error_msg: str = str(json_decoder_error)
-        try:
-            tmp_ensured = remove_ex_data(tmp_ensured, error_msg)
-            output = json.loads(tmp_ensured)
-        except JSONDecodeError as _json_decoder_error:
-            print("tmp_ensured: \"", tmp_ensured, "\"")
-            raise _json_decoder_error
-    except Exception as exception:
-        raise exception
-    except BaseException as base_exception:
-        raise base_exception
-
+    output: dict[str, Any]
+    made_repairs: list[JsonRepair]
+    output, made_repairs = parse_lenient_json(data)
+    if repairs is not None:
+        repairs.extend(made_repairs)
     return output
 
 
@@ -421,44 +378,31 @@ def check_if_regex_string(query: str) -> None | Pattern[str]:
 
 
 def decode_bytes(value: bytes | bytearray) -> str | None:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    """Decodes bytes of an unknown encoding, see ``decode_text``.
 
     Args:
-        value (bytes | bytearray): _description_
+        value (bytes | bytearray): The raw bytes of the text.
 
     Returns:
-        str | None: _description_
+        str | None: The decoded text, or ``None`` if it could not be decoded.
     """
-    try:
-        encoding: str | None = detect(value)["encoding"]
-        if encoding is None:
-            return None
-        decode: str = codecs.decode(value, encoding, "strict")
-        return decode
-    # pylint: disable-next=W0718
-    except BaseException as base_exception:
-        pprint(base_exception)
-        return None
+    return decode_bytes_enc(value)[0]
 
 
 def decode_bytes_enc(value: bytes | bytearray) -> tuple[str | None, str | None]:
-    # TODO: Add method summary.
-    # TODO: Add description for arguments/raises/returns.
-    """_summary_
+    """Decodes bytes of an unknown encoding, see ``decode_text``.
 
     Args:
-        value (bytes | bytearray): _description_
+        value (bytes | bytearray): The raw bytes of the text.
 
     Returns:
-        str | None: _description_
+        tuple[str | None, str | None]: The decoded text and the name of its encoding, or ``None`` for both if it
+            could not be decoded.
     """
     try:
-        encoding: str | None = detect(value)["encoding"]
-        if encoding is None:
-            return (None, None)
-        decode: str = codecs.decode(value, encoding, "strict")
+        decode: str
+        encoding: str
+        decode, encoding = decode_text(value)
         return (decode, encoding)
     # pylint: disable-next=W0718
     except BaseException as base_exception:
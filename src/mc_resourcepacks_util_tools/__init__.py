@@ -4,7 +4,14 @@
 
 from argparse import ArgumentParser
 
-from mc_resourcepacks_util_shared.library.modify import modify_resourcepacks
+from mc_resourcepacks_util_shared.library.concurrency import POOL_KINDS
+from mc_resourcepacks_util_shared.library.modify import (
+    modify_resourcepacks,
+    plan_modify,
+    print_modify_plan,
+    prune_backups,
+    restore_resourcepacks,
+)
 from mc_resourcepacks_util_shared.main import (
     filter_only_incompatible,
     find_from_missing,
@@ -46,6 +53,25 @@ def main() -> None:
         choices=MinecraftVersion.get_valid_versions(),
         help="Override the parsed minecraft version.",
     )
+    parser.add_argument(
+        "--rebuild_index",
+        action="store_true",
+        help="Ignore the cached pack index and re-read every resourcepack.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="The amount of workers used to read or modify resourcepacks concurrently, 1 handles them one at a time.",
+        default=None,
+    )
+    parser.add_argument(
+        "--pool",
+        type=str,
+        choices=POOL_KINDS,
+        help="The kind of worker pool used to read resourcepacks concurrently. "
+        "Defaults to threads, or processes when modifying.",
+        default=None,
+    )
     manage_group = parser.add_argument_group(
         title="manage",
         description="Manages the resourcepacks in the minecraft install",
@@ -66,6 +92,11 @@ def main() -> None:
         action="store_true",
         help="Saves the compiled resource pack options to the `options.txt'",
     )
+    manage_group.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Flushes the saved `options.txt' to disk before replacing the old one, when using --save.",
+    )
     compile_group = manage_group.add_argument_group(
         title="compile",
         description="Modifies the resource pack at location via compilation",
@@ -108,6 +139,44 @@ def main() -> None:
         action="store_true",
         help="Recurse through all of the resourcepacks in a directory.",
     )
+    modify_group.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Only report which resourcepacks need changes, without modifying them.",
+    )
+    modify_group.add_argument(
+        "--plan_format",
+        type=str,
+        choices=["text", "json"],
+        help="The format of the report printed by --dry_run.",
+        default="text",
+    )
+    backup_group = parser.add_argument_group(
+        title="backup",
+        description="Manages the backups of resource packs taken before they are modified",
+    )
+    backup_group.add_argument(
+        "--backup_dir",
+        type=validate_resolve_path,
+        help="The path to the backup store. Defaults to `~/.mc_resourcepacks_util/backups'.",
+        default=None,
+    )
+    backup_group.add_argument(
+        "--restore",
+        action="store_true",
+        help="Restores the most recent backup of every resource pack in the minecraft install.",
+    )
+    backup_group.add_argument(
+        "--prune",
+        action="store_true",
+        help="Removes old backups of the resource packs in the minecraft install.",
+    )
+    backup_group.add_argument(
+        "--keep_backups",
+        type=int,
+        help="The amount of backups to keep per resource pack when using --prune.",
+        default=1,
+    )
 
     args: ScriptArguments = ScriptArguments(parser.parse_args())
 
@@ -115,12 +184,25 @@ def main() -> None:
         pprint("--minimal requires use of --compile", level="parser_error", parser=parser)
     elif args.minimal is True and args.compile is True and args.save is True:
         pprint("--minimal cannot be used with --save when use of --compile", level="parser_error", parser=parser)
+    elif args.fsync is True and args.save is False:
+        pprint("--fsync requires use of --save", level="parser_error", parser=parser)
     elif args.minimal is True and args.decompile is True:
         pprint("--minimal cannot be used with --decompile", level="parser_error", parser=parser)
     elif args.save is True and args.decompile is True:
         pprint("--save cannot be used with --decompile", level="parser_error", parser=parser)
     elif args.compile is True and args.decompile is True:
         pprint("--compile cannot be used with --decompile", level="parser_error", parser=parser)
+    elif args.restore is True and args.prune is True:
+        pprint("--restore cannot be used with --prune", level="parser_error", parser=parser)
+    elif args.jobs is not None and args.jobs < 1:
+        pprint("--jobs must be at least 1", level="parser_error", parser=parser)
+
+    if args.restore:
+        restore_resourcepacks(args)
+        return
+    if args.prune:
+        prune_backups(args)
+        return
 
     resourcepack_tuple: ResourcePackTuple
     resource_packs: list[ResourcePack] = ResourcePack.load_resource_packs(args)
@@ -137,6 +219,7 @@ def main() -> None:
     if args.compile:
         resourcepack_tuple = read_builtin_from_options(args)
         resourcepack_tuple.enabled = get_enabled_resourcepacks(args)
+        ResourcePack.resolve_mcmeta(resourcepack_tuple.enabled, args)
         resourcepack_tuple.incompatible = list_append_many(
             resourcepack_tuple.incompatible,
             filter_only_incompatible(resourcepack_tuple.enabled, minecraft_version),
@@ -153,6 +236,9 @@ def main() -> None:
         resourcepack_tuple.disabled = find_from_missing(
             resourcepack_tuple.enabled, resource_packs
         )
-        modify_resourcepacks(args, minecraft_version)
+        if args.dry_run:
+            print_modify_plan(plan_modify(args, minecraft_version), args.plan_format)
+        else:
+            modify_resourcepacks(args, minecraft_version)
     else:
         pprint("Failed to do task", level="error")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""Tests of the content-addressed store that keeps the originals of modified resourcepacks."""
+
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from mc_resourcepacks_util_shared.library.backup_store import BackupRecord, BackupStore, file_digest
+from mc_resourcepacks_util_shared.library.modify import modify_zip_pack
+
+
+def _create_pack(path: Path, pack_format: int = 15) -> bytes:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("pack.mcmeta", json.dumps({"pack": {"pack_format": pack_format, "description": "Test"}}))
+        zip_file.writestr("assets/minecraft/textures/block/stone.png", bytes(range(256)) * 16)
+    return path.read_bytes()
+
+
+def _replace(path: Path, data: bytes) -> None:
+    # NOTE: Packs are only ever replaced by renaming a new file over them, the same as ``modify_zip_pack`` does.
+    temp: Path = path.with_name(f".{path.name}.tmp")
+    temp.write_bytes(data)
+    os.replace(temp, path)
+
+
+def test_restore_brings_back_the_original_bytes(tmp_path: Path) -> None:
+    """A pack replaced after its backup gets its original bytes back when the backup is restored."""
+    pack: Path = Path(tmp_path, "resourcepacks", "pack.zip")
+    original: bytes = _create_pack(pack)
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    record: BackupRecord = store.backup(pack)
+    assert record.digest == file_digest(pack)
+    _replace(pack, b"modified")
+    assert store.restore(record) == record.original_path
+    assert pack.read_bytes() == original
+    # NOTE: The restored pack is never a hardlink, so changing it in place cannot change the stored object.
+    assert not os.path.samefile(pack, store.object_path(record.digest))
+
+
+def test_restore_to_another_path(tmp_path: Path) -> None:
+    """A backup can be restored next to the pack instead of over it."""
+    pack: Path = Path(tmp_path, "resourcepacks", "pack.zip")
+    original: bytes = _create_pack(pack)
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    record: BackupRecord = store.backup(pack)
+    _replace(pack, b"modified")
+    target: Path = Path(tmp_path, "restored", "pack.zip")
+    assert store.restore(record, target) == target
+    assert target.read_bytes() == original
+    assert pack.read_bytes() == b"modified"
+
+
+def test_modify_then_restore(tmp_path: Path) -> None:
+    """Restoring the backup taken by ``modify_zip_pack`` undoes the change of ``pack_format``."""
+    pack: Path = Path(tmp_path, "resourcepacks", "pack.zip")
+    original: bytes = _create_pack(pack, pack_format=15)
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    assert modify_zip_pack(pack, 34, store)
+    with zipfile.ZipFile(pack) as zip_file:
+        assert zip_file.testzip() is None
+        assert json.loads(zip_file.read("pack.mcmeta"))["pack"]["pack_format"] == 34
+    records: list[BackupRecord] = store.latest_backups(pack.parent)
+    assert len(records) == 1
+    store.restore(records[0])
+    assert pack.read_bytes() == original
+
+
+def test_same_content_is_stored_once(tmp_path: Path) -> None:
+    """Packs with the same content share a single object in the store."""
+    first: Path = Path(tmp_path, "one", "resourcepacks", "pack.zip")
+    second: Path = Path(tmp_path, "two", "resourcepacks", "pack.zip")
+    _create_pack(first)
+    second.parent.mkdir(parents=True)
+    second.write_bytes(first.read_bytes())
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    first_record: BackupRecord = store.backup(first)
+    second_record: BackupRecord = store.backup(second)
+    assert first_record.digest == second_record.digest
+    assert len(store.list_backups()) == 2
+    assert len(store.list_backups(first.parent)) == 1
+    assert len(list(Path(tmp_path, "backups", "objects").rglob("*.zip"))) == 1
+
+
+def test_prune_keeps_the_latest_backup(tmp_path: Path) -> None:
+    """Pruning removes older backups of a pack and the objects no backup refers to anymore."""
+    pack: Path = Path(tmp_path, "resourcepacks", "pack.zip")
+    _create_pack(pack, pack_format=15)
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    old: BackupRecord = store.backup(pack)
+    _replace(pack, _create_pack(Path(tmp_path, "other.zip"), pack_format=34))
+    new: BackupRecord = store.backup(pack)
+    removed: int
+    removed, _ = store.prune(keep=1)
+    assert removed == 1
+    assert [record.record_id for record in store.list_backups()] == [new.record_id]
+    assert not store.object_path(old.digest).exists()
+    assert store.object_path(new.digest).exists()
+
+
+def test_restore_of_a_missing_object(tmp_path: Path) -> None:
+    """Restoring a backup whose object was removed from the store fails without touching the pack."""
+    pack: Path = Path(tmp_path, "resourcepacks", "pack.zip")
+    _create_pack(pack)
+    store: BackupStore = BackupStore(Path(tmp_path, "backups"))
+    record: BackupRecord = store.backup(pack)
+    _replace(pack, b"modified")
+    os.remove(store.object_path(record.digest))
+    with pytest.raises(FileNotFoundError):
+        store.restore(record)
+    assert pack.read_bytes() == b"modified"
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""Tests of the tolerant JSON reader for hand written files, such as ``pack.mcmeta``."""
+
+import json
+from typing import Any
+
+import pytest
+
+from mc_resourcepacks_util_shared.library.lenient_json import JsonRepair, parse_lenient_json, repair_json
+
+
+def test_valid_json_is_not_repaired() -> None:
+    """Valid JSON is parsed as it is, without any repair."""
+    text: str = '{"pack": {"pack_format": 15, "description": "A // B /* C */"}}'
+    repaired: str
+    repairs: list[JsonRepair]
+    repaired, repairs = repair_json(text)
+    assert repaired == text
+    assert not repairs
+
+
+def test_comments() -> None:
+    """Line and block comments are removed, strings that look like comments are kept."""
+    text: str = '{\n  // The pack\n  "pack": {"pack_format": 15 /* 1.20.1 */, "description": "//"}\n}'
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json(text)
+    assert value == {"pack": {"pack_format": 15, "description": "//"}}
+    assert repairs == [JsonRepair("comment", 2, 3), JsonRepair("comment", 3, 30)]
+
+
+def test_trailing_commas() -> None:
+    """Commas before the end of an object or an array are removed."""
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json('{"a": [1, 2,], "b": 3,\n}')
+    assert value == {"a": [1, 2], "b": 3}
+    assert repairs == [JsonRepair("trailing_comma", 1, 12), JsonRepair("trailing_comma", 1, 22)]
+
+
+@pytest.mark.parametrize(
+    ("text", "column"),
+    [('{"a": 1} extra', 10), ('{"a": 1}}', 9), ('{"a": 1}\n{"b": 2}', 1)],
+)
+def test_trailing_data(text: str, column: int) -> None:
+    """Anything after the top level value is dropped."""
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json(text)
+    assert value == {"a": 1}
+    assert repairs == [JsonRepair("trailing_data", text.count("\n") + 1, column)]
+
+
+def test_control_characters() -> None:
+    """Raw control characters inside of strings are escaped, and reported once per string."""
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json('{"a": "line\nbreak\ttab", "b": "\x01"}')
+    assert value == {"a": "line\nbreak\ttab", "b": "\x01"}
+    assert repairs == [JsonRepair("control_character", 1, 12), JsonRepair("control_character", 2, 19)]
+
+
+def test_unterminated_string() -> None:
+    """A string left open at the end of the text is closed, together with the containers around it."""
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json('{"a": "value')
+    assert value == {"a": "value"}
+    assert repairs == [JsonRepair("unterminated_string", 1, 7), JsonRepair("unclosed_container", 1, 13)]
+
+
+def test_unclosed_containers() -> None:
+    """Objects and arrays left open at the end of the text are closed in order, dropping a dangling comma."""
+    value: Any
+    repairs: list[JsonRepair]
+    value, repairs = parse_lenient_json('{"a": [1, {"b": 2}, 3,\n')
+    assert value == {"a": [1, {"b": 2}, 3]}
+    assert repairs == [JsonRepair("unclosed_container", 2, 1), JsonRepair("trailing_comma", 1, 22)]
+
+
+def test_unrepairable_json() -> None:
+    """Mistakes that are not repaired still fail to parse."""
+    with pytest.raises(json.JSONDecodeError):
+        parse_lenient_json('{"a": 1 "b": 2}')
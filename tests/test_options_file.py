@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""Tests of the parsed model of the ``options.txt`` file of an instance."""
+
+import os
+from pathlib import Path
+
+from mc_resourcepacks_util_shared.library.options_file import OptionsFile
+
+
+OPTIONS: bytes = (
+    b"version:3465\r\n"
+    b'resourcePacks:["vanilla"]\r\n'
+    b"lang:en_us\n"
+    b"not an option\n"
+    b'incompatibleResourcePacks:[]\n'
+    b"fov:0.0"
+)
+
+
+def _write_options(tmp_path: Path, content: bytes = OPTIONS) -> Path:
+    path: Path = Path(tmp_path, "options.txt")
+    path.write_bytes(content)
+    return path
+
+
+def test_unchanged_lines_are_kept(tmp_path: Path) -> None:
+    """Lines that are not changed, and their CRLF line breaks, are rendered byte for byte."""
+    options: OptionsFile = OptionsFile.load(_write_options(tmp_path))
+    assert options.render().encode("utf8") == OPTIONS
+    options.set("resourcePacks", '["vanilla","file/pack.zip"]')
+    assert options.render().encode("utf8") == OPTIONS.replace(
+        b'resourcePacks:["vanilla"]\r\n', b'resourcePacks:["vanilla","file/pack.zip"]\r\n'
+    )
+    assert options.changed == {1}
+
+
+def test_last_duplicate_key_wins(tmp_path: Path) -> None:
+    """The last line of a key that is written twice is the one read and replaced, as Minecraft does."""
+    options: OptionsFile = OptionsFile.load(_write_options(tmp_path, b"lang:en_us\nfov:0.0\nlang:fr_fr\n"))
+    assert options.get("lang") == "fr_fr"
+    options.set("lang", "de_de")
+    assert options.render() == "lang:en_us\nfov:0.0\nlang:de_de\n"
+
+
+def test_set_missing_key_appends_it(tmp_path: Path) -> None:
+    """Setting an option that is not in the file adds it on a new line at the end."""
+    options: OptionsFile = OptionsFile.load(_write_options(tmp_path))
+    assert "gamma" not in options
+    assert options.get("gamma") is None
+    options.set("gamma", "1.0")
+    assert options.get("gamma") == "1.0"
+    assert options.render().encode("utf8") == OPTIONS + b"\ngamma:1.0\n"
+
+
+def test_render_selected_keys_with_values(tmp_path: Path) -> None:
+    """Rendering some keys keeps the order of the file and replaces values without changing the model."""
+    options: OptionsFile = OptionsFile.load(_write_options(tmp_path))
+    rendered: str = options.render(
+        ["incompatibleResourcePacks", "resourcePacks", "missing"],
+        {"resourcePacks": '["file/pack.zip"]', "missing": "value"},
+    )
+    assert rendered == 'resourcePacks:["file/pack.zip"]\r\nincompatibleResourcePacks:[]\n'
+    assert options.get("resourcePacks") == '["vanilla"]'
+    assert not options.changed
+
+
+def test_save_skips_same_content(tmp_path: Path) -> None:
+    """Saving content that is the same as the file on disk does not write it or change its modification time."""
+    path: Path = _write_options(tmp_path)
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    options: OptionsFile = OptionsFile.load(path)
+    assert not options.save()
+    options.set("lang", "fr_fr")
+    options.set("lang", "en_us")
+    assert options.changed
+    assert not options.save()
+    assert not options.changed
+    assert path.stat().st_mtime_ns == 1_000_000_000
+    assert path.read_bytes() == OPTIONS
+
+
+def test_save_writes_changed_content(tmp_path: Path) -> None:
+    """Saving a changed option replaces the file, without leaving temporary files behind."""
+    path: Path = _write_options(tmp_path)
+    options: OptionsFile = OptionsFile.load(path)
+    options.set("lang", "fr_fr")
+    assert options.save(fsync=True)
+    assert path.read_bytes() == OPTIONS.replace(b"lang:en_us\n", b"lang:fr_fr\n")
+    assert [file.name for file in tmp_path.iterdir()] == ["options.txt"]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""Tests of the reader and writer of the resourcepack lists of ``options.txt``."""
+
+import json
+
+import pytest
+
+from mc_resourcepacks_util_shared.library.pack_list import format_pack_list, parse_pack_list
+
+
+PACKS: list[str] = ["vanilla", "file/Faithful (32x)!.zip", 'file/Say "hi" §a.zip', "file/back\\slash\ttab.zip"]
+
+
+def _escape(code: int) -> str:
+    return f"\\u{code:04x}"
+
+
+@pytest.mark.parametrize("value", ["[]", " [ ] ", "[\n]"])
+def test_empty_list(value: str) -> None:
+    """An empty list, with or without whitespace inside it, has no entries."""
+    assert not parse_pack_list(value)
+
+
+def test_trailing_comma() -> None:
+    """A trailing comma is accepted, the same as Gson reads lists leniently."""
+    assert parse_pack_list('["vanilla","file/pack.zip",]') == ["vanilla", "file/pack.zip"]
+
+
+def test_escaped_quote() -> None:
+    """An escaped quote is part of the entry instead of ending it."""
+    assert parse_pack_list('["file/Say \\"hi\\".zip", "vanilla"]') == ['file/Say "hi".zip', "vanilla"]
+
+
+def test_unicode_escapes() -> None:
+    """The ``\\uXXXX`` escapes are decoded, surrogate pairs into the single character they stand for."""
+    assert parse_pack_list(f'["file/{_escape(0x21)}{_escape(0xa7)}pack.zip"]') == ["file/!§pack.zip"]
+    assert parse_pack_list(f'["file/{_escape(0xd83d)}{_escape(0xde00)}.zip"]') == ["file/\U0001f600.zip"]
+
+
+@pytest.mark.parametrize("raw", [True, False])
+def test_round_trip(raw: bool) -> None:
+    """A written list is valid JSON and reads back to the same entries."""
+    value: str = format_pack_list(PACKS, raw=raw)
+    assert json.loads(value) == PACKS
+    assert parse_pack_list(value) == PACKS
+
+
+def test_raw_escapes() -> None:
+    """Only raw lists escape the characters Minecraft writes as ``\\uXXXX`` in pack names."""
+    escaped: str = f"{_escape(0x28)}a{_escape(0x29)}{_escape(0x21)}"
+    assert format_pack_list(["file/(a)!.zip"], raw=True) == f'["file/{escaped}.zip"]'
+    assert format_pack_list(["file/(a)!.zip"], raw=False) == '["file/(a)!.zip"]'
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "vanilla", '"vanilla"', '["vanilla"', '["vanilla" "file/pack.zip"]', '["vanilla",,]', "[1, 2]", '["a]'],
+)
+def test_malformed_lists(value: str) -> None:
+    """Values that are not a JSON list of strings are rejected."""
+    with pytest.raises(ValueError):
+        parse_pack_list(value)
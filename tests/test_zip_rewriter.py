@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""Tests of the zip writer that copies the compressed bytes of unchanged entries."""
+
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from mc_resourcepacks_util_shared.library.extensions.zip_reader import ZIP_STORED, ZipDirectory, ZipEntry
+from mc_resourcepacks_util_shared.library.extensions.zip_rewriter import rewrite_zip
+
+
+MEMBERS: dict[str, bytes] = {
+    "pack.mcmeta": b'{"pack": {"pack_format": 15, "description": "Test"}}',
+    "assets/minecraft/textures/block/stone.png": bytes(range(256)) * 64,
+    "assets/minecraft/lang/en_us.json": b'{"block.minecraft.stone": "Stone"}' * 32,
+}
+
+
+def _create_archive(comment: bytes = b"") -> bytes:
+    buffer: io.BytesIO = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.comment = comment
+        zip_file.writestr("assets/", b"")
+        for name, data in MEMBERS.items():
+            zip_file.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _raw_members(archive: bytes) -> dict[str, bytes]:
+    zip_directory: ZipDirectory = ZipDirectory(archive)
+    raw: dict[str, bytes] = {}
+    entry: ZipEntry
+    for entry in zip_directory.entries():
+        view: memoryview = zip_directory.read_raw(entry)
+        raw[entry.name] = bytes(view)
+        view.release()
+    return raw
+
+
+def _rewrite(archive: bytes, replacements: dict[str, bytes], compress_type: int | None = None) -> bytes:
+    target: io.BytesIO = io.BytesIO()
+    if compress_type is None:
+        rewrite_zip(ZipDirectory(archive), target, replacements)
+    else:
+        rewrite_zip(ZipDirectory(archive), target, replacements, compress_type)
+    return target.getvalue()
+
+
+def test_round_trip_without_replacements() -> None:
+    """Rewriting without replacements gives a valid archive with the same compressed bytes."""
+    archive: bytes = _create_archive()
+    rewritten: bytes = _rewrite(archive, {})
+    with zipfile.ZipFile(io.BytesIO(rewritten)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ["assets/", *MEMBERS]
+        for name, data in MEMBERS.items():
+            assert zip_file.read(name) == data
+    assert _raw_members(rewritten) == _raw_members(archive)
+
+
+@pytest.mark.parametrize("compress_type", [None, ZIP_STORED])
+def test_replaced_member_keeps_others_byte_identical(compress_type: int | None) -> None:
+    """Only the replaced entry is compressed again, every other entry is copied as it is."""
+    archive: bytes = _create_archive()
+    new_mcmeta: bytes = b'{"pack": {"pack_format": 34, "description": "Test"}}'
+    rewritten: bytes = _rewrite(archive, {"pack.mcmeta": new_mcmeta}, compress_type)
+    with zipfile.ZipFile(io.BytesIO(rewritten)) as zip_file:
+        assert zip_file.testzip() is None
+        # NOTE: A replaced entry keeps its position in the archive.
+        assert zip_file.namelist() == ["assets/", *MEMBERS]
+        assert zip_file.read("pack.mcmeta") == new_mcmeta
+    original: dict[str, bytes] = _raw_members(archive)
+    copied: dict[str, bytes] = _raw_members(rewritten)
+    for name, raw in original.items():
+        if name != "pack.mcmeta":
+            assert copied[name] == raw
+
+
+def test_new_member_is_added_at_the_end() -> None:
+    """A replacement for an entry that does not exist is added after the existing entries."""
+    archive: bytes = _create_archive()
+    rewritten: bytes = _rewrite(archive, {"pack.png": b"\x89PNG"})
+    with zipfile.ZipFile(io.BytesIO(rewritten)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ["assets/", *MEMBERS, "pack.png"]
+        assert zip_file.read("pack.png") == b"\x89PNG"
+
+
+def test_archive_comment_is_kept() -> None:
+    """The comment of the archive is copied to the end of central directory record."""
+    archive: bytes = _create_archive(comment=b"Made for a test")
+    rewritten: bytes = _rewrite(archive, {"pack.mcmeta": b"{}"})
+    with zipfile.ZipFile(io.BytesIO(rewritten)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.comment == b"Made for a test"
+
+
+def test_data_descriptors_are_copied(tmp_path: Path) -> None:
+    """Entries followed by a data descriptor are copied together with it."""
+    # NOTE: ``zipfile`` writes a data descriptor after every member when it writes to a stream it cannot seek.
+    class _Unseekable(io.BytesIO):
+        def seekable(self) -> bool:
+            return False
+
+        def tell(self) -> int:
+            raise OSError("The stream cannot be seeked.")
+
+    buffer: _Unseekable = _Unseekable()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, data in MEMBERS.items():
+            zip_file.writestr(name, data)
+    archive_file: Path = Path(tmp_path, "streamed.zip")
+    archive_file.write_bytes(buffer.getvalue())
+    with ZipDirectory.open(archive_file) as zip_directory:
+        assert all(entry.flag_bits & 0x8 for entry in zip_directory.entries())
+        target: io.BytesIO = io.BytesIO()
+        rewrite_zip(zip_directory, target, {"pack.mcmeta": b"{}"})
+    with zipfile.ZipFile(io.BytesIO(target.getvalue())) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.read("pack.mcmeta") == b"{}"
+        for name in list(MEMBERS)[1:]:
+            assert zip_file.read(name) == MEMBERS[name]